@@ -1,5 +1,6 @@
 """Keyword enrichment plugins package."""
 
-from .base import PluginBase, EnrichmentResult
+from .base import PluginBase, EnrichmentResult, RateLimiter
+from .cache import SqliteCache
 
-__all__ = ["PluginBase", "EnrichmentResult"]
+__all__ = ["PluginBase", "EnrichmentResult", "RateLimiter", "SqliteCache"]
@@ -1,7 +1,10 @@
 from __future__ import annotations
 import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 
 
 @dataclass
@@ -10,22 +13,104 @@ class EnrichmentResult:
     data: Dict[str, Any]
 
 
+class RateLimiter:
+    """Thread-safe token bucket: `rate` tokens per second, up to `burst` banked."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                wait = (1.0 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
 class PluginBase:
     name: str = "base"
+    # Concurrency/rate settings; subclasses override. max_concurrency=1 keeps
+    # enrich_many serial, rate_per_sec=None disables throttling.
+    max_concurrency: int = 1
+    rate_per_sec: Optional[float] = None
+    rate_burst: int = 1
+    # Row fields the plugin reads (besides the keyword) and fields it returns;
+    # the orchestrator derives stage dependencies from these.
+    inputs: Tuple[str, ...] = ()
+    outputs: Tuple[str, ...] = ()
+
+    _limiters: Dict[type, RateLimiter] = {}
+    _limiters_lock = threading.Lock()
 
     def __init__(self, **kwargs):
         self.config = kwargs
+        self.max_concurrency = max(1, int(kwargs.get("max_concurrency", type(self).max_concurrency)))
+
+    @classmethod
+    def rate_limiter(cls) -> Optional[RateLimiter]:
+        """Limiter shared by every instance of this plugin class (None when unthrottled)."""
+        if not cls.rate_per_sec:
+            return None
+        with PluginBase._limiters_lock:
+            lim = PluginBase._limiters.get(cls)
+            if lim is None:
+                lim = RateLimiter(cls.rate_per_sec, cls.rate_burst)
+                PluginBase._limiters[cls] = lim
+            return lim
+
+    def throttle(self) -> None:
+        """Block until the plugin's rate budget allows one more outbound request."""
+        lim = self.rate_limiter()
+        if lim is not None:
+            lim.acquire()
+
+    def cache_context(self, context: Optional[Dict[str, Any]] = None) -> Any:
+        """Extra values (e.g. a date window) that key cached results besides the run context."""
+        return None
 
     def enrich_keyword(self, keyword: str, context: Optional[Dict[str, Any]] = None) -> EnrichmentResult:
         """Enrich a single keyword; never raise on failures."""
         return EnrichmentResult(keyword=keyword, data={})
 
+    def _enrich_safe(self, keyword: str, context: Optional[Dict[str, Any]]) -> dict:
+        try:
+            res = self.enrich_keyword(keyword, context=context)
+            return res.data or {}
+        except Exception:
+            return {}
+
     def enrich_many(self, keywords: list[str], context: Optional[Dict[str, Any]] = None) -> dict[str, dict]:
+        """Enrich keywords, concurrently when max_concurrency > 1.
+
+        Results keep input order; failures map to {} and never raise.
+        `context["max_concurrency"]` overrides the plugin setting for one call.
+        """
+        unique = list(dict.fromkeys(keywords))
+        try:
+            workers = int((context or {}).get("max_concurrency") or self.max_concurrency)
+        except Exception:
+            workers = self.max_concurrency
+        workers = max(1, min(workers, len(unique)))
+        if workers == 1:
+            return {k: self._enrich_safe(k, context) for k in unique}
+
         out: dict[str, dict] = {}
-        for k in keywords:
-            try:
-                res = self.enrich_keyword(k, context=context)
-                out[k] = res.data or {}
-            except Exception:
-                out[k] = {}
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            futures = [(k, ex.submit(self._enrich_safe, k, context)) for k in unique]
+            for k, fut in futures:
+                try:
+                    out[k] = fut.result()
+                except Exception:
+                    out[k] = {}
         return out
@@ -0,0 +1,201 @@
+from __future__ import annotations
+import glob
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# SQLite caps host parameters per statement (999 on older builds)
+_CHUNK = 500
+# Minimum seconds between the size checks `put_many` runs when max_entries is set
+EVICT_INTERVAL = 60.0
+
+
+class SqliteCache:
+    """Single-file key/value cache with per-entry TTL and size/age eviction.
+
+    Values are JSON-serialisable objects. Keys are opaque strings (plugins use
+    a hash of keyword + context). Safe to share across threads.
+
+    With `max_entries`, writes keep an upper-bound row count in memory and only
+    run `evict()` once it is over the limit, at most every `EVICT_INTERVAL` seconds.
+    """
+
+    def __init__(self, path: str, default_ttl_days: float = 30.0, max_entries: Optional[int] = None):
+        self.path = os.path.abspath(path)
+        self.default_ttl_days = float(default_ttl_days)
+        self.max_entries = max_entries
+        self._approx_count: Optional[int] = None  # upper bound on rows; None until counted
+        self._last_evict = 0.0
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_entries_expires ON entries(expires_at);
+            CREATE INDEX IF NOT EXISTS idx_entries_created ON entries(created_at);
+            CREATE TABLE IF NOT EXISTS meta (
+                name TEXT PRIMARY KEY,
+                value TEXT
+            );
+            """
+        )
+        self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # ---- reads ----
+    def get(self, key: str) -> Optional[Any]:
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Return {key: value} for unexpired keys; missing/expired keys are absent."""
+        keys = list(dict.fromkeys(keys))
+        out: Dict[str, Any] = {}
+        now = time.time()
+        with self._lock:
+            for i in range(0, len(keys), _CHUNK):
+                chunk = keys[i:i + _CHUNK]
+                marks = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, value FROM entries WHERE key IN ({marks}) AND expires_at > ?",
+                    (*chunk, now),
+                ).fetchall()
+                for k, v in rows:
+                    try:
+                        out[k] = json.loads(v)
+                    except Exception:
+                        continue
+        return out
+
+    # ---- writes ----
+    def put(self, key: str, value: Any, ttl_days: Optional[float] = None) -> None:
+        self.put_many({key: value}, ttl_days=ttl_days)
+
+    def put_many(self, items: Dict[str, Any], ttl_days: Optional[float] = None) -> None:
+        if not items:
+            return
+        now = time.time()
+        ttl = self.default_ttl_days if ttl_days is None else float(ttl_days)
+        rows = [
+            (k, json.dumps(v, ensure_ascii=False), now, now + ttl * 86400.0)
+            for k, v in items.items()
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO entries (key, value, created_at, expires_at) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+            if self._approx_count is not None:
+                self._approx_count += len(rows)
+        if self.max_entries:
+            self._maybe_evict()
+
+    def _maybe_evict(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_evict < EVICT_INTERVAL:
+                return
+            if self._approx_count is None:
+                (self._approx_count,) = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()
+            if self._approx_count <= int(self.max_entries):
+                return
+            self._last_evict = now
+        self.evict(max_entries=self.max_entries)
+
+    def delete_many(self, keys: Iterable[str]) -> None:
+        keys = list(keys)
+        with self._lock:
+            for i in range(0, len(keys), _CHUNK):
+                chunk = keys[i:i + _CHUNK]
+                marks = ",".join("?" * len(chunk))
+                self._conn.execute(f"DELETE FROM entries WHERE key IN ({marks})", chunk)
+            self._conn.commit()
+
+    def evict(self, max_entries: Optional[int] = None, max_age_days: Optional[float] = None) -> int:
+        """Drop expired entries, entries older than max_age_days, then the oldest beyond max_entries."""
+        now = time.time()
+        removed = 0
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM entries WHERE expires_at <= ?", (now,))
+            removed += cur.rowcount or 0
+            if max_age_days is not None:
+                cur = self._conn.execute(
+                    "DELETE FROM entries WHERE created_at < ?", (now - float(max_age_days) * 86400.0,)
+                )
+                removed += cur.rowcount or 0
+            if max_entries is not None:
+                (count,) = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()
+                excess = count - int(max_entries)
+                self._approx_count = min(count, int(max_entries))
+                if excess > 0:
+                    cur = self._conn.execute(
+                        "DELETE FROM entries WHERE key IN "
+                        "(SELECT key FROM entries ORDER BY created_at ASC LIMIT ?)",
+                        (excess,),
+                    )
+                    removed += cur.rowcount or 0
+            self._conn.commit()
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            (total,) = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()
+            (live,) = self._conn.execute("SELECT COUNT(*) FROM entries WHERE expires_at > ?", (now,)).fetchone()
+        return {"path": self.path, "entries": total, "live": live}
+
+    # ---- migration ----
+    def _meta_get(self, name: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def _meta_set(self, name: str, value: str) -> None:
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", (name, value))
+            self._conn.commit()
+
+    def import_json_dir(self, json_root: str, ttl_days: Optional[float] = None, force: bool = False) -> int:
+        """One-time import of legacy `<json_root>/<YYYY-MM>/<key>.json` cache files.
+
+        The file stem becomes the key and the file mtime the creation time, so
+        entries keep their original age. Existing keys are not overwritten.
+        Files are left in place. Returns the number of entries imported.
+        """
+        if not force and self._meta_get("json_imported"):
+            return 0
+        ttl = (self.default_ttl_days if ttl_days is None else float(ttl_days)) * 86400.0
+        rows: List[Tuple[str, str, float, float]] = []
+        for path in glob.glob(os.path.join(json_root, "*", "*.json")):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                mtime = os.stat(path).st_mtime
+            except Exception:
+                continue
+            key = os.path.splitext(os.path.basename(path))[0]
+            rows.append((key, json.dumps(data, ensure_ascii=False), mtime, mtime + ttl))
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO entries (key, value, created_at, expires_at) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            imported = self._conn.total_changes - before
+            self._conn.commit()
+        self._meta_set("json_imported", str(time.time()))
+        return imported
@@ -0,0 +1,170 @@
+"""Columnar opportunity scoring (docs/ORCHESTRATOR.md fusion + decision rules).
+
+`FusionColumns` holds the enriched table as NumPy arrays (NaN = unknown), and
+`opportunity_scores` / `recommendations` evaluate the whole table at once, so
+re-weighting a large enriched run is a handful of array operations.
+"""
+from __future__ import annotations
+from dataclasses import asdict, dataclass, fields
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+import numpy as np
+
+RECOMMENDATIONS = ("area_service_page", "guide_or_blog", "citations_focus", "deprioritise", "evaluate")
+
+
+@dataclass
+class FusionWeights:
+    quick_win_boost: float = 0.25
+    local_intent_weight: float = 1.3
+    service_intents: tuple = ("transactional", "commercial")
+    default_trend_factor: float = 1.0
+    # competition_proxy = 1 + difficulty / competition_scale
+    competition_scale: float = 100.0
+    # Used when neither Ads nor Bing answered (spec default: 0 → score 0)
+    default_volume_weight: float = 0.0
+    area_service_min_service_ratio: float = 0.5
+    area_service_min_score: float = 0.6
+    citations_min_directories_ratio: float = 0.5
+
+    @classmethod
+    def from_dict(cls, data: Optional[Mapping[str, Any]]) -> "FusionWeights":
+        known = {f.name for f in fields(cls)}
+        kwargs = {k: v for k, v in (data or {}).items() if k in known}
+        if "service_intents" in kwargs:
+            kwargs["service_intents"] = tuple(kwargs["service_intents"])
+        return cls(**kwargs)
+
+    def to_dict(self) -> Dict[str, Any]:
+        d = asdict(self)
+        d["service_intents"] = list(self.service_intents)
+        return d
+
+
+_NUMERIC = (
+    "volume_weight", "volume_weight_bing", "trend_factor", "difficulty",
+    "service_ratio", "blog_ratio", "directories_ratio", "gsc_impressions",
+)
+_FLAGS = ("quick_win", "local_pack")
+
+
+def _to_float(values: Iterable[Any]) -> np.ndarray:
+    out = []
+    for v in values:
+        if v is None or v == "":
+            out.append(np.nan)
+            continue
+        try:
+            out.append(float(v))
+        except Exception:
+            out.append(np.nan)
+    return np.asarray(out, dtype=np.float64)
+
+
+def _to_flag(values: Iterable[Any]) -> np.ndarray:
+    return np.fromiter(
+        ((v.strip().lower() in {"true", "1", "yes"}) if isinstance(v, str) else bool(v) for v in values),
+        dtype=bool,
+    )
+
+
+@dataclass
+class FusionColumns:
+    n: int
+    volume_weight: np.ndarray
+    volume_weight_bing: np.ndarray
+    trend_factor: np.ndarray
+    difficulty: np.ndarray
+    service_ratio: np.ndarray
+    blog_ratio: np.ndarray
+    directories_ratio: np.ndarray
+    gsc_impressions: np.ndarray
+    quick_win: np.ndarray
+    local_pack: np.ndarray
+    intent: np.ndarray       # str
+    trend_label: np.ndarray  # str
+
+    @classmethod
+    def from_rows(cls, rows: List[Mapping[str, Any]]) -> "FusionColumns":
+        cols: Dict[str, Any] = {"n": len(rows)}
+        for name in _NUMERIC:
+            cols[name] = _to_float(r.get(name) for r in rows)
+        for name in _FLAGS:
+            cols[name] = _to_flag(r.get(name) for r in rows)
+        cols["intent"] = np.asarray([str(r.get("intent") or "") for r in rows], dtype=object)
+        cols["trend_label"] = np.asarray([str(r.get("trend_label") or "") for r in rows], dtype=object)
+        return cls(**cols)
+
+    @classmethod
+    def from_frame(cls, df: Any) -> "FusionColumns":
+        """From a pandas DataFrame (e.g. pd.read_csv('keyword_enriched.csv'))."""
+        n = len(df)
+
+        def num(name: str) -> np.ndarray:
+            if name not in df:
+                return np.full(n, np.nan)
+            import pandas as pd  # type: ignore
+            return pd.to_numeric(df[name], errors="coerce").to_numpy(dtype=np.float64)
+
+        def flag(name: str) -> np.ndarray:
+            if name not in df:
+                return np.zeros(n, dtype=bool)
+            return df[name].astype(str).str.strip().str.lower().isin(["true", "1", "yes"]).to_numpy()
+
+        def text(name: str) -> np.ndarray:
+            if name not in df:
+                return np.full(n, "", dtype=object)
+            return df[name].fillna("").astype(str).to_numpy(dtype=object)
+
+        return cls(
+            n=n,
+            **{name: num(name) for name in _NUMERIC},
+            **{name: flag(name) for name in _FLAGS},
+            intent=text("intent"),
+            trend_label=text("trend_label"),
+        )
+
+    def volume(self) -> np.ndarray:
+        """Ads weight first, Bing as fallback; NaN when neither answered."""
+        return np.where(np.isnan(self.volume_weight), self.volume_weight_bing, self.volume_weight)
+
+
+def opportunity_scores(cols: FusionColumns, weights: Optional[FusionWeights] = None) -> np.ndarray:
+    """volume × trend × (1 + quick_win) × intent ÷ competition, for every row (rounded to 4 dp)."""
+    w = weights or FusionWeights()
+    volume = np.nan_to_num(cols.volume(), nan=w.default_volume_weight)
+    trend = np.where(np.isnan(cols.trend_factor) | (cols.trend_factor == 0), w.default_trend_factor, cols.trend_factor)
+    quick = np.where(cols.quick_win, 1.0 + w.quick_win_boost, 1.0)
+    service_intent = np.isin(cols.intent, list(w.service_intents))
+    intent = np.where(cols.local_pack & service_intent, w.local_intent_weight, 1.0)
+    difficulty = np.clip(np.nan_to_num(cols.difficulty, nan=0.0), 0.0, 100.0)
+    competition = 1.0 + difficulty / w.competition_scale
+    return np.round(volume * trend * quick * intent / competition, 4)
+
+
+def recommendations(cols: FusionColumns, scores: np.ndarray, weights: Optional[FusionWeights] = None) -> np.ndarray:
+    """Decision rules in priority order; returns an array of labels."""
+    w = weights or FusionWeights()
+    service = np.nan_to_num(cols.service_ratio, nan=0.0)
+    blog = np.nan_to_num(cols.blog_ratio, nan=0.0)
+    directories = np.nan_to_num(cols.directories_ratio, nan=0.0)
+    volume = cols.volume()
+    conditions = [
+        cols.local_pack & (service >= w.area_service_min_service_ratio) & (scores >= w.area_service_min_score),
+        (blog > service) & ~cols.local_pack,
+        directories > w.citations_min_directories_ratio,
+        (volume == 0) | ((cols.trend_label == "declining") & (cols.gsc_impressions == 0)),
+    ]
+    return np.select(conditions, list(RECOMMENDATIONS[:4]), default=RECOMMENDATIONS[4])
+
+
+def score_rows(rows: List[Dict[str, Any]], weights: Optional[FusionWeights] = None) -> None:
+    """Add opportunity_score and recommendation to each row dict in place."""
+    if not rows:
+        return
+    cols = FusionColumns.from_rows(rows)
+    scores = opportunity_scores(cols, weights)
+    recs = recommendations(cols, scores, weights)
+    for row, s, r in zip(rows, scores.tolist(), recs.tolist()):
+        row["opportunity_score"] = s
+        row["recommendation"] = r
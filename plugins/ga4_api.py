@@ -0,0 +1,214 @@
+"""GA4 Data API fetch layer: batched, fully paginated, TTL-cached reports.
+
+`run_reports` sends up to five report specs per `batch_run_reports` call,
+follows `offset` pagination until every row is fetched (or the spec's
+`max_rows` is reached), caches each finished table per request for a TTL
+(at most `MAX_CACHE_ENTRIES` tables; expired ones are dropped on insert),
+and returns columnar tables ({column: [values]}) that load straight into a
+DataFrame.
+"""
+from __future__ import annotations
+import hashlib
+import json
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from google.analytics.data_v1beta.types import (  # type: ignore
+        BatchRunReportsRequest,
+        DateRange,
+        Dimension,
+        Filter,
+        FilterExpression,
+        Metric,
+        OrderBy,
+        RunReportRequest,
+    )
+except Exception:
+    BatchRunReportsRequest = DateRange = Dimension = Filter = FilterExpression = None  # type: ignore
+    Metric = OrderBy = RunReportRequest = None  # type: ignore
+
+# batch_run_reports accepts at most 5 requests; one page returns at most 100k rows
+BATCH_SIZE = 5
+PAGE_LIMIT = 100_000
+DEFAULT_TTL_SECONDS = 600.0
+# Tables can be large ("fetch all rows"), so the process keeps only this many
+MAX_CACHE_ENTRIES = 32
+
+Table = Dict[str, List[Any]]
+
+
+@dataclass
+class ReportSpec:
+    dimensions: List[str]
+    metrics: List[str]
+    start_date: str
+    end_date: str
+    order_by_metric: Optional[str] = None
+    desc: bool = True
+    max_rows: Optional[int] = None  # None = every row
+    label: str = ""
+    extra: Dict[str, Any] = field(default_factory=dict)  # passed through to RunReportRequest
+
+
+_cache_lock = threading.Lock()
+_cache: Dict[str, Tuple[float, Table]] = {}
+
+
+def _cache_key(property_id: str, spec: ReportSpec) -> str:
+    payload = json.dumps({"property": str(property_id), **asdict(spec)}, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def clear_cache() -> None:
+    with _cache_lock:
+        _cache.clear()
+
+
+def _cache_store(key: str, expires: float, table: Table) -> None:
+    """Insert under `_cache_lock`, dropping expired tables and then the oldest beyond MAX_CACHE_ENTRIES."""
+    now = time.time()
+    for k in [k for k, (exp, _) in _cache.items() if exp <= now]:
+        del _cache[k]
+    _cache[key] = (expires, table)
+    while len(_cache) > MAX_CACHE_ENTRIES:
+        del _cache[min(_cache, key=lambda k: _cache[k][0])]
+
+
+def in_list_filter(dimension: str, values: List[str]) -> Dict[str, Any]:
+    """`ReportSpec.extra` restricting `dimension` to `values` (e.g. the pages of another table)."""
+    if FilterExpression is None:
+        raise RuntimeError("Google Analytics client libraries not available. Install 'google-analytics-data'.")
+    return {
+        "dimension_filter": FilterExpression(
+            filter=Filter(field_name=dimension, in_list_filter=Filter.InListFilter(values=list(values)))
+        )
+    }
+
+
+def _request(property_id: str, spec: ReportSpec, offset: int) -> Any:
+    limit = PAGE_LIMIT
+    if spec.max_rows is not None:
+        limit = max(1, min(PAGE_LIMIT, int(spec.max_rows) - offset))
+    kwargs: Dict[str, Any] = {
+        "property": f"properties/{property_id}",
+        "dimensions": [Dimension(name=d) for d in spec.dimensions],
+        "metrics": [Metric(name=m) for m in spec.metrics],
+        "date_ranges": [DateRange(start_date=spec.start_date, end_date=spec.end_date)],
+        "limit": limit,
+        "offset": offset,
+    }
+    if spec.order_by_metric:
+        kwargs["order_bys"] = [OrderBy(metric=OrderBy.MetricOrderBy(metric_name=spec.order_by_metric), desc=spec.desc)]
+    kwargs.update(spec.extra or {})
+    return RunReportRequest(**kwargs)
+
+
+def _convert(value: str, kind: str) -> Any:
+    try:
+        if kind == "TYPE_INTEGER":
+            return int(float(value))
+        return float(value)
+    except Exception:
+        return 0 if kind == "TYPE_INTEGER" else 0.0
+
+
+class _Accumulator:
+    """Columnar rows for one spec, filled page by page."""
+
+    def __init__(self, spec: ReportSpec):
+        self.spec = spec
+        self.table: Table = {c: [] for c in list(spec.dimensions) + list(spec.metrics)}
+        self.row_count: Optional[int] = None
+        self.fetched = 0
+
+    def add(self, resp: Any) -> None:
+        dims = [h.name for h in resp.dimension_headers] or list(self.spec.dimensions)
+        mets = [h.name for h in resp.metric_headers] or list(self.spec.metrics)
+        kinds = [getattr(h.type_, "name", "TYPE_FLOAT") for h in resp.metric_headers] or ["TYPE_FLOAT"] * len(mets)
+        for name in dims + mets:
+            self.table.setdefault(name, [])
+        for r in resp.rows:
+            for name, v in zip(dims, r.dimension_values):
+                self.table[name].append(v.value)
+            for name, kind, v in zip(mets, kinds, r.metric_values):
+                self.table[name].append(_convert(v.value, kind))
+        self.fetched += len(resp.rows)
+        self.row_count = int(resp.row_count or 0)
+
+    def done(self) -> bool:
+        if self.row_count is None:
+            return False
+        target = self.row_count
+        if self.spec.max_rows is not None:
+            target = min(target, int(self.spec.max_rows))
+        return self.fetched >= target
+
+
+def run_reports(
+    client: Any,
+    property_id: str,
+    specs: List[ReportSpec],
+    ttl_seconds: float = DEFAULT_TTL_SECONDS,
+    use_cache: bool = True,
+) -> List[Table]:
+    """Fetch every spec (in order) as a columnar table.
+
+    First pages go out together via batch_run_reports; specs with more rows
+    than one page continue with run_report at increasing offsets.
+    """
+    if RunReportRequest is None:
+        raise RuntimeError("Google Analytics client libraries not available. Install 'google-analytics-data'.")
+    now = time.time()
+    keys = [_cache_key(property_id, s) for s in specs]
+    out: List[Optional[Table]] = [None] * len(specs)
+    if use_cache:
+        with _cache_lock:
+            for i, k in enumerate(keys):
+                hit = _cache.get(k)
+                if hit is not None and hit[0] > now:
+                    out[i] = hit[1]
+
+    # Dedupe identical specs within the call
+    pending: Dict[str, int] = {}
+    for i, k in enumerate(keys):
+        if out[i] is None and k not in pending:
+            pending[k] = i
+    todo = list(pending.values())
+    accs = {i: _Accumulator(specs[i]) for i in todo}
+
+    for b in range(0, len(todo), BATCH_SIZE):
+        chunk = todo[b:b + BATCH_SIZE]
+        if len(chunk) == 1:
+            accs[chunk[0]].add(client.run_report(_request(property_id, specs[chunk[0]], 0)))
+            continue
+        batch = BatchRunReportsRequest(
+            property=f"properties/{property_id}",
+            requests=[_request(property_id, specs[i], 0) for i in chunk],
+        )
+        resp = client.batch_run_reports(batch)
+        for i, report in zip(chunk, resp.reports):
+            accs[i].add(report)
+
+    for i in todo:
+        acc = accs[i]
+        while not acc.done():
+            before = acc.fetched
+            acc.add(client.run_report(_request(property_id, specs[i], acc.fetched)))
+            if acc.fetched == before:
+                break
+
+    expires = time.time() + float(ttl_seconds)
+    with _cache_lock:
+        for k, i in pending.items():
+            _cache_store(k, expires, accs[i].table)
+    for i, k in enumerate(keys):
+        if out[i] is None:
+            out[i] = accs[pending[k]].table
+    return out  # type: ignore[return-value]
+
+
+def run_report(client: Any, property_id: str, spec: ReportSpec, **kwargs) -> Table:
+    return run_reports(client, property_id, [spec], **kwargs)[0]
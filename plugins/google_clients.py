@@ -0,0 +1,153 @@
+"""Process-wide registry of authenticated Google API clients (service accounts).
+
+Credentials are loaded once per (key path, scopes) and reloaded only when the
+key file changes; tokens are refreshed ahead of expiry rather than on a 401.
+Search Console discovery clients are not thread-safe, so they are leased from
+a small per-key pool; the GA4 Data API client (gRPC) is shared directly.
+Pages and tools/ CLIs import the same registry, so Streamlit reruns reuse clients.
+"""
+from __future__ import annotations
+import datetime as dt
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    from google.oauth2 import service_account  # type: ignore
+    from google.auth.transport.requests import Request  # type: ignore
+except Exception:
+    service_account = None
+    Request = None
+
+GSC_SCOPES = ["https://www.googleapis.com/auth/webmasters.readonly"]
+GA4_SCOPES = ["https://www.googleapis.com/auth/analytics.readonly"]
+# Refresh tokens this long before they expire
+REFRESH_MARGIN = dt.timedelta(minutes=5)
+
+_Key = Tuple[str, Tuple[str, ...]]
+
+
+class _CredEntry:
+    def __init__(self, creds: Any, mtime_ns: int):
+        self.creds = creds
+        self.mtime_ns = mtime_ns
+        self.lock = threading.Lock()
+
+
+_lock = threading.Lock()
+_creds: Dict[_Key, _CredEntry] = {}
+_gsc_idle: Dict[_Key, List[Any]] = {}
+_gsc_built: Dict[_Key, int] = {}
+_ga4: Dict[_Key, Any] = {}
+
+
+def _key(key_path: str, scopes: Sequence[str]) -> _Key:
+    return os.path.abspath(key_path), tuple(sorted(scopes))
+
+
+def _needs_refresh(creds: Any) -> bool:
+    if not getattr(creds, "token", None):
+        return True
+    expiry = getattr(creds, "expiry", None)
+    if expiry is None:
+        return False
+    # google-auth keeps expiry as naive UTC
+    now = dt.datetime.now(dt.timezone.utc).replace(tzinfo=None)
+    return expiry - now <= REFRESH_MARGIN
+
+
+def _entry(key_path: str, scopes: Sequence[str]) -> _CredEntry:
+    if service_account is None:
+        raise RuntimeError("google-auth is not installed. Install 'google-auth'.")
+    k = _key(key_path, scopes)
+    mtime_ns = os.stat(k[0]).st_mtime_ns
+    with _lock:
+        entry = _creds.get(k)
+        if entry is not None and entry.mtime_ns == mtime_ns:
+            return entry
+        creds = service_account.Credentials.from_service_account_file(k[0], scopes=list(k[1]))
+        entry = _CredEntry(creds, mtime_ns)
+        _creds[k] = entry
+        # Key file rotated: clients built on the old credentials are stale
+        _gsc_idle.pop(k, None)
+        _gsc_built.pop(k, None)
+        _ga4.pop(k, None)
+        return entry
+
+
+def credentials(key_path: str, scopes: Sequence[str]) -> Any:
+    """Cached service-account credentials with a token valid for at least REFRESH_MARGIN."""
+    entry = _entry(key_path, scopes)
+    if _needs_refresh(entry.creds) and Request is not None:
+        with entry.lock:
+            if _needs_refresh(entry.creds):
+                entry.creds.refresh(Request())
+    return entry.creds
+
+
+@contextmanager
+def searchconsole(key_path: str, scopes: Sequence[str] = GSC_SCOPES) -> Iterator[Any]:
+    """Lease a Search Console v1 service for the duration of the block.
+
+    Services are returned to a per-key pool afterwards, so one thread uses a
+    given service at a time and concurrent callers get their own.
+    """
+    from googleapiclient.discovery import build  # type: ignore
+
+    creds = credentials(key_path, scopes)
+    k = _key(key_path, scopes)
+    with _lock:
+        idle = _gsc_idle.setdefault(k, [])
+        svc = idle.pop() if idle else None
+    if svc is None:
+        svc = build("searchconsole", "v1", credentials=creds, cache_discovery=False)
+        with _lock:
+            _gsc_built[k] = _gsc_built.get(k, 0) + 1
+    try:
+        yield svc
+    finally:
+        with _lock:
+            # Dropped if the key was rotated while leased
+            if _creds.get(k) is not None and _creds[k].creds is creds:
+                _gsc_idle.setdefault(k, []).append(svc)
+
+
+def ga4_client(key_path: str, scopes: Sequence[str] = GA4_SCOPES) -> Any:
+    """Shared BetaAnalyticsDataClient for the key (thread-safe gRPC client)."""
+    from google.analytics.data_v1beta import BetaAnalyticsDataClient  # type: ignore
+
+    creds = credentials(key_path, scopes)
+    k = _key(key_path, scopes)
+    with _lock:
+        client = _ga4.get(k)
+        if client is None:
+            client = BetaAnalyticsDataClient(credentials=creds)
+            _ga4[k] = client
+        return client
+
+
+def clear() -> None:
+    """Forget every cached credential and client."""
+    with _lock:
+        _creds.clear()
+        _gsc_idle.clear()
+        _gsc_built.clear()
+        _ga4.clear()
+
+
+def stats() -> List[Dict[str, Any]]:
+    """One row per cached key: token expiry and pooled client counts (for debug panels)."""
+    with _lock:
+        rows = []
+        for (path, scopes), entry in _creds.items():
+            expiry: Optional[dt.datetime] = getattr(entry.creds, "expiry", None)
+            rows.append({
+                "key_path": path,
+                "scopes": " ".join(scopes),
+                "token_expiry_utc": expiry.isoformat() if expiry else None,
+                "gsc_services": _gsc_built.get((path, scopes), 0),
+                "gsc_idle": len(_gsc_idle.get((path, scopes), [])),
+                "ga4_client": (path, scopes) in _ga4,
+            })
+        return rows
@@ -1,11 +1,22 @@
 from __future__ import annotations
+import base64
+import datetime as dt
 import hashlib
-import json
 import os
+import struct
 import time
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from .base import PluginBase, EnrichmentResult
+from .cache import SqliteCache
+
+# pytrends accepts at most five terms per payload
+_BATCH_SIZE = 5
+_CACHE_TTL_DAYS = 30
+_CACHE_MAX_ENTRIES = 200_000
+# A term whose in-batch peak is below this is too coarsely quantised next to
+# bigger batch-mates to label reliably, so it gets its own payload
+_RETRY_PEAK = 10
 
 
 def _geo_from_locale(locale: str | None) -> str:
@@ -20,6 +31,16 @@ def _geo_from_locale(locale: str | None) -> str:
     return ""
 
 
+def _hl_from_locale(locale: str | None) -> str:
+    """Derive pytrends hl like 'en-GB' from locale 'gb-en' or 'us-en'."""
+    loc = (locale or "").lower()
+    parts = loc.split("-")
+    if len(parts) >= 2:
+        cc, lang = parts[0], parts[1]
+        return f"{lang}-{cc.upper()}"
+    return "en-US"
+
+
 def _label_and_factor(series: List[int]) -> tuple[str, float]:
     if not series:
         return "stable", 1.0
@@ -37,97 +58,351 @@ def _label_and_factor(series: List[int]) -> tuple[str, float]:
     return "stable", 1.0
 
 
+def _encode_series(dates: List[str], series: List[int]) -> Optional[Dict[str, Any]]:
+    """Pack a series as base64 uint8 values (rescaled so its own peak is 100)
+    plus base64 little-endian uint16 day offsets from `start`."""
+    if not series or len(dates) != len(series):
+        return None
+    try:
+        days = [dt.date.fromisoformat(d) for d in dates]
+    except Exception:
+        return None
+    peak = max(series)
+    scale = 100.0 / peak if peak > 0 else 0.0
+    values = bytes(min(255, max(0, int(round(v * scale)))) for v in series)
+    offsets = [(d - days[0]).days for d in days]
+    if min(offsets) < 0 or max(offsets) > 0xFFFF:
+        return None
+    return {
+        "start": days[0].isoformat(),
+        "n": len(series),
+        "values": base64.b64encode(values).decode("ascii"),
+        "offsets": base64.b64encode(struct.pack(f"<{len(offsets)}H", *offsets)).decode("ascii"),
+    }
+
+
 class GoogleTrendsPlugin(PluginBase):
     name = "google_trends"
+    # Trends bans aggressive clients quickly: ~1 request / 2s across instances.
+    # enrich_many batches over a single session, so it stays serial.
+    rate_per_sec = 0.5
+    rate_burst = 2
+    outputs = ("trend_label", "trend_factor", "seasonality_peaks", "relative_interest", "trends_anchor")
 
     def __init__(self, cache_dir: Optional[str] = None, **kwargs):
         super().__init__(**kwargs)
-        self.cache_dir = cache_dir or os.path.join(os.path.dirname(__file__), "..", ".cache", "plugins", "google_trends")
+        self.cache_dir = os.path.abspath(
+            cache_dir or os.path.join(os.path.dirname(__file__), "..", ".cache", "plugins", "google_trends")
+        )
+        self.cache_ttl_days = float(kwargs.get("cache_ttl_days", _CACHE_TTL_DAYS))
         try:
             from pytrends.request import TrendReq  # type: ignore  # noqa: F401
             self._available = True
         except Exception:
             self._available = False
+        self._cache: Optional[SqliteCache] = None
+        try:
+            self._cache = SqliteCache(
+                os.path.join(self.cache_dir, "cache.sqlite3"),
+                default_ttl_days=self.cache_ttl_days,
+                max_entries=int(kwargs.get("cache_max_entries", _CACHE_MAX_ENTRIES)),
+            )
+            # Pull in legacy one-file-per-keyword JSON once
+            self._cache.import_json_dir(self.cache_dir)
+        except Exception:
+            self._cache = None
 
-    def _cache_path(self, keyword: str, locale: str, timeframe: str) -> str:
-        ym = time.strftime("%Y-%m")
-        base = os.path.abspath(os.path.join(self.cache_dir, ym))
-        os.makedirs(base, exist_ok=True)
+    def _cache_key(self, keyword: str, locale: str, timeframe: str) -> str:
         key = f"{keyword}\u0001{locale}\u0001{timeframe}"
-        h = hashlib.sha1(key.encode("utf-8")).hexdigest()
-        return os.path.join(base, f"{h}.json")
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()
 
-    def _cache_read(self, path: str, ttl_days: int) -> Optional[Dict[str, Any]]:
+    def _cache_get_many(self, keys: List[str]) -> Dict[str, Any]:
+        if self._cache is None:
+            return {}
         try:
-            if not os.path.isfile(path):
-                return None
-            st = os.stat(path)
-            age_days = (time.time() - st.st_mtime) / 86400.0
-            if age_days > float(ttl_days):
-                return None
-            with open(path, "r", encoding="utf-8") as f:
-                return json.load(f)
+            return self._cache.get_many(keys)
         except Exception:
-            return None
+            return {}
 
-    def _cache_write(self, path: str, data: Dict[str, Any]) -> None:
+    def _cache_put_many(self, items: Dict[str, Dict[str, Any]]) -> None:
+        if self._cache is None or not items:
+            return
         try:
-            with open(path, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False)
+            self._cache.put_many(items)
         except Exception:
             pass
 
-    def enrich_keyword(self, keyword: str, context: Optional[Dict[str, Any]] = None) -> EnrichmentResult:
-        if not self._available:
-            return EnrichmentResult(keyword, {})
+    def _flush(self, fresh: Dict[str, Any]) -> None:
+        """Write queued results and start a new queue."""
+        self._cache_put_many(dict(fresh))
+        fresh.clear()
 
+    def _settings(self, context: Optional[Dict[str, Any]]) -> Dict[str, Any]:
         ctx = context or {}
         locale = ctx.get("locale") or "gb-en"
-        timeframe = ctx.get("date_range") or "today 12-m"
-        no_cache = bool(ctx.get("no_cache"))
-        geo = _geo_from_locale(locale)
+        return {
+            "locale": locale,
+            "timeframe": ctx.get("date_range") or "today 12-m",
+            "no_cache": bool(ctx.get("no_cache")),
+            "geo": _geo_from_locale(locale),
+            "hl": _hl_from_locale(locale),
+        }
 
-        cache_path = self._cache_path(keyword, locale, timeframe)
-        if not no_cache:
-            cached = self._cache_read(cache_path, ttl_days=30)
-            if cached is not None:
-                return EnrichmentResult(keyword, cached)
-
-        # derive hl like 'en-GB' from locale 'gb-en' or 'us-en'
-        def _hl_from_locale(loc: str) -> str:
-            loc = (loc or "").lower()
-            parts = loc.split("-")
-            if len(parts) >= 2:
-                cc, lang = parts[0], parts[1]
-                return f"{lang}-{cc.upper()}"
-            return "en-US"
-
-        hl = _hl_from_locale(locale)
-        try:
-            from pytrends.request import TrendReq  # type: ignore
-            # small retry loop to mitigate transient empty frames / rate limits
-            last_exc: Optional[Exception] = None
-            for _ in range(3):
-                try:
-                    pytrends = TrendReq(hl=hl, tz=0)
-                    pytrends.build_payload([keyword], timeframe=timeframe, geo=geo)
-                    df = pytrends.interest_over_time()
-                    if df is not None and not df.empty and (keyword in df):
-                        series = [int(x) for x in df[keyword].fillna(0).tolist()]
-                        label, factor = _label_and_factor(series)
-                        top_idx = sorted(range(len(series)), key=lambda i: series[i], reverse=True)[:2]
-                        out = {
-                            "trend_label": label,
-                            "trend_factor": factor,
-                            "seasonality_peaks": top_idx,
-                            "source": self.name,
-                        }
-                        self._cache_write(cache_path, out)
-                        return EnrichmentResult(keyword, out)
-                except Exception as e:  # transient
-                    last_exc = e
+    def _new_session(self, hl: str):
+        from pytrends.request import TrendReq  # type: ignore
+        return TrendReq(hl=hl, tz=0)
+
+    def _summarize(self, series: List[int]) -> Dict[str, Any]:
+        label, factor = _label_and_factor(series)
+        top_idx = sorted(range(len(series)), key=lambda i: series[i], reverse=True)[:2]
+        return {
+            "trend_label": label,
+            "trend_factor": factor,
+            "seasonality_peaks": top_idx,
+            "source": self.name,
+        }
+
+    def _fetch_frame(self, pytrends, terms: List[str], timeframe: str, geo: str) -> Optional[Tuple[List[str], Dict[str, List[int]]]]:
+        """One interest_over_time call for up to 5 terms, with small retry loop.
+
+        Returns (iso_dates, {term: series}) for terms present in the frame, or None on failure.
+        """
+        # small retry loop to mitigate transient empty frames / rate limits
+        for attempt in range(3):
+            try:
+                self.throttle()
+                pytrends.build_payload(list(terms), timeframe=timeframe, geo=geo)
+                df = pytrends.interest_over_time()
+                if df is not None and not df.empty:
+                    got = {
+                        t: [int(x) for x in df[t].fillna(0).tolist()]
+                        for t in terms if t in df
+                    }
+                    if got:
+                        try:
+                            dates = [d.strftime("%Y-%m-%d") for d in df.index]
+                        except Exception:
+                            dates = []
+                        return dates, got
+            except Exception:  # transient
+                pass
+            if attempt < 2:
                 time.sleep(1.5)
-            # If we got here, return empty result
+        return None
+
+    def _fetch_single(self, pytrends, keyword: str, timeframe: str, geo: str) -> Optional[Tuple[List[str], List[int]]]:
+        frame = self._fetch_frame(pytrends, [keyword], timeframe, geo)
+        if frame is None:
+            return None
+        dates, by_term = frame
+        series = by_term.get(keyword)
+        if not series:
+            return None
+        return dates, series
+
+    def _series_key(self, cache_key: str) -> str:
+        return f"series:{cache_key}"
+
+    def _relative_key(self, cache_key: str, anchor: str) -> str:
+        return f"rel:{cache_key}:{hashlib.sha1(anchor.encode('utf-8')).hexdigest()}"
+
+    def _anchor(self, context: Optional[Dict[str, Any]]) -> Optional[str]:
+        """Explicit ``context["trends_anchor"]``; relative_interest is only produced against one."""
+        anchor = str((context or {}).get("trends_anchor") or "").strip()
+        return anchor or None
+
+    def _remember(self, fresh: Dict[str, Any], cache_key: str, dates: List[str], series: List[int]) -> Dict[str, Any]:
+        """Queue the summary and the compact series for one keyword; return the summary."""
+        data = self._summarize(series)
+        fresh[cache_key] = data
+        record = _encode_series(dates, series)
+        if record is not None:
+            fresh[self._series_key(cache_key)] = record
+        return data
+
+    def series_records(self, keywords: List[str], context: Optional[Dict[str, Any]] = None) -> Dict[str, Dict[str, Any]]:
+        """Cached compact series per keyword (see `_encode_series`); uncached keywords are absent.
+
+        Decode with `plugins.trends_analytics.load_series` for vectorised metrics.
+        """
+        cfg = self._settings(context)
+        key_of = {k: self._series_key(self._cache_key(k, cfg["locale"], cfg["timeframe"])) for k in keywords}
+        got = self._cache_get_many(list(key_of.values()))
+        return {k: got[sk] for k, sk in key_of.items() if sk in got}
+
+    def enrich_keyword(self, keyword: str, context: Optional[Dict[str, Any]] = None) -> EnrichmentResult:
+        if not self._available:
             return EnrichmentResult(keyword, {})
+
+        cfg = self._settings(context)
+        cache_key = self._cache_key(keyword, cfg["locale"], cfg["timeframe"])
+        if not cfg["no_cache"]:
+            anchor = self._anchor(context)
+            rel_key = self._relative_key(cache_key, anchor) if anchor else None
+            got = self._cache_get_many([cache_key] + ([rel_key] if rel_key else []))
+            cached = got.get(cache_key)
+            if cached is not None:
+                return EnrichmentResult(keyword, {**cached, **(got.get(rel_key) or {})})
+
+        try:
+            pytrends = self._new_session(cfg["hl"])
+            fetched = self._fetch_single(pytrends, keyword, cfg["timeframe"], cfg["geo"])
+            if fetched is None:
+                return EnrichmentResult(keyword, {})
+            fresh: Dict[str, Any] = {}
+            out = self._remember(fresh, cache_key, *fetched)
+            self._cache_put_many(fresh)
+            return EnrichmentResult(keyword, out)
         except Exception:
             return EnrichmentResult(keyword, {})
+
+    def enrich_many(self, keywords: list[str], context: Optional[Dict[str, Any]] = None) -> dict[str, dict]:
+        """Batched enrichment: up to 5 terms per payload over one TrendReq session.
+
+        Every payload carries a shared anchor term (``context["trends_anchor"]``,
+        default the first uncached keyword) to keep batches on one scale.
+        Keywords whose batch failed, or whose in-batch peak is below
+        `_RETRY_PEAK`, are labelled from a single-term payload instead, so
+        batching doesn't change `trend_label`/`trend_factor`.
+
+        ``relative_interest`` (mean interest as % of the anchor's) is only
+        produced for an explicit ``trends_anchor``. It is taken from the batch
+        payload and cached per (keyword, anchor) together with the anchor, so
+        cache hits and retried keywords return it too.
+        Fresh results are cached after every payload, so a failure part-way
+        through keeps what was already fetched.
+        """
+        unique = list(dict.fromkeys(k for k in keywords if isinstance(k, str)))
+        out: dict[str, dict] = {k: {} for k in unique}
+        if not self._available or not unique:
+            return out
+        fresh: Dict[str, Any] = {}
+        try:
+            cfg = self._settings(context)
+            timeframe, geo = cfg["timeframe"], cfg["geo"]
+            explicit = self._anchor(context)
+            key_of = {k: self._cache_key(k, cfg["locale"], timeframe) for k in unique}
+            rel_of = {k: self._relative_key(key_of[k], explicit) for k in unique} if explicit else {}
+            cached = {} if cfg["no_cache"] else self._cache_get_many(list(key_of.values()) + list(rel_of.values()))
+            misses: List[str] = []
+            for k in unique:
+                if key_of[k] in cached and (not explicit or rel_of[k] in cached):
+                    out[k] = {**cached[key_of[k]], **(cached.get(rel_of.get(k)) or {})}
+                else:
+                    misses.append(k)
+            if not misses:
+                return out
+
+            pytrends = self._new_session(cfg["hl"])
+            anchor = explicit or misses[0]
+            others = [k for k in misses if k != anchor]
+            retry: List[str] = []
+            relative: Dict[str, Dict[str, Any]] = {}
+            batch_series: Dict[str, Tuple[List[str], List[int]]] = {}
+            step = _BATCH_SIZE - 1
+            chunks = [others[i:i + step] for i in range(0, len(others), step)] or [[]]
+            for ci, chunk in enumerate(chunks):
+                frame = self._fetch_frame(pytrends, [anchor] + chunk, timeframe, geo)
+                if frame is None:
+                    retry.extend(chunk)
+                    continue
+                dates, frame = frame
+                anchor_series = frame.get(anchor) or []
+                anchor_mean = sum(anchor_series) / len(anchor_series) if anchor_series else 0.0
+                members = list(chunk)
+                if ci == 0 and anchor in misses:
+                    members.insert(0, anchor)
+                for k in members:
+                    series = frame.get(k)
+                    if explicit and series and anchor_mean > 0:
+                        rel = {
+                            "relative_interest": round(100.0 * (sum(series) / len(series)) / anchor_mean, 1),
+                            "trends_anchor": explicit,
+                        }
+                        relative[k] = fresh[rel_of[k]] = rel
+                    if not series or max(series) < _RETRY_PEAK:
+                        # quantised (or zero) next to bigger terms; label it from its own payload
+                        if series and any(series):
+                            batch_series[k] = (dates, series)
+                        retry.append(k)
+                        continue
+                    out[k] = {**self._remember(fresh, key_of[k], dates, series), **relative.get(k, {})}
+                self._flush(fresh)
+            if anchor in misses and not out.get(anchor) and anchor not in retry:
+                retry.append(anchor)
+
+            for k in retry:
+                try:
+                    fetched = self._fetch_single(pytrends, k, timeframe, geo)
+                except Exception:
+                    fetched = None
+                if fetched:
+                    out[k] = {**self._remember(fresh, key_of[k], *fetched), **relative.get(k, {})}
+                    self._flush(fresh)
+                elif k in batch_series:
+                    # Better than nothing, but not cached: the next run retries the single fetch
+                    out[k] = {**self._summarize(batch_series[k][1]), **relative.get(k, {})}
+        except Exception:
+            pass
+        finally:
+            self._flush(fresh)
+        return out
+        fresh: Dict[str, Any] = {}
+        try:
+            cfg = self._settings(context)
+            timeframe, geo = cfg["timeframe"], cfg["geo"]
+            key_of = {k: self._cache_key(k, cfg["locale"], timeframe) for k in unique}
+            cached = {} if cfg["no_cache"] else self._cache_get_many(list(key_of.values()))
+            misses: List[str] = []
+            for k in unique:
+                if key_of[k] in cached:
+                    out[k] = cached[key_of[k]]
+                else:
+                    misses.append(k)
+            if not misses:
+                return out
+
+            pytrends = self._new_session(cfg["hl"])
+            anchor = str((context or {}).get("trends_anchor") or misses[0])
+            others = [k for k in misses if k != anchor]
+            retry: List[str] = []
+            step = _BATCH_SIZE - 1
+            chunks = [others[i:i + step] for i in range(0, len(others), step)] or [[]]
+            for ci, chunk in enumerate(chunks):
+                frame = self._fetch_frame(pytrends, [anchor] + chunk, timeframe, geo)
+                if frame is None:
+                    retry.extend(chunk)
+                    continue
+                dates, frame = frame
+                anchor_series = frame.get(anchor) or []
+                anchor_mean = sum(anchor_series) / len(anchor_series) if anchor_series else 0.0
+                members = list(chunk)
+                if ci == 0 and anchor in misses:
+                    members.insert(0, anchor)
+                for k in members:
+                    series = frame.get(k)
+                    if not series or not any(series):
+                        # squashed to zero next to bigger terms; needs its own payload
+                        retry.append(k)
+                        continue
+                    data = self._remember(fresh, key_of[k], dates, series)
+                    if anchor_mean > 0:
+                        data = {**data, "relative_interest": round(100.0 * (sum(series) / len(series)) / anchor_mean, 1)}
+                    out[k] = data
+                self._flush(fresh)
+            if anchor in misses and not out.get(anchor) and anchor not in retry:
+                retry.append(anchor)
+
+            for k in retry:
+                try:
+                    fetched = self._fetch_single(pytrends, k, timeframe, geo)
+                except Exception:
+                    fetched = None
+                if fetched:
+                    out[k] = self._remember(fresh, key_of[k], *fetched)
+                    self._flush(fresh)
+        except Exception:
+            pass
+        finally:
+            self._flush(fresh)
+        return out
@@ -0,0 +1,420 @@
+"""Google Search Console Search Analytics helpers shared by the overlay page and tools/.
+
+Two ways to get per-keyword metrics:
+- `query_keyword`: one filtered request per keyword (rowLimit 1); run many of
+  them concurrently under a quota budget with `GscScheduler` /
+  `iter_keyword_metrics`.
+- `fetch_query_rows` + `QueryIndex`: pull the site's whole `query` dimension once
+  (paginated with startRow) and answer any number of equals/contains lookups locally.
+"""
+from __future__ import annotations
+import collections
+import datetime as dt
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, ContextManager, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .base import EnrichmentResult, PluginBase, RateLimiter
+
+# Search Analytics maximum rows per request
+PAGE_SIZE = 25000
+
+_WS_RE = re.compile(r"\s+")
+
+
+def normalize_query(q: str) -> str:
+    return _WS_RE.sub(" ", (q or "").strip().lower())
+
+
+def _metrics_row(keyword: str, row: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    if not row:
+        return {
+            "keyword": keyword,
+            "impressions": 0,
+            "clicks": 0,
+            "ctr": 0.0,
+            "position": None,
+        }
+    return {
+        "keyword": keyword,
+        "impressions": int(row.get("impressions", 0)),
+        "clicks": int(row.get("clicks", 0)),
+        "ctr": float(row.get("ctr", 0.0)),
+        "position": float(row.get("position", 0.0)),
+    }
+
+
+def last_day() -> dt.date:
+    """Last day of every GSC window: yesterday (GSC has nothing for today; the warehouse syncs up to it)."""
+    return dt.date.today() - dt.timedelta(days=1)
+
+
+def date_window(days: int) -> Tuple[str, str]:
+    """(start, end) ISO dates for a `days`-long lookback ending at `last_day()`."""
+    end = last_day()
+    return (end - dt.timedelta(days=int(days))).isoformat(), end.isoformat()
+
+
+def query_keyword(svc, site_url: str, start: str, end: str, keyword: str, operator: str = "equals") -> Dict[str, Any]:
+    """Metrics for one keyword via a filtered request (top matching query for `contains`)."""
+    body = {
+        "startDate": start,
+        "endDate": end,
+        "dimensions": ["query"],
+        "dimensionFilterGroups": [
+            {"filters": [{"dimension": "query", "operator": operator, "expression": keyword}]}
+        ],
+        "rowLimit": 1,
+    }
+    resp = svc.searchanalytics().query(siteUrl=site_url, body=body).execute()
+    rows = resp.get("rows", [])
+    return _metrics_row(keyword, rows[0] if rows else None)
+
+
+def fetch_query_rows(
+    svc,
+    site_url: str,
+    start: str,
+    end: str,
+    dimensions: Optional[List[str]] = None,
+    max_rows: Optional[int] = None,
+    page_size: int = PAGE_SIZE,
+    extra_body: Optional[Dict[str, Any]] = None,
+) -> List[Dict[str, Any]]:
+    """Pull every row for the date range, paging with startRow until a short page.
+
+    Rows keep the API shape ({keys, clicks, impressions, ctr, position}) and
+    the API order (clicks descending).
+    """
+    dims = list(dimensions or ["query"])
+    page_size = max(1, min(int(page_size), PAGE_SIZE))
+    out: List[Dict[str, Any]] = []
+    start_row = 0
+    while True:
+        limit = page_size
+        if max_rows is not None:
+            limit = min(limit, int(max_rows) - len(out))
+            if limit <= 0:
+                break
+        body: Dict[str, Any] = {
+            "startDate": start,
+            "endDate": end,
+            "dimensions": dims,
+            "rowLimit": limit,
+            "startRow": start_row,
+        }
+        if extra_body:
+            body.update(extra_body)
+        resp = svc.searchanalytics().query(siteUrl=site_url, body=body).execute()
+        rows = resp.get("rows") or []
+        out.extend(rows)
+        if len(rows) < limit:
+            break
+        start_row += len(rows)
+    return out
+
+
+class QueryIndex:
+    """In-memory index over `query`-dimension rows for local keyword lookups.
+
+    `equals` is a dict lookup on the normalised query. `contains` narrows
+    candidates through a token vocabulary (any space-free part of a keyword
+    must sit inside a single query token) before the substring check, and
+    returns the first match in API order, like a filtered rowLimit=1 request.
+    """
+
+    def __init__(self, rows: Iterable[Dict[str, Any]]):
+        self.rows: List[Dict[str, Any]] = []
+        self.queries: List[str] = []
+        self._by_query: Dict[str, int] = {}
+        self._postings: Dict[str, List[int]] = {}
+        for row in rows:
+            keys = row.get("keys") or []
+            q = normalize_query(keys[0] if keys else "")
+            if not q:
+                continue
+            i = len(self.rows)
+            self.rows.append(row)
+            self.queries.append(q)
+            self._by_query.setdefault(q, i)
+            for tok in set(q.split(" ")):
+                self._postings.setdefault(tok, []).append(i)
+        self._vocab_hits: Dict[str, List[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def _candidates(self, fragment: str) -> List[int]:
+        hit = self._vocab_hits.get(fragment)
+        if hit is None:
+            ids: set = set()
+            for tok, posting in self._postings.items():
+                if fragment in tok:
+                    ids.update(posting)
+            hit = sorted(ids)
+            self._vocab_hits[fragment] = hit
+        return hit
+
+    def find(self, keyword: str, operator: str = "equals") -> Optional[Dict[str, Any]]:
+        kw = normalize_query(keyword)
+        if not kw:
+            return None
+        if operator == "equals":
+            i = self._by_query.get(kw)
+            return self.rows[i] if i is not None else None
+        longest = max(kw.split(" "), key=len)
+        for i in self._candidates(longest):
+            if kw in self.queries[i]:
+                return self.rows[i]
+        return None
+
+    def lookup(self, keyword: str, operator: str = "equals") -> Dict[str, Any]:
+        """Same shape as `query_keyword` for one keyword."""
+        return _metrics_row(keyword, self.find(keyword, operator))
+
+    def lookup_many(self, keywords: Iterable[str], operator: str = "equals") -> List[Dict[str, Any]]:
+        return [self.lookup(k, operator) for k in keywords]
+
+
+def bulk_keyword_metrics(
+    svc,
+    site_url: str,
+    start: str,
+    end: str,
+    keywords: List[str],
+    operator: str = "equals",
+    max_rows: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """Answer all keywords from one paginated pull of the site's query dimension."""
+    index = QueryIndex(fetch_query_rows(svc, site_url, start, end, ["query"], max_rows=max_rows))
+    return index.lookup_many(keywords, operator)
+
+
+# Search Analytics quotas: 1,200 queries/minute per site and per user.
+# QPS keeps bursts short so the short-term load quota isn't tripped.
+DEFAULT_QPS = 10.0
+DEFAULT_QPM = 1200
+
+
+def _http_status(exc: BaseException) -> Optional[int]:
+    try:
+        return int(getattr(getattr(exc, "resp", None), "status", None))
+    except Exception:
+        return None
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """429, 5xx, rate-limit 403s and transport timeouts are worth retrying."""
+    status = _http_status(exc)
+    if status is not None:
+        if status == 429 or status >= 500:
+            return True
+        return status == 403 and "ratelimitexceeded" in str(exc).lower()
+    return isinstance(exc, (TimeoutError, ConnectionError))
+
+
+def _retry_after(exc: BaseException) -> Optional[float]:
+    resp = getattr(exc, "resp", None)
+    try:
+        value = resp.get("retry-after") if resp is not None else None
+        return float(value) if value is not None else None
+    except Exception:
+        return None
+
+
+class GscScheduler:
+    """Runs GSC calls concurrently within a QPS and a sliding-window QPM budget.
+
+    Retryable failures back off exponentially with jitter (honouring
+    Retry-After); anything else fails that item immediately.
+    """
+
+    def __init__(
+        self,
+        qps: float = DEFAULT_QPS,
+        qpm: int = DEFAULT_QPM,
+        max_workers: int = 8,
+        max_retries: int = 5,
+        backoff: float = 1.0,
+        max_backoff: float = 32.0,
+    ):
+        self.qpm = max(1, int(qpm))
+        self.max_workers = max(1, int(max_workers))
+        self.max_retries = max(0, int(max_retries))
+        self.backoff = float(backoff)
+        self.max_backoff = float(max_backoff)
+        self._per_second = RateLimiter(qps, burst=max(1, int(qps)))
+        self._window: collections.deque = collections.deque()
+        self._window_lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until one more request fits both budgets."""
+        self._per_second.acquire()
+        while True:
+            with self._window_lock:
+                now = time.monotonic()
+                while self._window and now - self._window[0] >= 60.0:
+                    self._window.popleft()
+                if len(self._window) < self.qpm:
+                    self._window.append(now)
+                    return
+                wait = 60.0 - (now - self._window[0])
+            time.sleep(max(wait, 0.01))
+
+    def call(self, fn: Callable[[], Any]) -> Any:
+        attempt = 0
+        while True:
+            self.acquire()
+            try:
+                return fn()
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    raise
+                delay = _retry_after(e)
+                if delay is None:
+                    delay = random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+                time.sleep(delay)
+                attempt += 1
+
+    def map(self, fn: Callable[[Any], Any], items: List[Any]) -> Iterator[Tuple[int, Any, Optional[BaseException]]]:
+        """Yield (index, result, error) in completion order, in the caller's thread."""
+        if not items:
+            return
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(items))) as ex:
+            futures = {ex.submit(self.call, lambda it=it: fn(it)): i for i, it in enumerate(items)}
+            for fut in as_completed(futures):
+                i = futures[fut]
+                try:
+                    yield i, fut.result(), None
+                except Exception as e:
+                    yield i, None, e
+
+
+def iter_keyword_metrics(
+    lease: Callable[[], ContextManager[Any]],
+    site_url: str,
+    start: str,
+    end: str,
+    keywords: List[str],
+    operator: str = "equals",
+    scheduler: Optional[GscScheduler] = None,
+) -> Iterator[Tuple[int, Dict[str, Any], Optional[BaseException]]]:
+    """Concurrent `query_keyword` over keywords; yields (index, row, error) as results arrive.
+
+    Discovery clients aren't thread-safe, so each call borrows one via
+    `lease()` (e.g. ``lambda: google_clients.searchconsole(key_path)``).
+    Failed keywords yield an empty metrics row and the error.
+    """
+    scheduler = scheduler or GscScheduler()
+
+    def one(kw: str) -> Dict[str, Any]:
+        with lease() as svc:
+            return query_keyword(svc, site_url, start, end, kw, operator=operator)
+
+    for i, row, err in scheduler.map(one, list(keywords)):
+        yield i, (row if err is None else _metrics_row(keywords[i], None)), err
+
+
+# Ranking just off the top spots with real impressions: cheapest gains
+QUICK_WIN_POSITIONS = (4.0, 20.0)
+QUICK_WIN_MIN_IMPRESSIONS = 10
+
+
+class GscApiPlugin(PluginBase):
+    """GSC metrics per keyword for enrichment (`gsc_*` fields + `quick_win`).
+
+    Reads the local warehouse when it covers the window, otherwise one bulk
+    pull with the service account in ``context["gsc_key"]``. Context:
+    ``site`` (required), ``gsc_days`` (default 28), ``gsc_operator``,
+    ``gsc_store`` (warehouse path), ``gsc_key``.
+
+    The choice of source, and the bulk pull's `QueryIndex`, are made once per
+    run and kept in ``context["run_memo"]`` (set by the orchestrator), so
+    batches don't each re-download every query row.
+    """
+
+    name = "gsc_api"
+    outputs = ("gsc_impressions", "gsc_clicks", "gsc_ctr", "gsc_position", "quick_win")
+
+    def _window(self, ctx: Dict[str, Any]) -> Tuple[str, str]:
+        # Same window end as the overlay page and warehouse sync
+        return date_window(int(ctx.get("gsc_days") or 28))
+
+    def _normalize(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        pos = row.get("position")
+        impressions = int(row.get("impressions") or 0)
+        lo, hi = QUICK_WIN_POSITIONS
+        return {
+            "gsc_impressions": impressions,
+            "gsc_clicks": int(row.get("clicks") or 0),
+            "gsc_ctr": float(row.get("ctr") or 0.0),
+            "gsc_position": pos,
+            "quick_win": bool(pos is not None and lo <= pos <= hi and impressions >= QUICK_WIN_MIN_IMPRESSIONS),
+            "source": self.name,
+        }
+
+    def cache_context(self, context: Optional[Dict[str, Any]] = None) -> Any:
+        # Cached metrics are only valid for the window they were computed over
+        return self._window(context or {})
+
+    def _source(self, site: str, start: str, end: str, ctx: Dict[str, Any]) -> Any:
+        """"store", a `QueryIndex` from one bulk pull, or None when there is no data."""
+        from .gsc_store import DEFAULT_DB, GscWarehouse
+
+        store = GscWarehouse(ctx.get("gsc_store") or DEFAULT_DB)
+        try:
+            complete = not store.missing_days(site, start, end, settle_days=0)
+            if complete or not ctx.get("gsc_key"):
+                return "store" if store.coverage(site)["days"] else None
+        finally:
+            store.close()
+        from . import google_clients
+
+        try:
+            with google_clients.searchconsole(ctx["gsc_key"]) as svc:
+                return QueryIndex(fetch_query_rows(svc, site, start, end, ["query"]))
+        except Exception:
+            return None
+
+    def _rows(self, keywords: List[str], ctx: Dict[str, Any]) -> List[Dict[str, Any]]:
+        from .gsc_store import DEFAULT_DB, GscWarehouse
+
+        site = ctx["site"]
+        start, end = self._window(ctx)
+        operator = ctx.get("gsc_operator") or "equals"
+        memo = ctx.get("run_memo")
+        memo_key = (self.name, site, start, end, ctx.get("gsc_store"))
+        if memo is not None and memo_key in memo:
+            source = memo[memo_key]
+        else:
+            source = self._source(site, start, end, ctx)
+            if memo is not None:
+                memo[memo_key] = source
+        if source is None:
+            return []
+        if isinstance(source, QueryIndex):
+            return source.lookup_many(keywords, operator)
+        store = GscWarehouse(ctx.get("gsc_store") or DEFAULT_DB)
+        try:
+            return store.keyword_metrics(site, start, end, keywords, operator=operator)
+        finally:
+            store.close()
+
+    def enrich_many(self, keywords: list[str], context: Optional[Dict[str, Any]] = None) -> dict[str, dict]:
+        unique = list(dict.fromkeys(k for k in keywords if isinstance(k, str)))
+        out: dict[str, dict] = {k: {} for k in unique}
+        ctx = context or {}
+        if not ctx.get("site") or not unique:
+            return out
+        try:
+            for row in self._rows(unique, ctx):
+                out[row["keyword"]] = self._normalize(row)
+        except Exception:
+            pass
+        return out
+
+    def enrich_keyword(self, keyword: str, context: Optional[Dict[str, Any]] = None) -> EnrichmentResult:
+        return EnrichmentResult(keyword, self.enrich_many([keyword], context).get(keyword, {}))
@@ -0,0 +1,261 @@
+"""Local Search Console warehouse: daily rows in SQLite with incremental sync.
+
+Each synced day is stored twice:
+- per (site, date, query, page, country, device) in `rows`, for `page_rows`;
+- as GSC's own query-only aggregate in `query_days`.
+GSC counts impressions per page when the page dimension is requested, so
+summing `rows` across pages would overcount any query where several site
+URLs showed. `query_rows`, `top_queries` and `keyword_metrics` therefore read
+`query_days`, and match the live query-dimension pull.
+
+`sync` only fetches days that are missing, or that were synced before GSC
+data settled, so pulling 16 months once and then topping up daily is cheap.
+Days synced before `query_days` existed count as missing until re-synced.
+The query helpers return the same row shapes as the live API helpers in
+`gsc_api`.
+"""
+from __future__ import annotations
+import datetime as dt
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from .gsc_api import QueryIndex, fetch_query_rows, last_day
+
+DIMENSIONS = ["query", "page", "country", "device"]
+QUERY_DIMENSIONS = ["query"]
+# GSC keeps ~16 months of data; fresh days keep changing for ~3 days
+HISTORY_DAYS = 486
+SETTLE_DAYS = 3
+
+DEFAULT_DB = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", ".cache", "gsc", "warehouse.sqlite3")
+)
+
+
+def _days(start: str, end: str) -> List[str]:
+    d0, d1 = dt.date.fromisoformat(start), dt.date.fromisoformat(end)
+    return [(d0 + dt.timedelta(days=i)).isoformat() for i in range((d1 - d0).days + 1)]
+
+
+class GscWarehouse:
+    """SQLite store of daily GSC rows. Safe to share across threads."""
+
+    def __init__(self, path: str = DEFAULT_DB):
+        self.path = os.path.abspath(path)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS rows (
+                site TEXT NOT NULL,
+                date TEXT NOT NULL,
+                query TEXT NOT NULL,
+                page TEXT NOT NULL,
+                country TEXT NOT NULL,
+                device TEXT NOT NULL,
+                clicks INTEGER NOT NULL,
+                impressions INTEGER NOT NULL,
+                position REAL NOT NULL,
+                PRIMARY KEY (site, date, query, page, country, device)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_rows_query ON rows(site, query, date);
+            CREATE INDEX IF NOT EXISTS idx_rows_page ON rows(site, page, date);
+            CREATE TABLE IF NOT EXISTS query_days (
+                site TEXT NOT NULL,
+                date TEXT NOT NULL,
+                query TEXT NOT NULL,
+                clicks INTEGER NOT NULL,
+                impressions INTEGER NOT NULL,
+                position REAL NOT NULL,
+                PRIMARY KEY (site, date, query)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS synced_days (
+                site TEXT NOT NULL,
+                date TEXT NOT NULL,
+                row_count INTEGER NOT NULL,
+                synced_at REAL NOT NULL,
+                query_count INTEGER,
+                PRIMARY KEY (site, date)
+            );
+            """
+        )
+        cols = {r[1] for r in self._conn.execute("PRAGMA table_info(synced_days)")}
+        if "query_count" not in cols:
+            # NULL marks days synced before the query-only aggregate was stored
+            self._conn.execute("ALTER TABLE synced_days ADD COLUMN query_count INTEGER")
+        self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # ---- sync ----
+    def missing_days(self, site: str, start: str, end: str, settle_days: int = SETTLE_DAYS) -> List[str]:
+        """Days in [start, end] never synced, synced before the day had settled, or lacking query totals."""
+        with self._lock:
+            done = dict(self._conn.execute(
+                "SELECT date, synced_at FROM synced_days WHERE site = ? AND date BETWEEN ? AND ? "
+                "AND query_count IS NOT NULL",
+                (site, start, end),
+            ).fetchall())
+        out: List[str] = []
+        for day in _days(start, end):
+            synced_at = done.get(day)
+            if synced_at is None:
+                out.append(day)
+                continue
+            settled = dt.datetime.combine(
+                dt.date.fromisoformat(day) + dt.timedelta(days=settle_days), dt.time()
+            ).timestamp()
+            if synced_at < settled:
+                out.append(day)
+        return out
+
+    def store_day(
+        self,
+        site: str,
+        day: str,
+        api_rows: Iterable[Dict[str, Any]],
+        query_api_rows: Iterable[Dict[str, Any]] = (),
+    ) -> int:
+        """Replace one day's rows with API rows keyed by DIMENSIONS plus the query-only rows."""
+        totals = []
+        for r in query_api_rows:
+            keys = list(r.get("keys") or [])
+            if len(keys) != len(QUERY_DIMENSIONS):
+                continue
+            totals.append((
+                site, day, keys[0],
+                int(r.get("clicks", 0)), int(r.get("impressions", 0)), float(r.get("position", 0.0)),
+            ))
+        batch = []
+        for r in api_rows:
+            keys = list(r.get("keys") or [])
+            if len(keys) != len(DIMENSIONS):
+                continue
+            batch.append((
+                site, day, *keys,
+                int(r.get("clicks", 0)), int(r.get("impressions", 0)), float(r.get("position", 0.0)),
+            ))
+        with self._lock:
+            self._conn.execute("DELETE FROM rows WHERE site = ? AND date = ?", (site, day))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO rows (site, date, query, page, country, device, clicks, impressions, position) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                batch,
+            )
+            self._conn.execute("DELETE FROM query_days WHERE site = ? AND date = ?", (site, day))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO query_days (site, date, query, clicks, impressions, position) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                totals,
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO synced_days (site, date, row_count, synced_at, query_count) VALUES (?, ?, ?, ?, ?)",
+                (site, day, len(batch), time.time(), len(totals)),
+            )
+            self._conn.commit()
+        return len(batch)
+
+    def sync(
+        self,
+        svc,
+        site: str,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        on_day: Optional[Callable[[str, int, int, int], None]] = None,
+    ) -> Dict[str, Any]:
+        """Fetch and store every missing day in [start, end] (default: full GSC history to yesterday).
+
+        `on_day(day, rows, done, total)` is called after each stored day.
+        """
+        end = end or last_day().isoformat()
+        start = start or (dt.date.today() - dt.timedelta(days=HISTORY_DAYS)).isoformat()
+        todo = self.missing_days(site, start, end)
+        total_rows = 0
+        for i, day in enumerate(todo, start=1):
+            api_rows = fetch_query_rows(svc, site, day, day, DIMENSIONS)
+            query_api_rows = fetch_query_rows(svc, site, day, day, QUERY_DIMENSIONS)
+            n = self.store_day(site, day, api_rows, query_api_rows)
+            total_rows += n
+            if on_day is not None:
+                on_day(day, n, i, len(todo))
+        return {"site": site, "start": start, "end": end, "days_synced": len(todo), "rows": total_rows}
+
+    # ---- queries ----
+    def coverage(self, site: str) -> Dict[str, Any]:
+        with self._lock:
+            first, last, days, rows = self._conn.execute(
+                "SELECT MIN(date), MAX(date), COUNT(*), COALESCE(SUM(row_count), 0) FROM synced_days "
+                "WHERE site = ? AND query_count IS NOT NULL",
+                (site,),
+            ).fetchone()
+        return {"site": site, "first_day": first, "last_day": last, "days": days, "rows": rows}
+
+    def query_rows(self, site: str, start: str, end: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Per-query totals for the window in API row shape, clicks descending.
+
+        Built from GSC's daily query-only aggregates, so impressions and CTR
+        match a query-dimension pull. Position is the impression-weighted mean
+        of the daily positions.
+        """
+        sql = (
+            "SELECT query, SUM(clicks) AS c, SUM(impressions) AS i, "
+            "SUM(position * impressions) * 1.0 / MAX(SUM(impressions), 1) AS p "
+            "FROM query_days WHERE site = ? AND date BETWEEN ? AND ? "
+            "GROUP BY query ORDER BY c DESC, i DESC"
+        )
+        params: List[Any] = [site, start, end]
+        if limit:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        with self._lock:
+            got = self._conn.execute(sql, params).fetchall()
+        return [
+            {"keys": [q], "clicks": c, "impressions": i, "ctr": (c / i) if i else 0.0, "position": p}
+            for q, c, i, p in got
+        ]
+
+    def top_queries(self, site: str, start: str, end: str, limit: int = 500) -> List[Dict[str, Any]]:
+        """Rows shaped like the overlay table: {keyword, impressions, clicks, ctr, position}."""
+        return [
+            {
+                "keyword": r["keys"][0],
+                "impressions": int(r["impressions"]),
+                "clicks": int(r["clicks"]),
+                "ctr": float(r["ctr"]),
+                "position": float(r["position"]),
+            }
+            for r in self.query_rows(site, start, end, limit=limit)
+        ]
+
+    def keyword_metrics(
+        self, site: str, start: str, end: str, keywords: List[str], operator: str = "equals"
+    ) -> List[Dict[str, Any]]:
+        """Same output as `gsc_api.bulk_keyword_metrics`, answered from stored days."""
+        return QueryIndex(self.query_rows(site, start, end)).lookup_many(keywords, operator)
+
+    def page_rows(self, site: str, start: str, end: str, query: str) -> List[Dict[str, Any]]:
+        """Per-page totals for one exact query (which URLs rank for it).
+
+        Impressions are counted per page, so they can add up to more than the
+        query's total in `query_rows`.
+        """
+        with self._lock:
+            got = self._conn.execute(
+                "SELECT page, SUM(clicks) AS c, SUM(impressions) AS i, "
+                "SUM(position * impressions) * 1.0 / MAX(SUM(impressions), 1) "
+                "FROM rows WHERE site = ? AND query = ? AND date BETWEEN ? AND ? "
+                "GROUP BY page ORDER BY c DESC, i DESC",
+                (site, query, start, end),
+            ).fetchall()
+        return [
+            {"page": pg, "clicks": c, "impressions": i, "ctr": (c / i) if i else 0.0, "position": p}
+            for pg, c, i, p in got
+        ]
@@ -0,0 +1,345 @@
+"""Enrichment orchestrator (docs/ORCHESTRATOR.md) as a small DAG runner.
+
+Each plugin is a stage. A stage depends on another when it lists one of that
+stage's `outputs` in its `inputs`; stages on the same level are independent
+and run concurrently for each keyword batch. Results are cached per
+(plugin, keyword, context, input values) in SQLite, and every stage
+checkpoints into `<run_dir>/enrichment/` so an interrupted or partial rerun
+only does the missing work. Empty or failed results are not checkpointed, so
+the next run retries them. Checkpointed entries also record the upstream
+values they were computed from; when those change (an upstream stage was
+forced or filled in), the entry counts as missing. Per-stage timings land in the run report.
+"""
+from __future__ import annotations
+import csv
+import glob
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .base import PluginBase
+from .cache import SqliteCache
+from .fusion import FusionWeights, score_rows
+
+DEFAULT_BATCH_SIZE = 100
+CACHE_TTL_DAYS = 14
+DEFAULT_CACHE_PATH = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", ".cache", "orchestrator", "cache.sqlite3")
+)
+# Context keys that never change results (credentials, runner knobs)
+_CONTEXT_IGNORE = {"no_cache", "max_concurrency", "serper_api_key", "gsc_key", "gsc_store", "run_memo"}
+
+
+@dataclass
+class Stage:
+    name: str
+    plugin: PluginBase
+    inputs: Tuple[str, ...]
+    outputs: Tuple[str, ...]
+    depends_on: List[str] = field(default_factory=list)
+    limit: Optional[int] = None  # only the first N keywords are sent (e.g. paid SERP calls)
+
+
+@dataclass
+class StageReport:
+    name: str
+    seconds: float = 0.0
+    keywords: int = 0
+    from_checkpoint: int = 0
+    cache_hits: int = 0
+    fetched: int = 0
+    empty: int = 0
+    failed: int = 0  # keywords in batches whose enrich_many raised
+    skipped: bool = False
+
+
+def build_stages(plugins: Sequence[PluginBase], limits: Optional[Dict[str, int]] = None) -> List[Stage]:
+    """Wrap plugins as stages and resolve dependencies from declared inputs/outputs."""
+    limits = limits or {}
+    stages = [
+        Stage(p.name, p, tuple(getattr(p, "inputs", ()) or ()), tuple(getattr(p, "outputs", ()) or ()), limit=limits.get(p.name))
+        for p in plugins
+    ]
+    producers: Dict[str, str] = {}
+    for s in stages:
+        for f in s.outputs:
+            producers.setdefault(f, s.name)
+    for s in stages:
+        s.depends_on = sorted({producers[f] for f in s.inputs if f in producers and producers[f] != s.name})
+    return stages
+
+
+def plan_levels(stages: Sequence[Stage]) -> List[List[Stage]]:
+    """Topological levels; stages within a level don't depend on each other."""
+    remaining = {s.name: s for s in stages}
+    done: set = set()
+    levels: List[List[Stage]] = []
+    while remaining:
+        ready = [s for s in remaining.values() if set(s.depends_on) <= done]
+        if not ready:
+            raise ValueError(f"Dependency cycle between stages: {sorted(remaining)}")
+        levels.append(ready)
+        for s in ready:
+            done.add(s.name)
+            del remaining[s.name]
+    return levels
+
+
+def _fingerprint(obj: Any) -> str:
+    return hashlib.sha1(json.dumps(obj, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def _input_fp(stage: Stage, row: Dict[str, Any]) -> Optional[str]:
+    """Fingerprint of the upstream fields a stage reads for one keyword (None without inputs)."""
+    if not stage.inputs:
+        return None
+    return _fingerprint([row.get(f) for f in stage.inputs])
+
+
+def _stage_context(context: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in context.items() if k not in _CONTEXT_IGNORE}
+
+
+class _Checkpoint:
+    """Per-stage results for one run folder, rewritten after each batch."""
+
+    def __init__(self, run_dir: Optional[str], stage: str, fingerprint: str, reset: bool = False):
+        self.path = os.path.join(run_dir, "enrichment", f"{stage}.json") if run_dir else None
+        self.fingerprint = fingerprint
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self.inputs: Dict[str, Optional[str]] = {}  # keyword -> `_input_fp` its result was computed from
+        if self.path and not reset and os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("fingerprint") == fingerprint:
+                    self.results = data.get("results") or {}
+                    self.inputs = data.get("inputs") or {}
+            except Exception:
+                self.results, self.inputs = {}, {}
+
+    def has(self, keyword: str, input_fp: Optional[str]) -> bool:
+        """A result exists and was computed from the same upstream values."""
+        return keyword in self.results and self.inputs.get(keyword) == input_fp
+
+    def set(self, keyword: str, data: Dict[str, Any], input_fp: Optional[str]) -> None:
+        self.results[keyword] = data
+        self.inputs[keyword] = input_fp
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"fingerprint": self.fingerprint, "results": self.results, "inputs": self.inputs}, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+
+def _run_stage_batch(
+    stage: Stage,
+    batch: List[str],
+    rows: Dict[str, Dict[str, Any]],
+    context: Dict[str, Any],
+    ctx_fp: str,
+    checkpoint: _Checkpoint,
+    cache: Optional[SqliteCache],
+    report: StageReport,
+) -> None:
+    t0 = time.perf_counter()
+    input_fps = {k: _input_fp(stage, rows[k]) for k in batch}
+    todo = [k for k in batch if not checkpoint.has(k, input_fps[k])]
+    for k in todo:
+        # computed from other upstream values (or never): not reusable
+        checkpoint.results.pop(k, None)
+    report.from_checkpoint += len(batch) - len(todo)
+    try:
+        stage_fp = _fingerprint([ctx_fp, stage.plugin.cache_context(context)])
+    except Exception:
+        stage_fp = ctx_fp
+    keys = {
+        k: f"{stage.name}:{_fingerprint([k, stage_fp, [rows[k].get(f) for f in stage.inputs]])}"
+        for k in todo
+    }
+    hits: Dict[str, Any] = {}
+    if cache is not None and todo and not context.get("no_cache"):
+        try:
+            hits = cache.get_many(list(keys.values()))
+        except Exception:
+            hits = {}
+    misses = [k for k in todo if keys[k] not in hits]
+    for k in todo:
+        if keys[k] in hits:
+            checkpoint.set(k, hits[keys[k]], input_fps[k])
+    report.cache_hits += len(todo) - len(misses)
+
+    if misses:
+        stage_ctx = dict(context)
+        if stage.inputs:
+            stage_ctx["rows"] = {k: {f: rows[k].get(f) for f in stage.inputs} for k in misses}
+        try:
+            got = stage.plugin.enrich_many(misses, context=stage_ctx) or {}
+        except Exception:
+            got = {}
+            report.failed += len(misses)
+        fresh: Dict[str, Any] = {}
+        for k in misses:
+            data = got.get(k) or {}
+            # Only real results are checkpointed; empty ones stay retryable
+            if data:
+                checkpoint.set(k, data, input_fps[k])
+                fresh[keys[k]] = data
+            else:
+                report.empty += 1
+        report.fetched += len(misses)
+        if cache is not None and fresh:
+            try:
+                cache.put_many(fresh)
+            except Exception:
+                pass
+    checkpoint.save()
+    report.seconds += time.perf_counter() - t0
+
+
+def run_enrichment(
+    rows: List[Dict[str, Any]],
+    plugins: Sequence[PluginBase],
+    context: Optional[Dict[str, Any]] = None,
+    run_dir: Optional[str] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    limits: Optional[Dict[str, int]] = None,
+    force: Iterable[str] = (),
+    cache_path: Optional[str] = DEFAULT_CACHE_PATH,
+    on_progress: Optional[Callable[[str, int, int], None]] = None,
+    weights: Optional[FusionWeights] = None,
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Run plugin stages over `rows` (each with a 'keyword') and fuse scores.
+
+    Returns (enriched_rows, report). `force` names stages whose checkpoints
+    are discarded. `on_progress(stage, done, total)` is called per batch.
+    `weights` tunes the fusion score (see `plugins.fusion.FusionWeights`).
+    """
+    context = dict(context or {})
+    # Shared by every batch of this run (plugins keep per-run lookups here)
+    context["run_memo"] = {}
+    stages = build_stages(plugins, limits)
+    levels = plan_levels(stages)
+    ctx_fp = _fingerprint(_stage_context(context))
+    force = set(force or ())
+
+    by_kw: Dict[str, Dict[str, Any]] = {}
+    for r in rows:
+        kw = str(r.get("keyword") or "").strip()
+        if kw and kw not in by_kw:
+            by_kw[kw] = dict(r)
+    keywords = list(by_kw)
+
+    cache: Optional[SqliteCache] = None
+    if cache_path:
+        try:
+            cache = SqliteCache(cache_path, default_ttl_days=CACHE_TTL_DAYS)
+        except Exception:
+            cache = None
+
+    reports: Dict[str, StageReport] = {}
+    t_start = time.perf_counter()
+    for level in levels:
+        checkpoints: Dict[str, _Checkpoint] = {}
+        allowed: Dict[str, set] = {}
+        for s in level:
+            fp = _fingerprint([ctx_fp, s.inputs, s.limit])
+            checkpoints[s.name] = _Checkpoint(run_dir, s.name, fp, reset=s.name in force)
+            allowed[s.name] = set(keywords[: s.limit] if s.limit is not None else keywords)
+            reports[s.name] = StageReport(s.name, keywords=len(allowed[s.name]))
+            if all(checkpoints[s.name].has(k, _input_fp(s, by_kw[k])) for k in allowed[s.name]):
+                reports[s.name].skipped = True
+                reports[s.name].from_checkpoint = len(allowed[s.name])
+        active = [s for s in level if not reports[s.name].skipped]
+
+        step = max(1, int(batch_size))
+        with ThreadPoolExecutor(max_workers=max(1, len(active))) as ex:
+            for b in range(0, len(keywords), step):
+                batch = keywords[b:b + step]
+                futures = []
+                for s in active:
+                    sub = [k for k in batch if k in allowed[s.name]]
+                    if sub:
+                        futures.append((s, ex.submit(
+                            _run_stage_batch, s, sub, by_kw, context, ctx_fp,
+                            checkpoints[s.name], cache, reports[s.name],
+                        )))
+                for s, fut in futures:
+                    fut.result()
+                    if on_progress is not None:
+                        on_progress(s.name, min(b + len(batch), len(keywords)), len(keywords))
+
+        # Merge this level's outputs so downstream stages can read them
+        for s in level:
+            results = checkpoints[s.name].results
+            for k in keywords:
+                data = results.get(k) or {}
+                for f, v in data.items():
+                    if f == "source":
+                        continue
+                    by_kw[k][f] = v
+
+    enriched = [by_kw[k] for k in keywords]
+    score_rows(enriched, weights)
+
+    report = {
+        "keywords": len(keywords),
+        "levels": [[s.name for s in level] for level in levels],
+        "stages": {name: vars(r) for name, r in reports.items()},
+        "total_seconds": round(time.perf_counter() - t_start, 3),
+        "weights": (weights or FusionWeights()).to_dict(),
+    }
+    for r in report["stages"].values():
+        r["seconds"] = round(r["seconds"], 3)
+    return enriched, report
+
+
+# ---- run folder I/O ----
+def latest_run_dir(base_dir: str) -> Optional[str]:
+    runs = sorted(glob.glob(os.path.join(base_dir, "reports", "keyword_runs", "*", "keywords_scored.csv")))
+    return os.path.dirname(runs[-1]) if runs else None
+
+
+def read_scored(run_dir: str) -> List[Dict[str, Any]]:
+    with open(os.path.join(run_dir, "keywords_scored.csv"), "r", encoding="utf-8", newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def _write_rows(path: str, rows: List[Dict[str, Any]], base_fields: List[str]) -> None:
+    fields = list(base_fields)
+    for r in rows:
+        for k in r:
+            if k not in fields:
+                fields.append(k)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=fields)
+        w.writeheader()
+        for r in rows:
+            w.writerow({k: (json.dumps(v) if isinstance(v, (list, dict)) else v) for k, v in r.items()})
+
+
+def write_outputs(run_dir: str, rows: List[Dict[str, Any]], report: Dict[str, Any]) -> Dict[str, str]:
+    """keyword_enriched.csv, area_service_opportunities.csv and enrichment_report.json (timings)."""
+    base = ["keyword"]
+    paths = {
+        "enriched": os.path.join(run_dir, "keyword_enriched.csv"),
+        "area_service": os.path.join(run_dir, "area_service_opportunities.csv"),
+        "report": os.path.join(run_dir, "enrichment_report.json"),
+    }
+    _write_rows(paths["enriched"], rows, base + ["opportunity_score", "recommendation"])
+    _write_rows(
+        paths["area_service"],
+        [r for r in rows if r.get("recommendation") == "area_service_page"],
+        base + ["opportunity_score", "recommendation"],
+    )
+    with open(paths["report"], "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    return paths
@@ -0,0 +1,104 @@
+from __future__ import annotations
+import os
+import sys
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+from .base import PluginBase, EnrichmentResult
+
+# Listing/review sites: a SERP full of these favours citations over pages
+_DIRECTORY_HOSTS = (
+    "yell.com", "trustpilot.com", "clutch.co", "bark.com", "checkatrade.com", "yelp.", "thomsonlocal.com",
+    "freeindex.co.uk", "cylex", "hotfrog.", "scoot.co.uk", "upwork.com", "fiverr.com", "facebook.com",
+    "linkedin.com", "maps.google.", "business.site",
+)
+_BLOG_MARKERS = ("/blog", "/news", "/guide", "/article", "/insights", "/resources", "/learn", "/what-is", "/how-to")
+_SERVICE_MARKERS = ("/services", "/service", "/contact", "/pricing", "/hire", "/agency", "/consult")
+
+
+def _serp_module():
+    """streamlit_app/serp.py (score_serp, fetch_serper_json); imported lazily."""
+    app_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, "streamlit_app"))
+    if app_dir not in sys.path:
+        sys.path.append(app_dir)
+    import serp  # type: ignore
+    return serp
+
+
+def _classify(link: str) -> str:
+    try:
+        u = urlparse(link)
+    except Exception:
+        return "other"
+    host, path = u.netloc.lower(), (u.path or "/").lower()
+    if any(h in host for h in _DIRECTORY_HOSTS):
+        return "directory"
+    if any(m in path for m in _BLOG_MARKERS):
+        return "blog"
+    segments = [s for s in path.split("/") if s]
+    if any(m in path for m in _SERVICE_MARKERS) or len(segments) <= 1:
+        return "service"
+    return "other"
+
+
+def serp_features(data: Dict[str, Any], keyword: str, score_serp=None, result_cls=None) -> Dict[str, Any]:
+    """Derive local_pack, page-type ratios and difficulty from raw Serper JSON."""
+    organic: List[Dict[str, Any]] = [o for o in (data.get("organic") or []) if o.get("link")]
+    n = max(1, len(organic))
+    kinds = [_classify(o["link"]) for o in organic]
+    out: Dict[str, Any] = {
+        "local_pack": bool(data.get("places") or data.get("localResults")),
+        "service_ratio": round(kinds.count("service") / n, 3),
+        "blog_ratio": round(kinds.count("blog") / n, 3),
+        "directories_ratio": round(kinds.count("directory") / n, 3),
+    }
+    if score_serp is not None and result_cls is not None and organic:
+        results = [result_cls(o.get("title") or "", o["link"], o.get("snippet") or "") for o in organic]
+        out["difficulty"] = score_serp(results, keyword).get("difficulty")
+    return out
+
+
+class SerpFeaturesPlugin(PluginBase):
+    """SERP-derived fields from serper.dev (optional; needs ``serper_api_key``).
+
+    Only the first ``context["serp_cap"]`` keywords (default 100) are fetched.
+    """
+
+    name = "serp_features"
+    max_concurrency = 4
+    rate_per_sec = 2.0
+    rate_burst = 4
+    outputs = ("local_pack", "service_ratio", "blog_ratio", "directories_ratio", "difficulty")
+
+    def _api_key(self, context: Optional[Dict[str, Any]]) -> Optional[str]:
+        return (context or {}).get("serper_api_key") or os.environ.get("SERPER_API_KEY")
+
+    def enrich_keyword(self, keyword: str, context: Optional[Dict[str, Any]] = None) -> EnrichmentResult:
+        api_key = self._api_key(context)
+        if not api_key:
+            return EnrichmentResult(keyword, {})
+        ctx = context or {}
+        try:
+            serp = _serp_module()
+            self.throttle()
+            data = serp.fetch_serper_json(
+                keyword,
+                api_key=api_key,
+                locale=ctx.get("locale") or "gb-en",
+                location=ctx.get("location"),
+                no_cache=bool(ctx.get("no_cache")),
+            )
+            feats = serp_features(data, keyword, serp.score_serp, serp.SerpResult)
+            return EnrichmentResult(keyword, {**feats, "source": self.name})
+        except Exception:
+            return EnrichmentResult(keyword, {})
+
+    def enrich_many(self, keywords: list[str], context: Optional[Dict[str, Any]] = None) -> dict[str, dict]:
+        unique = list(dict.fromkeys(keywords))
+        if not self._api_key(context):
+            return {k: {} for k in unique}
+        cap = int((context or {}).get("serp_cap") or 100)
+        out = super().enrich_many(unique[:cap], context)
+        for k in unique[cap:]:
+            out[k] = {}
+        return out
@@ -0,0 +1,184 @@
+"""Vectorised analytics over cached Google Trends series.
+
+Series are persisted by `GoogleTrendsPlugin` in compact form; this module
+decodes many of them into one keyword × date matrix and derives metrics for
+all keywords at once, without touching Google.
+"""
+from __future__ import annotations
+import base64
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+@dataclass
+class SeriesMatrix:
+    keywords: List[str]
+    dates: np.ndarray   # datetime64[D], shape (T,)
+    values: np.ndarray  # float32, shape (K, T); NaN where a keyword has no point
+
+    def index_of(self, keyword: str) -> int:
+        return self.keywords.index(keyword)
+
+
+def decode_record(record: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray]:
+    """Return (dates datetime64[D], values float32) for one stored series."""
+    values = np.frombuffer(base64.b64decode(record["values"]), dtype=np.uint8).astype(np.float32)
+    offsets = np.frombuffer(base64.b64decode(record["offsets"]), dtype="<u2").astype(np.int64)
+    dates = np.datetime64(record["start"], "D") + offsets.astype("timedelta64[D]")
+    return dates, values
+
+
+def load_series(records: Dict[str, Dict[str, Any]]) -> SeriesMatrix:
+    """Decode {keyword: record} (from `GoogleTrendsPlugin.series_records`) into a matrix."""
+    keywords: List[str] = []
+    decoded: List[Tuple[np.ndarray, np.ndarray]] = []
+    for k, rec in records.items():
+        try:
+            decoded.append(decode_record(rec))
+            keywords.append(k)
+        except Exception:
+            continue
+    if not decoded:
+        return SeriesMatrix([], np.array([], dtype="datetime64[D]"), np.zeros((0, 0), dtype=np.float32))
+
+    first = decoded[0][0]
+    if all(d.shape == first.shape and np.array_equal(d, first) for d, _ in decoded):
+        # Common case: same timeframe fetched together shares one date grid
+        return SeriesMatrix(keywords, first, np.vstack([v for _, v in decoded]))
+
+    axis = np.unique(np.concatenate([d for d, _ in decoded]))
+    values = np.full((len(decoded), axis.size), np.nan, dtype=np.float32)
+    for i, (d, v) in enumerate(decoded):
+        values[i, np.searchsorted(axis, d)] = v
+    return SeriesMatrix(keywords, axis, values)
+
+
+def _step_days(m: SeriesMatrix) -> float:
+    if m.dates.size < 2:
+        return 7.0
+    return float(np.median(np.diff(m.dates).astype(np.int64)))
+
+
+def moving_average(m: SeriesMatrix, window: int) -> np.ndarray:
+    """Trailing NaN-aware mean over `window` points; shape (K, T)."""
+    window = max(1, int(window))
+    v = m.values
+    filled = np.nan_to_num(v, nan=0.0).astype(np.float64)
+    present = (~np.isnan(v)).astype(np.float64)
+    csum = np.cumsum(filled, axis=1)
+    ccnt = np.cumsum(present, axis=1)
+    csum[:, window:] = csum[:, window:] - csum[:, :-window]
+    ccnt[:, window:] = ccnt[:, window:] - ccnt[:, :-window]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        out = csum / ccnt
+    out[ccnt == 0] = np.nan
+    return out.astype(np.float32)
+
+
+def trend_labels(m: SeriesMatrix, recent_points: int = 5) -> Tuple[np.ndarray, np.ndarray]:
+    """Vectorised `_label_and_factor`: recent mean vs overall mean per keyword.
+
+    Returns (labels, factors) arrays of shape (K,).
+    """
+    k = len(m.keywords)
+    labels = np.full(k, "stable", dtype=object)
+    factors = np.ones(k, dtype=np.float32)
+    if k == 0 or m.values.shape[1] == 0:
+        return labels, factors
+    with np.errstate(invalid="ignore", divide="ignore"):
+        overall = np.nanmean(m.values, axis=1)
+        recent = np.nanmean(m.values[:, -int(recent_points):], axis=1)
+        delta = (recent - overall) / overall
+    valid = np.isfinite(delta) & (overall > 0)
+    for label, factor, mask in (
+        ("declining", 0.9, valid & (delta <= -0.15)),
+        ("rising", 1.15, valid & (delta >= 0.1)),
+        ("surging", 1.25, valid & (delta >= 0.5)),
+    ):
+        labels[mask] = label
+        factors[mask] = factor
+    return labels, factors
+
+
+def yoy_delta(m: SeriesMatrix, window_days: int = 28) -> np.ndarray:
+    """Relative change of the last `window_days` vs the same window a year earlier.
+
+    NaN where the series doesn't reach back a year (e.g. 'today 12-m' data).
+    """
+    k = len(m.keywords)
+    if k == 0 or m.dates.size == 0:
+        return np.full(k, np.nan, dtype=np.float32)
+    end = m.dates[-1]
+    win = np.timedelta64(int(window_days), "D")
+    year = np.timedelta64(365, "D")
+    recent_cols = m.dates > end - win
+    prior_cols = (m.dates > end - year - win) & (m.dates <= end - year)
+    if not prior_cols.any():
+        return np.full(k, np.nan, dtype=np.float32)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        recent = np.nanmean(m.values[:, recent_cols], axis=1)
+        prior = np.nanmean(m.values[:, prior_cols], axis=1)
+        out = (recent - prior) / prior
+    out[~np.isfinite(out)] = np.nan
+    return out.astype(np.float32)
+
+
+def seasonal_profile(m: SeriesMatrix) -> np.ndarray:
+    """Month-of-year seasonal index per keyword, shape (K, 12).
+
+    Each point is divided by a trailing one-year moving average (the trend),
+    then ratios are averaged by calendar month. 1.0 = average month; NaN where
+    a month has no data.
+    """
+    k = len(m.keywords)
+    out = np.full((k, 12), np.nan, dtype=np.float32)
+    if k == 0 or m.dates.size == 0:
+        return out
+    per_year = max(1, int(round(365.0 / max(1.0, _step_days(m)))))
+    trend = moving_average(m, min(per_year, m.dates.size))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ratio = m.values / trend
+    ratio[~np.isfinite(ratio)] = np.nan
+    months = (m.dates.astype("datetime64[M]").astype(np.int64) % 12)
+    for mo in range(12):
+        cols = months == mo
+        if cols.any():
+            with np.errstate(invalid="ignore"):
+                out[:, mo] = np.nanmean(ratio[:, cols], axis=1)
+    # Normalise so each keyword's observed months average to 1.0
+    with np.errstate(invalid="ignore", divide="ignore"):
+        out = out / np.nanmean(out, axis=1, keepdims=True)
+    return out
+
+
+def peak_months(m: SeriesMatrix, profile: Optional[np.ndarray] = None) -> np.ndarray:
+    """1-based calendar month with the highest seasonal index (0 when unknown)."""
+    profile = seasonal_profile(m) if profile is None else profile
+    out = np.zeros(profile.shape[0], dtype=np.int8)
+    has = ~np.all(np.isnan(profile), axis=1)
+    if has.any():
+        out[has] = np.nanargmax(profile[has], axis=1) + 1
+    return out
+
+
+def metrics_table(m: SeriesMatrix, ma_window: int = 4) -> List[Dict[str, Any]]:
+    """One row per keyword with the derived metrics, ready for a DataFrame/CSV."""
+    labels, factors = trend_labels(m)
+    yoy = yoy_delta(m)
+    profile = seasonal_profile(m)
+    peaks = peak_months(m, profile)
+    ma = moving_average(m, ma_window)
+    last_ma = ma[:, -1] if ma.shape[1] else np.full(len(m.keywords), np.nan, dtype=np.float32)
+    rows: List[Dict[str, Any]] = []
+    for i, kw in enumerate(m.keywords):
+        rows.append({
+            "keyword": kw,
+            "trend_label": labels[i],
+            "trend_factor": round(float(factors[i]), 2),
+            "yoy_delta": None if np.isnan(yoy[i]) else round(float(yoy[i]), 3),
+            "peak_month": int(peaks[i]) or None,
+            "moving_avg": None if np.isnan(last_ma[i]) else round(float(last_ma[i]), 1),
+        })
+    return rows
@@ -9,8 +9,16 @@ import streamlit as st
 # Must be the first Streamlit command in this script
 st.set_page_config(page_title="Seed → Select → SERP", page_icon="🧩", layout="wide", initial_sidebar_state="collapsed")
 
+import profiler
+import data_layer
+profiler.start_run("app")
+data_layer.start_run()
+
 from keyword_pipeline import expand_seeds, normalize_and_dedupe
-from serp import fetch_serp, fetch_page_headings, score_serp, fetch_paa_questions, fetch_related_searches, fetch_serper_json
+import frontmatter_io
+import report_store
+import serp_jobs
+from page_search import domain_matches, get_page_search
 from components import (
     render_page_selector,
     ensure_modifier_session_defaults as ensure_modifier_session_defaults,
@@ -22,6 +30,7 @@ def log_action(action_type, details):
     """Log all user actions with timestamps"""
     timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
     print(f"🔴 [{timestamp}] {action_type}: {details}")
+    profiler.event(action_type, details)
 
 def add_js_logging():
     """Add JavaScript console logging for all interactions"""
@@ -80,10 +89,61 @@ add_js_logging()
 st.title("Seed → Select → SERP 🧩")
 st.caption("Generate variants from seeds, curate the exact queries, and run SERP competitor analysis — all on one page, no sidebar.")
 
+@st.fragment(run_every=1.0)
+def _live_search_poll(url_path: str):
+    if get_page_search().peek(url_path)["refreshing"]:
+        st.caption("⏳ Searching in the background...")
+    else:
+        st.rerun()
+
+
+def _render_live_search(state: dict, url_path: str):
+    if state["status"] == "error":
+        st.error(f"Search failed: {state['error']}")
+        return
+    if state["fetched_at"]:
+        age = int((time.time() - state["fetched_at"]) // 60)
+        note = " (refreshing...)" if state["refreshing"] else (" — older than the cache TTL, use Refresh" if state["stale"] else "")
+        st.caption(f"Results from {age} min ago{note}")
+    page_results = state["results"]
+    # Filter to show results from the domain
+    matches = domain_matches(page_results, "ellieedwardsmarketing.com", url_path)
+    if matches["domain"]:
+        # Find the specific page we're looking for
+        exact_matches = matches["exact"]
+        if exact_matches:
+            st.success(f"✅ Found this page in search results:")
+            for i, res in enumerate(exact_matches):
+                st.markdown(f"**#{i + 1}** [{res.title}]({res.link})")
+                if res.snippet:
+                    st.caption(res.snippet[:200] + "..." if len(res.snippet) > 200 else res.snippet)
+        else:
+            st.warning(f"⚠️ This specific page ({url_path}) not found in top results")
+
+        # Show other pages from the domain
+        other_pages = matches["other"]
+        if other_pages:
+            st.markdown(f"**Other pages from domain ({len(other_pages)} found):**")
+            for i, res in enumerate(other_pages[:5]):  # Show top 5 to avoid clutter
+                st.markdown(f"**#{i + 1}** [{res.title}]({res.link})")
+                if res.snippet:
+                    st.caption(res.snippet[:150] + "..." if len(res.snippet) > 150 else res.snippet)
+            if len(other_pages) > 5:
+                st.caption(f"... and {len(other_pages) - 5} more pages")
+    else:
+        st.error("❌ No pages found from ellieedwardsmarketing.com")
+        # Show what was found instead
+        if page_results:
+            st.caption("Found these other results:")
+            for i, res in enumerate(page_results[:3]):
+                st.markdown(f"**#{i + 1}** [{res.title}]({res.link})")
+
+
 # Direct path to TinaCMS site
 ellie_root = r"C:\Users\rhode\source\repos\EllieEdwardsMarketingLeadgenSite"
 
 # Reusable Page selector
+profiler.mark("page_load")
 selected_page, page_data = render_page_selector(ellie_root)
 
 # Initialize modifier options in session before widgets
@@ -136,16 +196,15 @@ if selected_page and selected_page in page_data:
     st.info(f"Selected: **{selected_page}** → {full_url}")
     
     # Only load keywords if this is a NEW page selection (not a re-run)
+    profiler.mark("keyword_load")
     if (st.session_state["last_loaded_page"] != selected_page and 
         not st.session_state["seeds_manually_modified"]):
         
         try:
-            import frontmatter
-            with open(page_info["file_path"], 'r', encoding='utf-8') as f:
-                post = frontmatter.load(f)
-                
-            existing_keywords = post.metadata.get("keywords", [])
-            seo_section = post.metadata.get("seo", {})
+            page_meta = data_layer.page_metadata(page_info["file_path"])
+
+            existing_keywords = page_meta.get("keywords", [])
+            seo_section = page_meta.get("seo", {})
             seo_keywords = seo_section.get("keywords", [])
             winning_keywords = seo_section.get("winningKeywords", [])
             
@@ -173,54 +232,29 @@ if selected_page and selected_page in page_data:
     elif st.session_state["seeds_manually_modified"]:
         st.caption("💡 Seeds have been manually modified. Select a different page to auto-load new keywords.")
     
-    # Auto-search for this page's URL
+    # Auto-search for this page's URL (page_search.py runs it in the background and caches
+    # it per url_path, so reruns for the same page never wait on the network)
+    profiler.mark("live_page_search")
     with st.expander("🔍 Live page search results", expanded=True):
         # Create search query: domain + path (no https)
         search_query = f"ellieedwardsmarketing.com{page_info['url_path']}"
         st.write(f"Searching for: **{search_query}**")
-        
-        try:
-            # Search for the specific page
-            page_results = fetch_serp(search_query, provider="duckduckgo", num=10, locale="gb-en")
-            
-            # Filter to show results from the domain
-            domain_pages = [res for res in page_results if "ellieedwardsmarketing.com" in res.link.lower()]
-            
-            if domain_pages:
-                # Find the specific page we're looking for
-                exact_matches = [res for res in domain_pages if page_info['url_path'] in res.link or (page_info['url_path'] == "/" and (res.link.endswith("ellieedwardsmarketing.com") or res.link.endswith("ellieedwardsmarketing.com/")))]
-                
-                if exact_matches:
-                    st.success(f"✅ Found this page in search results:")
-                    for i, res in enumerate(exact_matches):
-                        st.markdown(f"**#{i + 1}** [{res.title}]({res.link})")
-                        if res.snippet:
-                            st.caption(res.snippet[:200] + "..." if len(res.snippet) > 200 else res.snippet)
-                else:
-                    st.warning(f"⚠️ This specific page ({page_info['url_path']}) not found in top results")
-                
-                # Show other pages from the domain
-                other_pages = [res for res in domain_pages if res not in exact_matches]
-                if other_pages:
-                    st.markdown(f"**Other pages from domain ({len(other_pages)} found):**")
-                    for i, res in enumerate(other_pages[:5]):  # Show top 5 to avoid clutter
-                        st.markdown(f"**#{i + 1}** [{res.title}]({res.link})")
-                        if res.snippet:
-                            st.caption(res.snippet[:150] + "..." if len(res.snippet) > 150 else res.snippet)
-                    if len(other_pages) > 5:
-                        st.caption(f"... and {len(other_pages) - 5} more pages")
-            else:
-                st.error("❌ No pages found from ellieedwardsmarketing.com")
-                # Show what was found instead
-                if page_results:
-                    st.caption("Found these other results:")
-                    for i, res in enumerate(page_results[:3]):
-                        st.markdown(f"**#{i + 1}** [{res.title}]({res.link})")
-                
-        except Exception as e:
-            st.error(f"Search failed: {e}")
+        page_search = get_page_search()
+        refresh_search = st.button("🔄 Refresh search", key="live_search_refresh")
+        if refresh_search or st.session_state.get("live_search_page") != page_info["url_path"]:
+            st.session_state["live_search_page"] = page_info["url_path"]
+            live_search = page_search.request(page_info["url_path"], search_query, force=refresh_search)
+        else:
+            live_search = page_search.peek(page_info["url_path"])
+            if live_search["status"] == "missing":
+                live_search = page_search.request(page_info["url_path"], search_query)
+        if live_search["status"] != "pending":
+            _render_live_search(live_search, page_info["url_path"])
+        if live_search["refreshing"]:
+            _live_search_poll(page_info["url_path"])
 
 st.markdown("---")
+profiler.mark("seeds_and_variants")
 
 
 def _split_lines(s: str) -> list[str]:
@@ -384,6 +418,15 @@ if selected_page:
 
 run_btn = st.button("Run SERP Analysis", type="primary", disabled=not bool(selected), key="run_analysis")
 
+# Analyses run as background jobs (serp_jobs.py): the run is queued and polled, so a
+# browser refresh or widget change no longer aborts it. The job id is kept in the URL.
+profiler.mark("serp_analysis")
+job_queue = serp_jobs.get_queue()
+if "serp_job_id" not in st.session_state:
+    st.session_state["serp_job_id"] = st.query_params.get("serp_job")
+    st.session_state["serp_job_loaded"] = None
+    st.session_state["serp_job_partial"] = False
+
 # Log run button click
 if run_btn:
     log_action("RUN_ANALYSIS_CLICKED", f"Starting analysis with {len(selected)} keywords, Provider: {provider}, Save: {save_analysis}")
@@ -395,151 +438,107 @@ if run_btn:
     
     log_action("ANALYSIS_CONFIG", f"Provider: {use_provider}, Keywords: {len(rows)}, Results per query: {results_per_query}")
 
-    analysis_rows: list[dict] = []
-    paa_by_keyword: dict[str, list[str]] = {}
-    paa_source_by_keyword: dict[str, str] = {}
-    related_by_keyword: dict[str, list[str]] = {}
-    related_source_by_keyword: dict[str, str] = {}
-    with st.status("Running SERP…", expanded=True) as status:
-        raw_serper_by_keyword: dict[str, dict] = {}
-        organic_results_by_keyword: dict[str, list[dict]] = {}
-        for q in rows:
-            st.write(f"Query: {q}")
-            try:
-                # Fetch serper raw JSON if needed (and provider is serper)
-                raw_serper = None
-                if use_provider == "serper" and (show_paa or show_related or show_raw_serper):
-                    try:
-                        raw_serper = fetch_serper_json(
-                            q,
-                            api_key=serper_key.strip(),
-                            num=int(results_per_query),
-                            locale="gb-en",
-                            location=(serper_location.strip() or None),
-                            no_cache=bool(serper_no_cache),
-                        )
-                    except Exception as e:
-                        st.caption(f"Raw Serper fetch failed for '{q}': {e}")
-
-                # Build results either from raw_serper or using fetch_serp (which also supports fallback)
-                if raw_serper is not None:
-                    # Map organic to SerpResult shape
-                    organic = raw_serper.get("organic") or []
-                    results = []
-                    for item in organic[: int(results_per_query)]:
-                        results.append(type("SR", (), {
-                            "title": item.get("title") or "",
-                            "link": item.get("link") or "",
-                            "snippet": item.get("snippet") or "",
-                            "__dict__": {
-                                "title": item.get("title") or "",
-                                "link": item.get("link") or "",
-                                "snippet": item.get("snippet") or "",
-                            }
-                        }))
-                else:
-                    results = fetch_serp(q, provider=use_provider, api_key=serper_key.strip() or None, num=int(results_per_query), locale="gb-en")
-                metrics = score_serp(results, seed=q)
-                st.json({
-                    "difficulty": metrics["difficulty"],
-                    "exact_in_title": metrics["exact_in_title"],
-                    "unique_domains": metrics["unique_domains"],
-                    "gov_edu": metrics["gov_edu"],
-                    "aggregators": metrics["aggregators"],
-                })
-                page_outlines = []
-                if fetch_pages:
-                    for res in results[: min(5, len(results))]:
-                        page_outlines.append(fetch_page_headings(res.link))
-                # Fetch PAA
-                paa_list: list[str] = []
-                paa_source: str = "none"
-                if show_paa:
-                    try:
-                        paa_list, paa_source = fetch_paa_questions(
-                            q,
-                            provider=use_provider,
-                            api_key=serper_key.strip() or None,
-                            results=results,
-                            outlines=page_outlines,
-                            raw=raw_serper,
-                            require_google_only=require_google_paa,
-                        )
-                    except Exception as e:
-                        st.caption(f"PAA fetch failed for '{q}': {e}")
-                        paa_list = []
-                        paa_source = "error"
-                # Build structured results with explicit rank
-                structured_results = [
-                    {
-                        "rank": i + 1,
-                        "title": res.title,
-                        "link": res.link,
-                        "snippet": res.snippet,
-                    }
-                    for i, res in enumerate(results)
-                ]
-                # Stash for saving later
-                organic_results_by_keyword[q] = structured_results
-
-                row = {
-                    "keyword": q,
-                    "difficulty": metrics.get("difficulty"),
-                    "exact_in_title": metrics.get("exact_in_title"),
-                    "unique_domains": metrics.get("unique_domains"),
-                    "gov_edu": metrics.get("gov_edu"),
-                    "aggregators": metrics.get("aggregators"),
-                    # Include explicit rank on each result for clearer display in Tina
-                    "results": structured_results,
-                    "outlines": page_outlines,
-                    "paa": paa_list,
-                }
-                # Fetch Related Searches (after row built so headings are available)
-                if show_related:
-                    try:
-                        related_list, related_src = fetch_related_searches(
-                            q,
-                            provider=use_provider,
-                            api_key=serper_key.strip() or None,
-                            raw=raw_serper,
-                            require_google_only=require_google_related,
-                        )
-                    except Exception as e:
-                        st.caption(f"Related searches fetch failed for '{q}': {e}")
-                        related_list, related_src = [], "error"
-                    row["related"] = related_list
-
-                # Collect for analysis
-                analysis_rows.append({
-                    "keyword": q,
-                    "difficulty": int(metrics.get("difficulty") or 0),
-                    "exact_in_title": int(metrics.get("exact_in_title") or 0),
-                    "unique_domains": int(metrics.get("unique_domains") or 0),
-                    "gov_edu": int(metrics.get("gov_edu") or 0),
-                    "aggregators": int(metrics.get("aggregators") or 0),
-                    "is_local": any(s in q.lower() for s in ["local", "near me", "surrey", "camberley", "mytchett"]),
-                    "is_smallbiz": any(s in q.lower() for s in ["small business", "local business"]),
-                })
-                if show_paa:
-                    paa_by_keyword[q] = paa_list
-                    paa_source_by_keyword[q] = paa_source
-                if show_related:
-                    related_by_keyword[q] = row.get("related", [])
-                    related_source_by_keyword[q] = related_src
-
-                # Show raw serper JSON if requested
-                if show_raw_serper and raw_serper is not None:
-                    # Store for later rendering outside of status (to avoid nested expanders)
-                    raw_serper_by_keyword[q] = raw_serper
-
-            except Exception as e:
-                st.warning(f"Failed for '{q}': {e}")
-        status.update(label="SERP complete", state="complete")
-        
+    job_opts = serp_jobs.AnalysisOptions(
+        provider=use_provider,
+        results_per_query=int(results_per_query),
+        fetch_pages=bool(fetch_pages),
+        show_paa=bool(show_paa),
+        show_related=bool(show_related),
+        keep_raw=bool(show_raw_serper),
+        require_google_paa=bool(require_google_paa),
+        require_google_related=bool(require_google_related),
+        location=(serper_location.strip() or None),
+        no_cache=bool(serper_no_cache),
+    )
+    job_id = job_queue.submit(rows, job_opts, api_key=serper_key.strip() or None, label=selected_page or "")
+    st.session_state["serp_job_id"] = job_id
+    st.session_state["serp_job_loaded"] = None
+    st.session_state["serp_job_partial"] = False
+    st.query_params["serp_job"] = job_id
+    log_action("ANALYSIS_QUEUED", f"Job {job_id} with {len(rows)} keywords")
+
+
+@st.fragment(run_every=1.5)
+def _serp_job_progress(job_id: str):
+    job = job_queue.status(job_id)
+    if not job:
+        return
+    total = max(1, job["total"])
+    st.progress(min(1.0, (job["done"] + job["errors"]) / total), text=f"SERP job {job_id}: {job['done']}/{job['total']} keywords ({job['status']})")
+    finished = job_queue.results(job_id)
+    if finished:
+        st.dataframe(
+            [{"keyword": r["keyword"], **r["metrics"]} for r in finished],
+            use_container_width=True,
+            hide_index=True,
+        )
+    c1, c2 = st.columns(2)
+    with c1:
+        if st.button("Stop job", key=f"stop_job_{job_id}"):
+            job_queue.cancel(job_id)
+            st.rerun()
+    with c2:
+        if finished and st.button("Use results so far", key=f"partial_job_{job_id}"):
+            st.session_state["serp_job_partial"] = True
+            st.rerun()
+    if job["status"] not in serp_jobs.ACTIVE:
+        st.rerun()
+
+
+active_job = job_queue.status(st.session_state["serp_job_id"]) if st.session_state.get("serp_job_id") else None
+if active_job:
+    if active_job["status"] in serp_jobs.ACTIVE:
+        _serp_job_progress(active_job["job_id"])
+    elif active_job["status"] in ("failed", "cancelled"):
+        st.warning(
+            f"SERP job {active_job['job_id']} {active_job['status']} after {active_job['done']}/{active_job['total']} keywords"
+            + (f": {active_job['error']}" if active_job.get("error") else "")
+        )
+        if st.button("Resume job", key=f"resume_job_{active_job['job_id']}"):
+            job_queue.resume(active_job["job_id"], api_key=serper_key.strip() or None)
+            st.session_state["serp_job_loaded"] = None
+            st.rerun()
+    for err in job_queue.keyword_errors(active_job["job_id"]):
+        st.warning(f"Failed for '{err['keyword']}': {err['error']}")
+
+with st.expander("Background SERP jobs", expanded=False):
+    for j in job_queue.recent(10):
+        c1, c2 = st.columns([4, 1])
+        with c1:
+            started = datetime.fromtimestamp(j["created_at"]).strftime("%Y-%m-%d %H:%M")
+            st.write(f"`{j['job_id']}` {started} — {j['label'] or 'no page'} — {j['status']} ({j['done']}/{j['total']})")
+        with c2:
+            if st.button("Open", key=f"open_job_{j['job_id']}"):
+                st.session_state["serp_job_id"] = j["job_id"]
+                st.session_state["serp_job_loaded"] = None
+                st.query_params["serp_job"] = j["job_id"]
+                st.rerun()
+
+# Load a finished (or partially finished, on request) job into the analysis summary once
+if active_job and (active_job["status"] not in serp_jobs.ACTIVE or st.session_state.get("serp_job_partial")):
+    load_marker = f"{active_job['job_id']}:{active_job['done']}"
+    if st.session_state.get("serp_job_loaded") != load_marker:
+        st.session_state["serp_job_loaded"] = load_marker
+        st.session_state["serp_job_partial"] = False
+        job_opts = serp_jobs.AnalysisOptions.from_dict(active_job["options"])
+        job_results = job_queue.results(active_job["job_id"])
+        for r in job_results:
+            for note in r.get("notes") or []:
+                st.caption(note)
+        collected = serp_jobs.collect(job_results, job_opts)
+        analysis_rows: list[dict] = collected["analysis_rows"]
+        paa_by_keyword: dict[str, list[str]] = collected["paa_by_keyword"]
+        paa_source_by_keyword: dict[str, str] = collected["paa_source_by_keyword"]
+        related_by_keyword: dict[str, list[str]] = collected["related_by_keyword"]
+        related_source_by_keyword: dict[str, str] = collected["related_source_by_keyword"]
+        raw_serper_by_keyword: dict[str, dict] = collected["raw_serper_by_keyword"]
+        organic_results_by_keyword: dict[str, list[dict]] = collected["organic_results_by_keyword"]
+        log_action("ANALYSIS_LOADED", f"Job {active_job['job_id']}: {len(analysis_rows)} keywords")
+
         # Store analysis flag in session state
         st.session_state["show_analysis_results"] = True
-    # Compute aggregated PAA
-        if show_paa:
+        # Compute aggregated PAA
+        if job_opts.show_paa:
             agg_seen = set()
             aggregated_paa: list[str] = []
             for q, qs in paa_by_keyword.items():
@@ -550,7 +549,7 @@ if run_btn:
                         aggregated_paa.append(item.strip())
         else:
             aggregated_paa = []
-        if show_related:
+        if job_opts.show_related:
             agg_r_seen = set()
             aggregated_related: list[str] = []
             for q, rs in related_by_keyword.items():
@@ -562,13 +561,16 @@ if run_btn:
         else:
             aggregated_related = []
         # Stash raw serper JSON in session for later display
-        if show_raw_serper and raw_serper_by_keyword:
+        if job_opts.keep_raw and raw_serper_by_keyword:
             st.session_state["raw_serper_by_keyword"] = raw_serper_by_keyword
         # Stash organic results per keyword for save flow
         if organic_results_by_keyword:
             st.session_state["organic_results_by_keyword"] = organic_results_by_keyword
+        # Competitor heading topics (only when page outlines were fetched)
+        st.session_state["competitor_topics_by_keyword"] = collected["topics_by_keyword"]
 
 # ========== Analysis Summary Display ==========
+profiler.mark("analysis_summary")
 # Check if we should show analysis results (either just completed or from session state)
 if st.session_state.get("show_analysis_results") and (
     'analysis_rows' in locals() and analysis_rows or 
@@ -680,6 +682,15 @@ if st.session_state.get("show_analysis_results") and (
         st.subheader("Best topic clusters (by easiest member)")
         st.table(cluster_summ[:6])
 
+        # Content ideas: headings that recur across the top competitor pages
+        topics_by_keyword = st.session_state.get("competitor_topics_by_keyword") or {}
+        if topics_by_keyword:
+            with st.expander("💡 Content ideas from competitor headings", expanded=False):
+                st.caption("Titles and H1–H3 of the top 5 results per query; 'mentions' counts how often each heading appears across them.")
+                for kw, items in topics_by_keyword.items():
+                    st.markdown(f"**{kw}**")
+                    st.table(items[:10])
+
         # Explanations and recommendations
         st.subheader("What this means")
         many_hard = hard > (easy + moderate)
@@ -810,11 +821,10 @@ if st.session_state.get("show_analysis_results") and (
                 if selected_page:
                     try:
                         page_info = page_data[selected_page]
-                        with open(page_info["file_path"], 'r', encoding='utf-8') as f:
-                            post = frontmatter.load(f)
-                        
-                        if "seo" in post.metadata and "serpAnalysisHistory" in post.metadata["seo"]:
-                            existing_reports = post.metadata["seo"]["serpAnalysisHistory"]
+                        page_meta = data_layer.page_metadata(page_info["file_path"])
+
+                        if "seo" in page_meta and "serpAnalysisHistory" in page_meta["seo"]:
+                            existing_reports = page_meta["seo"]["serpAnalysisHistory"]
                     except:
                         pass
                 
@@ -840,6 +850,7 @@ if st.session_state.get("show_analysis_results") and (
             # Process save if triggered
             if st.session_state.save_triggered:
                 log_action("SAVE_PROCESS_TRIGGERED", f"Processing save for {selected_page}")
+                profiler.mark("save")
                 st.success("🎯 Save button clicked! Processing...")
                 # Reset the trigger immediately to prevent repeated saves
                 st.session_state.save_triggered = False
@@ -855,7 +866,6 @@ if st.session_state.get("show_analysis_results") and (
                 debug_container = st.container()
                 
                 try:
-                    import frontmatter
                     from datetime import datetime
                     import uuid
                     
@@ -906,9 +916,8 @@ if st.session_state.get("show_analysis_results") and (
                     
                     # Load current page
                     print(f"📖 Loading file content...")
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        post = frontmatter.load(f)
-                    
+                    post = frontmatter_io.load(file_path)
+
                     print(f"✅ File loaded - {len(post.metadata)} frontmatter fields")
                     debug_container.success(f"✅ Step 4: File loaded ({len(post.metadata)} frontmatter fields)")
                     
@@ -1040,21 +1049,12 @@ if st.session_state.get("show_analysis_results") and (
                             "lines": lines_sorted or lines,
                         })
 
-                    # Raw serper JSON per keyword (only if captured this run)
+                    # Raw serper JSON per keyword (only if captured this run); kept as objects in the sidecar
                     raw_serper_map = st.session_state.get("raw_serper_by_keyword", {})
-                    raw_serper_by_kw_list = []
-                    for k, payload in (raw_serper_map or {}).items():
-                        try:
-                            raw_serper_by_kw_list.append({
-                                "keyword": k,
-                                "payload": json.dumps(payload, ensure_ascii=False),
-                            })
-                        except Exception:
-                            # Fallback to string cast if non-serializable
-                            raw_serper_by_kw_list.append({
-                                "keyword": k,
-                                "payload": str(payload),
-                            })
+                    raw_serper_by_kw_list = [
+                        {"keyword": k, "payload": payload}
+                        for k, payload in (raw_serper_map or {}).items()
+                    ]
                     # PAA/Related as list structures for Tina readability
                     paa_by_kw_list = []
                     for k, qs in (report_paa_by_kw or {}).items():
@@ -1089,6 +1089,9 @@ if st.session_state.get("show_analysis_results") and (
                         "hardCount": analysis_hard,
                         "hardKeywords": analysis_keywords["hard"],
                         "topOpportunities": [r["keyword"] for r in analysis_opps[:10]],
+                        "keywordDifficulty": [
+                            {"keyword": r["keyword"], "difficulty": r.get("difficulty")} for r in analysis_opps
+                        ],
                         "analysisNotes": [],  # bullets from stored data would need to be added
                         "nextSteps": [],      # steps from stored data would need to be added
                         "paaAggregated": report_paa_agg,
@@ -1113,9 +1116,23 @@ if st.session_state.get("show_analysis_results") and (
                     print(f"   - Opportunities: {len(new_report['topOpportunities'])} items")
                     debug_container.success(f"✅ Step 8: Created report object ({len(new_report)} fields)")
                     
+                    # Full report goes to a sidecar file; frontmatter keeps a compact summary
+                    report_file = report_store.write_report(ellie_root, page_info["url_path"], new_report)
+                    print(f"🗄️ Report sidecar written: {report_file}")
+                    debug_container.success(f"✅ Step 8b: Full report stored in {report_file}")
+
+                    # Move any legacy inline reports out of the page too
+                    history, moved = report_store.externalize_history(
+                        ellie_root, page_info["url_path"], post.metadata["seo"]["serpAnalysisHistory"]
+                    )
+                    post.metadata["seo"]["serpAnalysisHistory"] = history
+                    if moved:
+                        print(f"🗄️ Moved {moved} legacy inline reports to sidecars")
+                        debug_container.info(f"🗄️ Moved {moved} older inline reports to sidecar files")
+
                     # Add the new report to history
                     print(f"📈 Adding report to serpAnalysisHistory...")
-                    post.metadata["seo"]["serpAnalysisHistory"].append(new_report)
+                    post.metadata["seo"]["serpAnalysisHistory"].append(report_store.summarize(new_report, report_file))
                     post_count_after_add = len(post.metadata["seo"]["serpAnalysisHistory"])
                     
                     print(f"✅ Report added! Count: {pre_count} → {post_count_after_add}")
@@ -1147,36 +1164,29 @@ if st.session_state.get("show_analysis_results") and (
                     debug_container.warning("⚠️ Step 12: WRITING FILE - DO NOT REFRESH PAGE!")
                     
                     try:
-                        with open(file_path, 'w', encoding='utf-8') as f:
-                            content_to_write = frontmatter.dumps(post)
-                            f.write(content_to_write)
+                        content_to_write = frontmatter_io.dump(post, file_path)
+                        data_layer.invalidate("page_metadata")
                         
                         print(f"✅ FILE WRITE SUCCESSFUL!")
                         print(f"📄 Wrote {len(content_to_write)} characters to file")
                         debug_container.success("✅ Step 13: FILE WRITTEN SUCCESSFULLY!")
                         
-                        # Verify the write by reading back
+                        # Verify the write: the page text carries our report id and the sidecar reads back
                         print(f"🔍 Verifying file write...")
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            verification_post = frontmatter.load(f)
-                        
-                        if "seo" in verification_post.metadata and "serpAnalysisHistory" in verification_post.metadata["seo"]:
-                            final_count = len(verification_post.metadata["seo"]["serpAnalysisHistory"])
-                            print(f"✅ VERIFICATION SUCCESSFUL: {final_count} reports found in file")
+                        with profiler.span("verify " + os.path.basename(file_path), kind="file"), \
+                                open(file_path, 'r', encoding='utf-8') as f:
+                            written = f.read()
+                        stored = report_store.read_report_file(ellie_root, report_file)
+
+                        if report_id in written and stored and stored.get("reportId") == report_id:
+                            final_count = len(post.metadata["seo"]["serpAnalysisHistory"])
+                            print(f"✅ VERIFICATION SUCCESSFUL: {final_count} reports, sidecar {report_file}")
                             debug_container.success(f"✅ Step 14: VERIFICATION PASSED ({final_count} reports)")
-                            
-                            # Check if our specific report is there
-                            found_our_report = any(r.get("reportId") == report_id for r in verification_post.metadata["seo"]["serpAnalysisHistory"])
-                            if found_our_report:
-                                print(f"🎯 OUR REPORT FOUND IN FILE: {report_id}")
-                                debug_container.success(f"✅ Step 15: Our report found in file!")
-                            else:
-                                print(f"❌ OUR REPORT NOT FOUND IN FILE!")
-                                debug_container.error(f"❌ Our report NOT found in verification!")
+                            debug_container.success(f"✅ Step 15: Our report found in file!")
                         else:
-                            print(f"❌ VERIFICATION FAILED: No serpAnalysisHistory in saved file")
-                            debug_container.error(f"❌ VERIFICATION FAILED: No serpAnalysisHistory found")
-                            
+                            print(f"❌ VERIFICATION FAILED: report {report_id} not found after save")
+                            debug_container.error(f"❌ Our report NOT found in verification!")
+
                     except Exception as write_error:
                         print(f"❌ FILE WRITE ERROR: {write_error}")
                         debug_container.error(f"❌ FILE WRITE FAILED: {write_error}")
@@ -1254,6 +1264,7 @@ if st.session_state.get("show_analysis_results") and (
                     st.exception(e)
             
             # Historical Reports Viewer
+            profiler.mark("report_history")
             if selected_page and existing_reports:
                 st.subheader("📈 Historical Reports")
                 
@@ -1271,7 +1282,8 @@ if st.session_state.get("show_analysis_results") and (
                 )
                 
                 if selected_report_idx is not None:
-                    selected_report = existing_reports[selected_report_idx]
+                    # Summary lives in frontmatter; the full report (if any) in its sidecar file
+                    selected_report = report_store.load_report(ellie_root, existing_reports[selected_report_idx])
                     
                     # Display report details
                     col1, col2, col3, col4 = st.columns(4)
@@ -1310,6 +1322,23 @@ if st.session_state.get("show_analysis_results") and (
                         st.subheader("Next Steps")
                         for step in selected_report['nextSteps']:
                             st.write(f"• {step}")
+
+                    if selected_report.get('organicSummaryByKeyword'):
+                        with st.expander(f"Organic results ({len(selected_report['organicSummaryByKeyword'])} keywords)"):
+                            for item in selected_report['organicSummaryByKeyword']:
+                                st.markdown(f"**{item.get('keyword', '')}**")
+                                for line in item.get('lines') or []:
+                                    st.write(line)
+
+                    if selected_report.get('reportFile'):
+                        st.caption(f"Full report: {selected_report['reportFile']}")
+                        st.download_button(
+                            "Download full report JSON",
+                            data=json.dumps(selected_report, ensure_ascii=False, indent=2),
+                            file_name=f"{selected_report.get('reportId', 'report')}.json",
+                            mime="application/json",
+                            key=f"download_report_{selected_report.get('reportId', selected_report_idx)}",
+                        )
                             
         # PAA display and add-to-selection UX
         if st.session_state.get("last_analysis_data", {}).get("paa_aggregated"):
@@ -1400,3 +1429,10 @@ if st.session_state.get("show_analysis_results") and (
 
         elif selected_page and not save_analysis:
             st.info("💡 Enable 'Save analysis results to selected page' to save results to TinaCMS")
+
+# Cache hits / time saved for this rerun
+data_layer.render_debug_panel()
+
+# Section / HTTP / file timings for this rerun (opt-in)
+profiler.finish()
+profiler.render_panel()
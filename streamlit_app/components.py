@@ -5,6 +5,7 @@ import streamlit as st
 import os
 import json
 from state import get_quiz_state, set_quiz_result, get_notes, set_note, get_meta, set_meta
+from data_layer import modifier_libraries
 
 CALLOUT_RE = re.compile(r"^>\s*\[!(NOTE|TIP|INFO|WARNING|DANGER)\]\s*(.*)$", re.IGNORECASE)
 
@@ -90,6 +91,8 @@ def save_modifier_libraries(libs: Dict[str, List[str]]) -> bool:
         path = _modifier_storage_file()
         with open(path, "w", encoding="utf-8") as f:
             json.dump(libs, f, indent=2, ensure_ascii=False)
+        from data_layer import invalidate
+        invalidate("modifier_libraries")
         return True
     except Exception:
         return False
@@ -109,7 +112,7 @@ def add_to_library(library_type: str, new_item: str) -> bool:
 
 def ensure_modifier_session_defaults() -> Dict[str, List[str]]:
     """Ensure session_state has options and selected lists for modifiers; return current libraries."""
-    libs = load_modifier_libraries()
+    libs = modifier_libraries()
     if "prefix_options" not in st.session_state:
         st.session_state["prefix_options"] = libs["prefixes"].copy()
     if "suffix_options" not in st.session_state:
@@ -149,7 +152,7 @@ def render_modifier_controls(key_prefix: str = "") -> _Tuple[List[str], List[str
         new_prefix = st.text_input("Add new prefix", key=f"{key_prefix}new_prefix", placeholder="e.g. local")
         if st.button("➕", key=f"{key_prefix}add_prefix", help="Add prefix") and new_prefix.strip():
             if add_to_library("prefixes", new_prefix.strip()):
-                libs = load_modifier_libraries()
+                libs = modifier_libraries()
                 st.session_state["prefix_options"] = libs["prefixes"].copy()
                 if new_prefix.strip() not in st.session_state["selected_prefixes"]:
                     st.session_state["selected_prefixes"].append(new_prefix.strip())
@@ -172,7 +175,7 @@ def render_modifier_controls(key_prefix: str = "") -> _Tuple[List[str], List[str
         new_suffix = st.text_input("Add new suffix", key=f"{key_prefix}new_suffix", placeholder="e.g. near me")
         if st.button("➕", key=f"{key_prefix}add_suffix", help="Add suffix") and new_suffix.strip():
             if add_to_library("suffixes", new_suffix.strip()):
-                libs = load_modifier_libraries()
+                libs = modifier_libraries()
                 st.session_state["suffix_options"] = libs["suffixes"].copy()
                 if new_suffix.strip() not in st.session_state["selected_suffixes"]:
                     st.session_state["selected_suffixes"].append(new_suffix.strip())
@@ -195,7 +198,7 @@ def render_modifier_controls(key_prefix: str = "") -> _Tuple[List[str], List[str
         new_location = st.text_input("Add new location", key=f"{key_prefix}new_location", placeholder="e.g. Woking")
         if st.button("➕", key=f"{key_prefix}add_location", help="Add location") and new_location.strip():
             if add_to_library("locations", new_location.strip()):
-                libs = load_modifier_libraries()
+                libs = modifier_libraries()
                 st.session_state["location_options"] = libs["locations"].copy()
                 if new_location.strip() not in st.session_state["selected_locations"]:
                     st.session_state["selected_locations"].append(new_location.strip())
@@ -575,62 +578,54 @@ def meta_preview_widget(slug: str, preset_label: Optional[str] = None, show_head
 """.format(title=title or "Example title", url=url or "example.com/page", desc=desc or "Example description"), unsafe_allow_html=True)
 
 
-def render_page_selector(ellie_root: str):
+def render_page_selector(ellie_root: str, max_options: int = 200):
     """
     Renders the 📄 Page selector used to bind to the TinaCMS site content.
 
+    Pages come from the indexed site catalog (page_catalog.py), which covers every
+    content collection and only re-reads files that changed. A filter box narrows
+    the options with prefix/fuzzy search.
+
     Returns a tuple of (selected_page_label, page_data), where page_data maps labels to
-    { file_path, url_path, type }.
+    { file_path, url_path, type, title, keyword_count, winning_count, report_count }.
     """
-    from typing import Dict, Any, List, Optional
+    from page_catalog import get_catalog
     st.subheader("📄 Page selector")
 
-    page_options: List[str] = []
-    page_data: Dict[str, Dict[str, Any]] = {}
-
-    if os.path.isdir(ellie_root):
-        # Main pages
-        for page_file in [
-            "home.md",
-            "about.md",
-            "services.md",
-            "contact.md",
-            "blog.md",
-            "case-studies.md",
-            "faq.md",
-        ]:
-            page_path = os.path.join(ellie_root, "content", page_file)
-            if os.path.isfile(page_path):
-                page_name = page_file.replace(".md", "").replace("-", " ").title()
-                url_path = "/" if page_file == "home.md" else f"/{page_file.replace('.md', '')}"
-                label = f"{page_name} ({url_path})"
-                page_options.append(label)
-                page_data[label] = {
-                    "file_path": page_path,
-                    "url_path": url_path,
-                    "type": "page",
-                }
-
-        # Service pages
-        services_dir = os.path.join(ellie_root, "content", "services")
-        if os.path.isdir(services_dir):
-            for service_file in os.listdir(services_dir):
-                if service_file.endswith(".md"):
-                    service_path = os.path.join(services_dir, service_file)
-                    service_name = service_file.replace(".md", "").replace("-", " ").title()
-                    url_path = f"/services/{service_file.replace('.md', '')}"
-                    label = f"Service: {service_name} ({url_path})"
-                    page_options.append(label)
-                    page_data[label] = {
-                        "file_path": service_path,
-                        "url_path": url_path,
-                        "type": "service",
-                    }
+    catalog = get_catalog(ellie_root)
+    page_data: Dict[str, Dict[str, Any]] = catalog.page_data()
+
+    query = ""
+    if len(page_data) > 15:
+        query = st.text_input(
+            "Filter pages",
+            key="page_selector_filter",
+            placeholder="Type part of a title or URL, e.g. 'serv aud'",
+        )
+    matches = catalog.search(query, limit=max_options)
+    page_options: List[str] = [e.label for e in matches]
+    current = st.session_state.get("page_selector")
+    if current and current in page_data and current not in page_options:
+        page_options.insert(0, current)
+    if query:
+        st.caption(f"{len(matches)} of {len(page_data)} pages match")
+
+    def _fmt(label: str) -> str:
+        info = page_data.get(label)
+        if not info:
+            return label
+        bits = []
+        if info.get("keyword_count"):
+            bits.append(f"{info['keyword_count']} kw")
+        if info.get("report_count"):
+            bits.append(f"{info['report_count']} reports")
+        return f"{label} · {', '.join(bits)}" if bits else label
 
     selected_page = st.selectbox(
         "Select a page to analyze",
         options=[""] + page_options,
         index=0,
         key="page_selector",
+        format_func=_fmt,
     )
     return (selected_page or None), page_data
@@ -1,7 +1,7 @@
 from __future__ import annotations
 import os, re, json
 from typing import Dict, List, Tuple, Optional
-import frontmatter
+import frontmatter_io
 
 # Resolve project root (parent of streamlit_app) and content directory
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
@@ -84,7 +84,7 @@ def load_index() -> Dict:
         for f in files:
             if not f.endswith((".md", ".mdx")): continue
             full = os.path.join(root, f)
-            post = frontmatter.load(full)
+            post = frontmatter_io.load(full)
             slug = _slug_for(full)
             heads = _extract_headings(post.content)
             content_with_anchors = _inject_anchors(post.content, heads)
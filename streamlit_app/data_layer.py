@@ -0,0 +1,186 @@
+"""Memoized data layer for the Streamlit app and pages.
+
+Loaders go through `st.cache_data` (values copied per caller) and
+long-lived handles through `st.cache_resource` (one shared object). Every
+wrapper takes an explicit key: file-backed loaders include the file's
+(mtime, size) stamp, so an edit made outside the app is picked up on the
+next rerun, and each has a TTL as a backstop. Code that writes a file calls
+`invalidate(...)` with the wrapper names it affects.
+
+Each call is recorded as a hit or a miss for the current rerun;
+`render_debug_panel()` shows the counts, time spent, and time saved (an
+estimate based on the last miss for that wrapper).
+
+`serp.score_serp` is deliberately not wrapped: it is cheap, in-memory work
+over results that differ on every call, so a cache would only add misses.
+"""
+from __future__ import annotations
+import functools
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import streamlit as st
+
+import profiler
+
+_STATS_KEY = "__data_layer_stats__"
+_tls = threading.local()
+_last_miss_seconds: Dict[str, float] = {}
+_registry: Dict[str, Any] = {}
+
+
+def _stamp(path: str) -> Tuple[str, int, int]:
+    try:
+        st_ = os.stat(path)
+        return os.path.abspath(path), st_.st_mtime_ns, st_.st_size
+    except OSError:
+        return os.path.abspath(path), 0, 0
+
+
+def _record(name: str, hit: bool, seconds: float) -> None:
+    try:
+        stats = st.session_state.setdefault(_STATS_KEY, {})
+    except Exception:
+        return  # no script run context (e.g. a worker thread)
+    s = stats.setdefault(name, {"calls": 0, "hits": 0, "misses": 0, "seconds": 0.0, "saved": 0.0})
+    s["calls"] += 1
+    s["seconds"] += seconds
+    if hit:
+        s["hits"] += 1
+        s["saved"] += max(0.0, _last_miss_seconds.get(name, 0.0) - seconds)
+    else:
+        s["misses"] += 1
+
+
+def memo(name: str, ttl: Optional[float] = None, resource: bool = False, max_entries: Optional[int] = 256):
+    """Register `fn` under `name` behind st.cache_data (or st.cache_resource) with hit/miss accounting."""
+
+    def deco(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def compute(*args, **kwargs):
+            t0 = time.perf_counter()
+            out = fn(*args, **kwargs)
+            _last_miss_seconds[name] = time.perf_counter() - t0
+            _tls.missed = True
+            return out
+
+        if resource:
+            cached = st.cache_resource(ttl=ttl, max_entries=max_entries, show_spinner=False)(compute)
+        else:
+            cached = st.cache_data(ttl=ttl, max_entries=max_entries, show_spinner=False)(compute)
+
+        @functools.wraps(fn)
+        def call(*args, **kwargs):
+            _tls.missed = False
+            t0 = time.perf_counter()
+            with profiler.span(name, kind="cache") as rec:
+                out = cached(*args, **kwargs)
+                if rec is not None:
+                    rec["hit"] = not _tls.missed
+            _record(name, not _tls.missed, time.perf_counter() - t0)
+            return out
+
+        call.clear = cached.clear  # type: ignore[attr-defined]
+        _registry[name] = cached
+        return call
+
+    return deco
+
+
+def invalidate(*names: str) -> None:
+    """Clear the named caches (all of them when no name is given)."""
+    for name in names or tuple(_registry):
+        cached = _registry.get(name)
+        if cached is not None:
+            try:
+                cached.clear()
+            except Exception:
+                pass
+
+
+def start_run() -> None:
+    """Reset the per-rerun counters; call once near the top of each page."""
+    try:
+        st.session_state[_STATS_KEY] = {}
+    except Exception:
+        pass
+
+
+# ---- loaders (st.cache_data) ----
+@memo("modifier_libraries", ttl=600)
+def _modifier_libraries(stamp: Tuple[str, int, int]) -> Dict[str, List[str]]:
+    from components import load_modifier_libraries
+    return load_modifier_libraries()
+
+
+def modifier_libraries() -> Dict[str, List[str]]:
+    from components import _modifier_storage_file
+    return _modifier_libraries(_stamp(_modifier_storage_file()))
+
+
+@memo("page_metadata", ttl=3600, max_entries=1024)
+def _page_metadata(stamp: Tuple[str, int, int]) -> Dict[str, Any]:
+    import frontmatter_io
+    return frontmatter_io.load_metadata_only(stamp[0])
+
+
+def page_metadata(path: str) -> Dict[str, Any]:
+    """Frontmatter dict of a page file, keyed by its (path, mtime, size)."""
+    return _page_metadata(_stamp(path))
+
+
+def page_keywords(path: str) -> Dict[str, List[str]]:
+    """{'keywords': seo.keywords or top-level keywords, 'winning': seo.winningKeywords} for a page."""
+    meta = page_metadata(path)
+    seo = meta.get("seo") if isinstance(meta.get("seo"), dict) else {}
+    seo_keywords = [k for k in (seo.get("keywords") or []) if isinstance(k, str)]
+    top_keywords = [k for k in (meta.get("keywords") or []) if isinstance(k, str)]
+    return {
+        "keywords": seo_keywords or top_keywords,
+        "winning": [k for k in (seo.get("winningKeywords") or []) if isinstance(k, str)],
+    }
+
+
+# ---- shared handles (st.cache_resource) ----
+@memo("gsc_warehouse", resource=True, max_entries=8)
+def gsc_warehouse(path: Optional[str] = None):
+    from plugins.gsc_store import DEFAULT_DB, GscWarehouse
+    return GscWarehouse(path or DEFAULT_DB)
+
+
+# ---- debug panel ----
+def render_debug_panel(expanded: bool = False) -> None:
+    stats: Dict[str, Dict[str, Any]] = {}
+    try:
+        stats = dict(st.session_state.get(_STATS_KEY) or {})
+    except Exception:
+        pass
+    with st.expander("🧰 Cache debug (this rerun)", expanded=expanded):
+        if not stats:
+            st.caption("No cached loaders were called in this rerun.")
+        else:
+            rows = [
+                {
+                    "cache": name,
+                    "calls": s["calls"],
+                    "hits": s["hits"],
+                    "misses": s["misses"],
+                    "ms_spent": round(s["seconds"] * 1000, 1),
+                    "ms_saved": round(s["saved"] * 1000, 1),
+                }
+                for name, s in sorted(stats.items())
+            ]
+            st.dataframe(rows, use_container_width=True, hide_index=True)
+            st.caption(
+                f"Total: {sum(r['hits'] for r in rows)} hits / {sum(r['misses'] for r in rows)} misses, "
+                f"~{sum(r['ms_saved'] for r in rows):.0f} ms saved"
+            )
+        cols = st.columns(2)
+        with cols[0]:
+            name = st.selectbox("Cache", ["all"] + sorted(_registry), key="data_layer_clear_name")
+        with cols[1]:
+            if st.button("Clear cache", key="data_layer_clear"):
+                invalidate() if name == "all" else invalidate(name)
+                st.rerun()
@@ -1,80 +1,253 @@
 from __future__ import annotations
+import io
 import os
-import glob
 import re
-import frontmatter
-from typing import List
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
+import frontmatter_io
 
-def scan_ellie_content(ellie_root: str, limit: int = 500) -> List[str]:
+
+_HEADING_RE = re.compile(r"^(#{1,3})\s+(.+)$", re.MULTILINE)
+_TRAILER_RE = re.compile(r"\s*[\|–\-·•]\s*.*$")
+_NON_ALNUM_RE = re.compile(r"[^A-Za-z0-9\s]+")
+_WS_RE = re.compile(r"\s+")
+
+_CONTENT_EXTS = (".md", ".mdx")
+
+# Per-file topic cache: abs path -> (mtime_ns, size, topics)
+_FILE_TOPICS: Dict[str, Tuple[int, int, List[str]]] = {}
+_CACHE_LOCK = threading.Lock()
+
+
+def _clean_topic(text: str) -> Optional[str]:
+    """Strip site-name trailers and punctuation; keep 2–7 word phrases."""
+    t = _TRAILER_RE.sub("", text).strip()
+    t = _NON_ALNUM_RE.sub(" ", t).strip()
+    t = _WS_RE.sub(" ", t)
+    if 2 <= len(t.split()) <= 7:
+        return t
+    return None
+
+
+def _iter_content_files(ellie_root: str) -> List[Tuple[str, int, int]]:
+    """List (path, mtime_ns, size) for content/**/*.md then *.mdx, glob order."""
+    content_dir = os.path.join(ellie_root, "content")
+    by_ext: Dict[str, List[Tuple[str, int, int]]] = {ext: [] for ext in _CONTENT_EXTS}
+    for root, dirs, files in os.walk(content_dir):
+        # glob("**") skips hidden entries; mirror that
+        dirs[:] = [d for d in dirs if not d.startswith(".")]
+        for name in files:
+            if name.startswith("."):
+                continue
+            ext = os.path.splitext(name)[1]
+            if ext not in by_ext:
+                continue
+            path = os.path.join(root, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            by_ext[ext].append((path, st.st_mtime_ns, st.st_size))
+    out: List[Tuple[str, int, int]] = []
+    for ext in _CONTENT_EXTS:
+        out.extend(by_ext[ext])
+    return out
+
+
+def _extract_file_topics(path: str) -> List[str]:
+    """Parse one content file and return its cleaned, per-file deduped topics."""
+    try:
+        post = frontmatter_io.load(path)
+    except Exception:
+        return []
+    fm = post.metadata or {}
+    seo = fm.get("seo") or {}
+    if not isinstance(seo, dict):
+        seo = {}
+    parts: List[str] = []
+    for k in ["title", "metaTitle"]:
+        v = seo.get(k) or fm.get(k)
+        if isinstance(v, str) and v.strip():
+            parts.append(v.strip())
+    body = getattr(post, "content", "") or ""
+    for _, txt in _HEADING_RE.findall(body):
+        parts.append(txt.strip())
+    seen = set()
+    topics: List[str] = []
+    for t in parts:
+        t2 = _clean_topic(t)
+        if t2 and t2.lower() not in seen:
+            seen.add(t2.lower())
+            topics.append(t2)
+    return topics
+
+
+def clear_content_cache(ellie_root: Optional[str] = None) -> None:
+    """Drop cached per-file topics (all, or only those under ellie_root)."""
+    with _CACHE_LOCK:
+        if not ellie_root:
+            _FILE_TOPICS.clear()
+            return
+        prefix = os.path.join(os.path.abspath(ellie_root), "")
+        for p in [p for p in _FILE_TOPICS if p.startswith(prefix)]:
+            _FILE_TOPICS.pop(p, None)
+
+
+def scan_ellie_content(ellie_root: str, limit: int = 500, max_workers: int = 8) -> List[str]:
     """Traverse Ellie content and extract candidate topics from titles and H1–H3.
 
+    Per-file extractions are cached by (mtime, size), so a re-scan only parses
+    files that changed; those are parsed in a thread pool. `limit` caps the
+    number of topics returned, not the number of files scanned.
+
     Returns a deduped list of 2–7 word topics.
     """
     if not (ellie_root and os.path.isdir(ellie_root)):
         return []
-    content_globs = [
-        os.path.join(ellie_root, "content", "**", "*.md"),
-        os.path.join(ellie_root, "content", "**", "*.mdx"),
-    ]
-    files: List[str] = []
-    for gp in content_globs:
-        files.extend(glob.glob(gp, recursive=True))
-    files = files[: max(0, int(limit))]
-
-    heading_re = re.compile(r"^(#{1,3})\s+(.+)$", re.MULTILINE)
+    files = _iter_content_files(os.path.abspath(ellie_root))
+
+    with _CACHE_LOCK:
+        stale = [
+            path for path, mtime, size in files
+            if _FILE_TOPICS.get(path, (None, None, None))[:2] != (mtime, size)
+        ]
+    if stale:
+        workers = max(1, min(int(max_workers), len(stale)))
+        if workers == 1:
+            parsed = [_extract_file_topics(p) for p in stale]
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as ex:
+                parsed = list(ex.map(_extract_file_topics, stale))
+        stat_by_path = {path: (mtime, size) for path, mtime, size in files}
+        with _CACHE_LOCK:
+            for path, topics in zip(stale, parsed):
+                mtime, size = stat_by_path[path]
+                _FILE_TOPICS[path] = (mtime, size, topics)
+
+    # Forget files that were deleted since the last scan
+    present = {path for path, _, _ in files}
+    prefix = os.path.join(os.path.abspath(ellie_root), "content", "")
+    with _CACHE_LOCK:
+        for p in [p for p in _FILE_TOPICS if p.startswith(prefix) and p not in present]:
+            _FILE_TOPICS.pop(p, None)
+        cached = [_FILE_TOPICS[path][2] for path, _, _ in files if path in _FILE_TOPICS]
+
+    cap = max(0, int(limit))
     seen = set()
     out: List[str] = []
-    for f in files:
-        try:
-            post = frontmatter.load(f)
-            fm = post.metadata or {}
-            seo = fm.get("seo") or {}
-            parts = []
-            for k in ["title", "metaTitle"]:
-                v = seo.get(k) or fm.get(k)
-                if isinstance(v, str) and v.strip():
-                    parts.append(v.strip())
-            body = getattr(post, "content", "") or ""
-            for _, txt in heading_re.findall(body):
-                parts.append(txt.strip())
-            for t in parts:
-                t2 = re.sub(r"\s*[\|–\-·•]\s*.*$", "", t).strip()
-                t2 = re.sub(r"[^A-Za-z0-9\s]+", " ", t2).strip()
-                t2 = re.sub(r"\s+", " ", t2)
-                if 2 <= len(t2.split()) <= 7:
-                    key = t2.lower()
-                    if key not in seen:
-                        seen.add(key)
-                        out.append(t2)
-        except Exception:
-            continue
+    for topics in cached:
+        if len(out) >= cap:
+            break
+        for t in topics:
+            key = t.lower()
+            if key not in seen:
+                seen.add(key)
+                out.append(t)
+                if len(out) >= cap:
+                    break
     return out
 
 
+def _heading_candidate(line: str) -> Optional[str]:
+    """Return the heading text of a pasted line, or None if it doesn't look like one."""
+    if line.startswith("#"):
+        return line.lstrip("#").strip()
+    words = line.split()
+    if 2 <= len(words) <= 8 and sum(1 for w in words if w[:1].isupper()) >= 2:
+        return line
+    return None
+
+
+def _iter_lines(source: Union[str, bytes, IO, Iterable[str]]) -> Iterator[str]:
+    if isinstance(source, bytes):
+        source = source.decode("utf-8", errors="ignore")
+    if isinstance(source, str):
+        source = io.StringIO(source, newline=None)
+    for line in source:
+        if isinstance(line, bytes):
+            line = line.decode("utf-8", errors="ignore")
+        yield line
+
+
+def _emit(candidate: str, seen: set, counts: Optional[Dict[str, int]]) -> Optional[str]:
+    t = _clean_topic(candidate)
+    if not t:
+        return None
+    k = t.lower()
+    if counts is not None:
+        counts[k] = counts.get(k, 0) + 1
+    if k in seen:
+        return None
+    seen.add(k)
+    return t
+
+
+def iter_topics(
+    source: Union[str, bytes, IO, Iterable[str], None],
+    counts: Optional[Dict[str, int]] = None,
+) -> Iterator[str]:
+    """Stream candidate topics from pasted text, a file object or any iterable of lines.
+
+    Each topic is yielded the first time it is seen. When `counts` is given it
+    is updated in place with occurrences per lowercased topic, so it holds the
+    full frequencies once the generator is exhausted.
+    """
+    if source is None:
+        return
+    seen: set = set()
+    for raw in _iter_lines(source):
+        line = raw.strip()
+        if not line:
+            continue
+        cand = _heading_candidate(line)
+        if cand is None:
+            continue
+        t = _emit(cand, seen, counts)
+        if t:
+            yield t
+
+
+def iter_outline_topics(
+    outlines: Iterable[Dict[str, Any]],
+    counts: Optional[Dict[str, int]] = None,
+) -> Iterator[str]:
+    """Stream topics straight from `serp.fetch_page_headings` outlines.
+
+    Titles and H1–H3 are already headings, so the title-case heuristic used
+    for pasted text is skipped.
+    """
+    seen: set = set()
+    for o in outlines or []:
+        if not isinstance(o, dict):
+            continue
+        heads: List[Any] = [o.get("title")]
+        for tag in ("h1", "h2", "h3"):
+            heads.extend(o.get(tag) or [])
+        for h in heads:
+            if not isinstance(h, str) or not h.strip():
+                continue
+            t = _emit(h.strip(), seen, counts)
+            if t:
+                yield t
+
+
+def rank_topics(topics: Iterable[str], counts: Dict[str, int]) -> List[Tuple[str, int]]:
+    """Pair streamed topics with their frequency, most frequent first (ties keep order).
+
+    `topics` may be a live `iter_topics(..., counts)` generator: it is consumed
+    before `counts` is read, so the frequencies are complete.
+    """
+    topics = list(topics)
+    pairs = [(t, counts.get(t.lower(), 0)) for t in topics]
+    pairs.sort(key=lambda p: -p[1])
+    return pairs
+
+
 def extract_topics_from_text(raw_text: str) -> List[str]:
     """Extract candidate topics from pasted competitor headings/titles.
 
     Heuristics: heading markers, title-case lines, 2–7 words, cleaned/deduped.
     """
-    raw = raw_text or ""
-    lines = [l.strip() for l in raw.splitlines() if l.strip()]
-    heading_like: List[str] = []
-    for l in lines:
-        if l.startswith(('#', '##', '###')):
-            heading_like.append(l.lstrip('#').strip())
-        else:
-            if 2 <= len(l.split()) <= 8 and sum(1 for w in l.split() if w[:1].isupper()) >= 2:
-                heading_like.append(l)
-    seen = set()
-    out: List[str] = []
-    for t in heading_like:
-        t2 = re.sub(r"\s*[\|–\-·•]\s*.*$", "", t).strip()
-        t2 = re.sub(r"[^A-Za-z0-9\s]+", " ", t2).strip()
-        t2 = re.sub(r"\s+", " ", t2)
-        if 2 <= len(t2.split()) <= 7:
-            k = t2.lower()
-            if k not in seen:
-                seen.add(k)
-                out.append(t2)
-    return out
+    return list(iter_topics(raw_text or ""))
@@ -0,0 +1,320 @@
+"""Domain classification store used by `serp.score_serp`.
+
+Each domain maps to a bitmask of classes ("aggregator", "strong_info",
+"gov_edu", plus any class named in the data file). It works as a suffix
+trie flattened into one dict keyed by domain. A host is looked up by walking
+its label suffixes: for ``en.m.wikipedia.org`` that is ``en.m.wikipedia.org``,
+then ``m.wikipedia.org``, ``wikipedia.org`` and ``org``. The flags of every
+match are OR-ed together, so a lookup costs one dict probe per label and the
+store costs one short string per domain, even at hundreds of thousands of
+domains.
+
+Matching is public-suffix aware. An entry ending in ``.*`` (``maps.google.*``)
+matches the host with its public suffix removed, so it covers
+``maps.google.com`` and ``maps.google.co.uk`` alike. `registrable_domain()`
+(used when building the store) groups ``www.yell.com`` and ``uk.yell.com``
+under ``yell.com``. Public suffixes come from `tldextract`'s bundled snapshot
+when it is installed, otherwise from a built-in list of common multi-label
+suffixes.
+
+The store is built by ``tools/build_domain_classes.py`` from saved
+serpAnalysisHistory reports and lives in ``.cache/domains/domain_classes.tsv``
+(``SEOLAB_DOMAIN_CLASSES`` overrides the path). Without a file the built-in
+defaults below are used. It is loaded once per process by `get_domain_store()`.
+"""
+from __future__ import annotations
+import os
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import tldextract  # type: ignore
+except ImportError:
+    tldextract = None
+
+ENV_PATH = "SEOLAB_DOMAIN_CLASSES"
+DEFAULT_PATH = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", ".cache", "domains", "domain_classes.tsv")
+)
+
+AGGREGATOR = "aggregator"
+STRONG_INFO = "strong_info"
+GOV_EDU = "gov_edu"
+
+# Built-in classes (the lists score_serp used to hard-code)
+DEFAULT_CLASSES: Dict[str, Tuple[str, ...]] = {
+    AGGREGATOR: (
+        "yell.com", "trustpilot.com", "clutch.co", "bark.com", "upwork.com", "fiverr.com",
+        "facebook.com", "linkedin.com", "maps.google.*", "business.site",
+    ),
+    STRONG_INFO: (
+        "wikipedia.org", "moz.com", "ahrefs.com", "backlinko.com", "hubspot.com", "semrush.com",
+        "searchenginejournal.com",
+    ),
+    GOV_EDU: ("gov", "gov.uk", "edu"),
+}
+
+# Multi-label public suffixes for when tldextract is not installed
+_FALLBACK_SUFFIXES = frozenset({
+    "co.uk", "org.uk", "me.uk", "ltd.uk", "plc.uk", "net.uk", "sch.uk", "ac.uk", "gov.uk", "nhs.uk", "police.uk",
+    "com.au", "net.au", "org.au", "edu.au", "gov.au", "co.nz", "org.nz", "govt.nz", "co.za", "org.za",
+    "com.br", "com.mx", "com.ar", "co.jp", "ne.jp", "or.jp", "co.in", "org.in", "gov.in", "co.kr",
+    "com.cn", "com.hk", "com.sg", "com.my", "co.id", "com.tr", "co.il", "com.ua", "com.pl",
+    "github.io", "blogspot.com", "herokuapp.com", "netlify.app", "vercel.app", "wordpress.com",
+})
+
+_extract = tldextract.TLDExtract(suffix_list_urls=()) if tldextract is not None else None
+
+
+def clean_host(host: str) -> str:
+    """Lower-case, no port, no trailing dot, no leading 'www.'."""
+    host = (host or "").strip().lower()
+    if host.startswith("[") or "@" in host:
+        return host
+    host = host.split(":", 1)[0].rstrip(".")
+    return host[4:] if host.startswith("www.") else host
+
+
+def public_suffix(host: str) -> str:
+    host = clean_host(host)
+    if not host or "." not in host:
+        return host
+    if _extract is not None:
+        try:
+            suffix = _extract(host).suffix
+            if suffix:
+                return suffix
+        except Exception:
+            pass
+    labels = host.split(".")
+    for i in range(1, len(labels)):
+        candidate = ".".join(labels[i:])
+        if candidate in _FALLBACK_SUFFIXES:
+            return candidate
+    return labels[-1]
+
+
+def registrable_domain(host: str) -> str:
+    """'uk.yell.com' -> 'yell.com', 'www.bbc.co.uk' -> 'bbc.co.uk'."""
+    host = clean_host(host)
+    suffix = public_suffix(host)
+    if not suffix or host == suffix:
+        return host
+    stem = host[: -len(suffix) - 1]
+    return f"{stem.rsplit('.', 1)[-1]}.{suffix}"
+
+
+class DomainStore:
+    """domain -> class bitmask with label-suffix lookups."""
+
+    def __init__(self):
+        self._bits: Dict[str, int] = {}
+        self._flags: Dict[str, int] = {}        # domain (or 'stem.*') -> bitmask
+        self.serps: Dict[str, int] = {}         # domain -> SERPs seen in when built from history
+        self._memo: Dict[str, int] = {}
+        self._wildcards = False
+
+    def bit(self, cls: str) -> int:
+        """Bit for a class name (allocated on first use)."""
+        b = self._bits.get(cls)
+        if b is None:
+            b = self._bits[cls] = 1 << len(self._bits)
+        return b
+
+    def classes(self) -> List[str]:
+        return list(self._bits)
+
+    def add(self, domain: str, *classes: str, serps: Optional[int] = None) -> None:
+        key = clean_host(domain)
+        if not key:
+            return
+        mask = 0
+        for cls in classes:
+            if cls:
+                mask |= self.bit(cls)
+        self._flags[key] = self._flags.get(key, 0) | mask
+        if key.endswith(".*"):
+            self._wildcards = True
+        if serps is not None:
+            self.serps[key] = int(serps)
+        self._memo.clear()
+
+    def __len__(self) -> int:
+        return len(self._flags)
+
+    def flags(self, host: str) -> int:
+        """OR of the flags of every label suffix of `host` (and of its stem for '.*' entries)."""
+        hit = self._memo.get(host)
+        if hit is not None:
+            return hit
+        h = clean_host(host)
+        mask = 0
+        probe = h
+        while probe:
+            mask |= self._flags.get(probe, 0)
+            dot = probe.find(".")
+            probe = probe[dot + 1:] if dot >= 0 else ""
+        if self._wildcards and h:
+            suffix = public_suffix(h)
+            stem = h[: -len(suffix) - 1] if suffix and h != suffix else ""
+            while stem:
+                mask |= self._flags.get(stem + ".*", 0)
+                dot = stem.find(".")
+                stem = stem[dot + 1:] if dot >= 0 else ""
+        if len(self._memo) > 200_000:
+            self._memo.clear()
+        self._memo[host] = mask
+        return mask
+
+    def is_a(self, host: str, cls: str) -> bool:
+        b = self._bits.get(cls)
+        return bool(b and self.flags(host) & b)
+
+    def domains(self, cls: Optional[str] = None) -> List[str]:
+        if cls is None:
+            return list(self._flags)
+        b = self._bits.get(cls, 0)
+        return [d for d, m in self._flags.items() if m & b]
+
+    def _names(self, mask: int) -> List[str]:
+        return [c for c, b in self._bits.items() if mask & b]
+
+    def class_names(self, host: str) -> List[str]:
+        """Class names that apply to `host` (same matching as `flags`)."""
+        return self._names(self.flags(host))
+
+    # ---- persistence ----
+    @classmethod
+    def defaults(cls) -> "DomainStore":
+        store = cls()
+        for name in (AGGREGATOR, STRONG_INFO, GOV_EDU):
+            store.bit(name)
+        for name, domains in DEFAULT_CLASSES.items():
+            for d in domains:
+                store.add(d, name)
+        return store
+
+    @classmethod
+    def load(cls, path: str) -> "DomainStore":
+        """Defaults plus the TSV file (``domain<TAB>class,class<TAB>serps``; '#' lines are comments)."""
+        store = cls.defaults()
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip() or line.startswith("#"):
+                    continue
+                parts = line.rstrip("\n").split("\t")
+                serps = None
+                if len(parts) > 2 and parts[2].strip().isdigit():
+                    serps = int(parts[2])
+                names = [c.strip() for c in (parts[1] if len(parts) > 1 else "").split(",")]
+                store.add(parts[0], *names, serps=serps)
+        return store
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        rows = sorted(self._flags, key=lambda d: (-self.serps.get(d, 0), d))
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write("# domain\tclasses\tserps\n")
+            for d in rows:
+                f.write(f"{d}\t{','.join(self._names(self._flags[d]))}\t{self.serps.get(d, '')}\n")
+        os.replace(tmp, path)
+
+
+_store: Optional[DomainStore] = None
+_store_lock = threading.Lock()
+
+
+def store_path() -> str:
+    return os.environ.get(ENV_PATH) or DEFAULT_PATH
+
+
+def get_domain_store() -> DomainStore:
+    """Process-wide store: the data file when present, else the built-in defaults."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            path = store_path()
+            try:
+                _store = DomainStore.load(path) if os.path.exists(path) else DomainStore.defaults()
+            except Exception:
+                _store = DomainStore.defaults()
+        return _store
+
+
+def reset_domain_store() -> None:
+    """Forget the loaded store; the next `get_domain_store()` re-reads the file."""
+    global _store
+    with _store_lock:
+        _store = None
+
+
+# ---- building from saved reports ----
+def _report_serps(report: Dict) -> Iterable[List[str]]:
+    """Result links per keyword SERP in a saved report."""
+    for item in report.get("organicByKeyword") or []:
+        if isinstance(item, dict):
+            yield [r.get("link") or "" for r in item.get("results") or [] if isinstance(r, dict)]
+
+
+def domain_frequencies(site_root: str, exclude: Iterable[str] = ()) -> Tuple[Counter, int]:
+    """(registrable domain -> number of SERPs it appears in, total SERPs) across serpAnalysisHistory."""
+    from urllib.parse import urlparse
+
+    import frontmatter_io
+    import report_store
+    from page_catalog import get_catalog
+
+    skip = {registrable_domain(d) for d in exclude}
+    counts: Counter = Counter()
+    total = 0
+    for entry in get_catalog(site_root).entries():
+        if not entry.report_count:
+            continue
+        try:
+            meta = frontmatter_io.load_metadata_only(entry.file_path)
+        except Exception:
+            continue
+        seo = meta.get("seo") if isinstance(meta.get("seo"), dict) else {}
+        for hist in seo.get("serpAnalysisHistory") or []:
+            if not isinstance(hist, dict):
+                continue
+            for links in _report_serps(report_store.load_report(site_root, hist)):
+                seen = set()
+                for link in links:
+                    try:
+                        host = urlparse(link).netloc
+                    except Exception:
+                        continue
+                    dom = registrable_domain(host)
+                    if dom and dom not in skip:
+                        seen.add(dom)
+                if links:
+                    total += 1
+                    counts.update(seen)
+    return counts, total
+
+
+def build_store(
+    counts: Counter,
+    total: int,
+    min_serps: int = 3,
+    min_share: float = 0.05,
+    frequent_class: str = STRONG_INFO,
+    base: Optional[DomainStore] = None,
+) -> Tuple[DomainStore, List[str]]:
+    """`base` (defaults when None) plus every counted domain with its SERP count.
+
+    Domains seen in at least `min_serps` SERPs and `min_share` of all SERPs get
+    `frequent_class` unless they already carry a class. Returns (store, newly classified).
+    """
+    store = base if base is not None else DomainStore.defaults()
+    promoted: List[str] = []
+    for dom, n in counts.most_common():
+        already = store.flags(dom)
+        store.add(dom, serps=n)
+        if not already and n >= min_serps and total and n / total >= min_share:
+            store.add(dom, frequent_class)
+            promoted.append(dom)
+    return store, promoted
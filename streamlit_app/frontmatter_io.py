@@ -0,0 +1,141 @@
+"""Shared frontmatter I/O for the TinaCMS page files.
+
+- YAML goes through libyaml (``CSafeLoader`` / ``CSafeDumper``) when PyYAML was
+  built with it, falling back to the pure-Python safe classes.
+- Parsed pages are cached per (path, mtime, size), so reruns that touch the
+  same page do not re-parse it; writes through `dump` refresh the cache.
+- `load_metadata_only` reads up to the closing ``---`` and never touches the
+  body, for callers that only need keywords / seo fields.
+
+Returned metadata is a copy, so callers may mutate it freely.
+"""
+from __future__ import annotations
+import copy
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import frontmatter
+import yaml
+from frontmatter.default_handlers import YAMLHandler
+
+import profiler
+
+try:
+    from yaml import CSafeDumper as _Dumper, CSafeLoader as _Loader  # type: ignore
+except ImportError:
+    from yaml import SafeDumper as _Dumper, SafeLoader as _Loader  # type: ignore
+
+CACHE_SIZE = 512
+_BOUNDARY_RE = re.compile(r"^-{3,}\s*$")
+
+
+class FastYAMLHandler(YAMLHandler):
+    """YAMLHandler using the C loader/dumper when available."""
+
+    def load(self, fm: str, **kwargs: object) -> Any:
+        kwargs.setdefault("Loader", _Loader)
+        return super().load(fm, **kwargs)
+
+    def export(self, metadata: Dict[str, object], **kwargs: object) -> str:
+        kwargs.setdefault("Dumper", _Dumper)
+        return super().export(metadata, **kwargs)
+
+
+HANDLER = FastYAMLHandler()
+USING_LIBYAML = _Loader.__name__.startswith("C")
+
+_lock = threading.Lock()
+# abs path -> (mtime_ns, size, metadata, content or None when only the header was read)
+_cache: "OrderedDict[str, Tuple[int, int, Dict[str, Any], Optional[str]]]" = OrderedDict()
+
+
+def _stamp(path: str) -> Tuple[int, int]:
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def _get(path: str, stamp: Tuple[int, int], need_body: bool) -> Optional[Tuple[Dict[str, Any], Optional[str]]]:
+    with _lock:
+        hit = _cache.get(path)
+        if hit is None or (hit[0], hit[1]) != stamp or (need_body and hit[3] is None):
+            return None
+        _cache.move_to_end(path)
+        return hit[2], hit[3]
+
+
+def _put(path: str, stamp: Tuple[int, int], metadata: Dict[str, Any], content: Optional[str]) -> None:
+    with _lock:
+        _cache[path] = (stamp[0], stamp[1], metadata, content)
+        _cache.move_to_end(path)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def clear_cache() -> None:
+    with _lock:
+        _cache.clear()
+
+
+def loads(text: str) -> frontmatter.Post:
+    return frontmatter.loads(text, handler=HANDLER)
+
+
+def dumps(post: frontmatter.Post) -> str:
+    return frontmatter.dumps(post, handler=HANDLER)
+
+
+def load(path: str) -> frontmatter.Post:
+    """Full page (metadata + body), served from the cache while the file is unchanged."""
+    path = os.path.abspath(path)
+    stamp = _stamp(path)
+    hit = _get(path, stamp, need_body=True)
+    if hit is None:
+        with profiler.span(f"read {os.path.basename(path)}", kind="file", path=path), \
+                open(path, "r", encoding="utf-8") as f:
+            post = loads(f.read())
+        _put(path, stamp, post.metadata, post.content)
+        hit = (post.metadata, post.content)
+    post = frontmatter.Post(hit[1] or "", handler=HANDLER)
+    post.metadata = copy.deepcopy(hit[0])
+    return post
+
+
+def load_metadata_only(path: str) -> Dict[str, Any]:
+    """Frontmatter dict only; reads lines until the closing delimiter."""
+    path = os.path.abspath(path)
+    stamp = _stamp(path)
+    hit = _get(path, stamp, need_body=False)
+    if hit is not None:
+        return copy.deepcopy(hit[0])
+    lines = []
+    closed = False
+    with profiler.span(f"read header {os.path.basename(path)}", kind="file", path=path), \
+            open(path, "r", encoding="utf-8-sig") as f:
+        first = f.readline()
+        if _BOUNDARY_RE.match(first):
+            for line in f:
+                if _BOUNDARY_RE.match(line):
+                    closed = True
+                    break
+                lines.append(line)
+    metadata: Dict[str, Any] = {}
+    if closed:
+        parsed = yaml.load("".join(lines), Loader=_Loader)
+        if isinstance(parsed, dict):
+            metadata = parsed
+    _put(path, stamp, metadata, None)
+    return copy.deepcopy(metadata)
+
+
+def dump(post: frontmatter.Post, path: str) -> str:
+    """Write the page and refresh its cache entry; returns the text written."""
+    path = os.path.abspath(path)
+    text = dumps(post)
+    with profiler.span(f"write {os.path.basename(path)}", kind="file", path=path, bytes=len(text)), \
+            open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    _put(path, _stamp(path), copy.deepcopy(post.metadata), post.content)
+    return text
@@ -4,7 +4,9 @@ import re
 import json
 import time
 import csv
-from typing import List, Dict, Tuple, Any
+from typing import List, Dict, Tuple, Any, Optional, Sequence
+
+import numpy as np
 
 
 # 1) Seed expansion
@@ -122,6 +124,136 @@ def cluster_keywords(keywords: List[str], threshold: float = 0.5, max_keywords:
     return rows, clusters
 
 
+# 3b) Clustering by SERP overlap (keywords whose top results share URLs)
+def _url_key(link: str) -> str:
+    """Compare URLs without scheme, 'www.', query, fragment or trailing slash."""
+    u = (link or "").strip().lower()
+    u = u.split("#", 1)[0].split("?", 1)[0]
+    if "://" in u:
+        u = u.split("://", 1)[1]
+    if u.startswith("www."):
+        u = u[4:]
+    return u.rstrip("/")
+
+
+_TRIU_CACHE: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+
+
+def _triu(d: int) -> Tuple[np.ndarray, np.ndarray]:
+    hit = _TRIU_CACHE.get(d)
+    if hit is None:
+        hit = np.triu_indices(d, k=1)
+        if d <= 256:
+            _TRIU_CACHE[d] = hit
+    return hit
+
+
+def _shard_pair_counts(groups: List[np.ndarray], n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """(pair codes i*n+j with i<j, counts) over the posting lists in one shard."""
+    parts = []
+    for members in groups:
+        a, b = _triu(len(members))
+        parts.append(members[a] * n + members[b])
+    if not parts:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return np.unique(np.concatenate(parts), return_counts=True)
+
+
+# pipeline_run warns when fewer keywords than this share have a cached SERP
+MIN_SERP_COVERAGE = 0.5
+
+
+def cluster_by_serp_overlap(
+    keywords: List[str],
+    serp_urls: Dict[str, List[str]],
+    min_overlap: int = 3,
+    top_n: int = 10,
+    max_postings: Optional[int] = 1000,
+    workers: int = 4,
+    shard_pairs: int = 2_000_000,
+) -> Tuple[List[Dict[str, Any]], List[List[int]]]:
+    """
+    Group keywords whose top-`top_n` organic URLs share at least `min_overlap` URLs.
+    `serp_urls` maps a keyword (as given, or normalized) to its result links in rank order.
+
+    Uses an inverted URL -> keyword index, so only keywords that share a URL are ever
+    compared: each URL's posting list contributes its keyword pairs, pairs are counted
+    with numpy in shards of ~`shard_pairs` on `workers` threads, and pairs reaching
+    `min_overlap` are unioned. URLs ranking for more than `max_postings` keywords
+    (site-wide generic pages) are skipped, like stopwords. Keywords without SERP data
+    stay singletons.
+    Returns the same shape as `cluster_keywords`: rows {id, keyword, urls} and clusters.
+    """
+    if not keywords:
+        return [], []
+    n = len(keywords)
+    url_ids: Dict[str, int] = {}
+    postings: List[List[int]] = []
+    rows: List[Dict[str, Any]] = []
+    for i, kw in enumerate(keywords):
+        links = serp_urls.get(kw)
+        if links is None:
+            links = serp_urls.get(normalize_keyword(kw)) or []
+        seen = set()
+        for link in links[:top_n]:
+            key = _url_key(link)
+            if key and key not in seen:
+                seen.add(key)
+                uid = url_ids.get(key)
+                if uid is None:
+                    uid = url_ids[key] = len(postings)
+                    postings.append([])
+                postings[uid].append(i)
+        rows.append({"id": i, "keyword": kw, "urls": len(seen)})
+
+    # Posting lists worth pairing, split into shards of bounded pair count
+    shards: List[List[np.ndarray]] = [[]]
+    budget = 0
+    for members in postings:
+        d = len(members)
+        if d < 2 or (max_postings and d > max_postings):
+            continue
+        pairs = d * (d - 1) // 2
+        if budget and budget + pairs > shard_pairs:
+            shards.append([])
+            budget = 0
+        shards[-1].append(np.asarray(members, dtype=np.int64))
+        budget += pairs
+
+    parent = list(range(n))
+
+    def find(x: int) -> int:
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    if any(shards):
+        if len(shards) > 1 and workers > 1:
+            from concurrent.futures import ThreadPoolExecutor
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(lambda g: _shard_pair_counts(g, n), shards))
+        else:
+            results = [_shard_pair_counts(g, n) for g in shards]
+        codes = np.concatenate([c for c, _ in results])
+        counts = np.concatenate([k for _, k in results])
+        if len(results) > 1:
+            # the same pair can appear in several shards: sum its counts
+            codes, inverse = np.unique(codes, return_inverse=True)
+            counts = np.bincount(inverse, weights=counts).astype(np.int64)
+        for code in codes[counts >= max(1, int(min_overlap))].tolist():
+            ra, rb = find(code // n), find(code % n)
+            if ra != rb:
+                parent[rb] = ra
+
+    clusters_map: Dict[int, List[int]] = {}
+    for i in range(n):
+        clusters_map.setdefault(find(i), []).append(i)
+    clusters = list(clusters_map.values())
+    clusters.sort(key=lambda c: len(c), reverse=True)
+    return rows, clusters
+
+
 # 4) Intent detection (heuristic)
 INTENT_PATTERNS = {
     "informational": [r"\bhow\b", r"\bwhat\b", r"\bguide\b", r"\bdefinition\b", r"\bexamples\b", r"\bwhy\b"],
@@ -149,6 +281,34 @@ def score_keyword(keyword: str, cluster_size: int, matched_modifiers: int = 0) -
     return round(max(base, 0.0), 3)
 
 
+def score_keywords(
+    keywords: Optional[Sequence[str]],
+    cluster_sizes: Sequence[int],
+    matched_modifiers: Optional[Sequence[int]] = None,
+    word_counts: Optional[Sequence[int]] = None,
+    long_tail_bonus: float = 0.5,
+    long_tail_min_words: int = 3,
+    modifier_step: float = 0.2,
+    max_modifiers: int = 3,
+    cluster_step: float = 0.05,
+    max_cluster: int = 10,
+) -> np.ndarray:
+    """Vectorised score_keyword over whole columns; same result with default weights.
+
+    Pass precomputed `word_counts` to skip splitting keywords when rescoring.
+    """
+    sizes = np.asarray(cluster_sizes, dtype=np.float64)
+    if word_counts is None:
+        word_counts = [len(k.split()) for k in (keywords or [])]
+    words = np.asarray(word_counts, dtype=np.int64)
+    mods = np.zeros(sizes.shape) if matched_modifiers is None else np.asarray(matched_modifiers, dtype=np.float64)
+    long_tail = np.where(words >= long_tail_min_words, long_tail_bonus, 0.0)
+    cluster_penalty = np.minimum(sizes, max_cluster) * cluster_step
+    modifier_bonus = np.minimum(mods, max_modifiers) * modifier_step
+    base = 1.0 + long_tail + modifier_bonus - cluster_penalty
+    return np.round(np.maximum(base, 0.0), 3)
+
+
 def compute_modifier_hits(keyword: str, prefix_mods: List[str], suffix_mods: List[str]) -> int:
     count = 0
     for m in prefix_mods:
@@ -195,9 +355,17 @@ def pipeline_run(
     max_keywords: int = 1000,
     base_dir: str | None = None,
     run_dir: str | None = None,
+    cluster_mode: str = "lexical",
+    min_overlap: int = 3,
+    serp_urls: Dict[str, List[str]] | None = None,
 ) -> Dict[str, Any]:
     """
     End-to-end run returning all intermediate artifacts for transparency.
+
+    cluster_mode "serp" groups by shared top-10 URLs (`cluster_by_serp_overlap`) using
+    `serp_urls`, or the SERP cache (serp_cache.py) when it is not given. The cache is
+    filled by SERP analysis jobs and the rank tracker; when fewer than
+    MIN_SERP_COVERAGE of the keywords have a SERP, a warning is added to `notes`.
     """
     base_dir = base_dir or os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
     if run_dir:
@@ -208,7 +376,22 @@ def pipeline_run(
 
     expanded = expand_seeds(seeds, prefix_mods, suffix_mods, max_per_seed=max_per_seed)
     normalized = normalize_and_dedupe(expanded)
-    rows, clusters = cluster_keywords(normalized, threshold=jaccard_threshold, max_keywords=max_keywords)
+    serp_coverage = None
+    notes: List[str] = []
+    if cluster_mode == "serp":
+        kept = normalized[:max_keywords]
+        if serp_urls is None:
+            from serp_cache import get_serp_cache
+            serp_urls = get_serp_cache().links_many(kept)
+        rows, clusters = cluster_by_serp_overlap(kept, serp_urls, min_overlap=min_overlap)
+        serp_coverage = sum(1 for r in rows if r["urls"])
+        if serp_coverage < MIN_SERP_COVERAGE * len(kept):
+            notes.append(
+                f"Only {serp_coverage} of {len(kept)} keywords have a cached SERP; the rest stay unclustered. "
+                "Run a SERP analysis or the rank tracker for them first, or use cluster_mode='lexical'."
+            )
+    else:
+        rows, clusters = cluster_keywords(normalized, threshold=jaccard_threshold, max_keywords=max_keywords)
 
     # Build keyword records with intent and score
     prefix_mods = [m for m in (prefix_mods or []) if m]
@@ -218,15 +401,19 @@ def pipeline_run(
         for idx in member_ids:
             cluster_index[idx] = ci
 
-    keywords_out: List[Dict[str, Any]] = []
+    sizes: List[int] = []
+    hits: List[int] = []
     for r in rows:
-        idx = r["id"]
+        ci = cluster_index.get(r["id"], -1)
+        sizes.append(len(clusters[ci]) if ci >= 0 else 1)
+        hits.append(compute_modifier_hits(r["keyword"], prefix_mods, suffix_mods))
+    scores = score_keywords([r["keyword"] for r in rows], sizes, hits).tolist()
+
+    keywords_out: List[Dict[str, Any]] = []
+    for r, cluster_size, mod_hits, score in zip(rows, sizes, hits, scores):
         kw = r["keyword"]
-        ci = cluster_index.get(idx, -1)
-        cluster_size = len(clusters[ci]) if ci >= 0 else 1
+        ci = cluster_index.get(r["id"], -1)
         intent = detect_intent(kw)
-        mod_hits = compute_modifier_hits(kw, prefix_mods, suffix_mods)
-        score = score_keyword(kw, cluster_size=cluster_size, matched_modifiers=mod_hits)
         keywords_out.append({
             "keyword": kw,
             "cluster_id": ci,
@@ -251,6 +438,10 @@ def pipeline_run(
         "jaccard_threshold": jaccard_threshold,
         "max_per_seed": max_per_seed,
         "max_keywords": max_keywords,
+        "cluster_mode": cluster_mode,
+        "min_overlap": min_overlap if cluster_mode == "serp" else None,
+        "keywords_with_serp": serp_coverage,
+        "notes": notes,
     })
     write_json(run_dir, "expanded_raw", expanded)
     write_json(run_dir, "normalized", normalized)
@@ -264,4 +455,5 @@ def pipeline_run(
         "rows": rows,
         "clusters": clusters,
         "keywords": keywords_out,
+        "notes": notes,
     }
@@ -0,0 +1,238 @@
+"""Indexed catalog of the TinaCMS site pages behind the page selector.
+
+`get_catalog(site_root)` returns one `SiteCatalog` per site for the life of
+the process. `refresh()` walks ``<site_root>/content`` recursively, but a file
+is only re-read (frontmatter header only) when its mtime or size changed.
+Directories whose mtime is unchanged are not re-listed; their files are just
+re-statted. `search()` does token-prefix lookups on a sorted vocabulary and
+falls back to fuzzy token matches.
+"""
+from __future__ import annotations
+import bisect
+import difflib
+import os
+import re
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import frontmatter_io
+
+_CONTENT_EXTS = (".md", ".mdx")
+# Top-level pages keep their historical order at the head of the selector
+_MAIN_PAGES = ("home", "about", "services", "contact", "blog", "case-studies", "faq")
+_TYPE_NAMES = {"services": "service", "posts": "post", "blog": "blog", "case-studies": "case-study"}
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+@dataclass
+class PageEntry:
+    label: str
+    file_path: str
+    url_path: str
+    type: str
+    title: str = ""
+    keyword_count: int = 0
+    winning_count: int = 0
+    report_count: int = 0
+    mtime_ns: int = 0
+    size: int = 0
+
+    def info(self) -> Dict[str, object]:
+        """The dict render_page_selector callers index into (file_path, url_path, type, ...)."""
+        return {
+            "file_path": self.file_path,
+            "url_path": self.url_path,
+            "type": self.type,
+            "title": self.title,
+            "keyword_count": self.keyword_count,
+            "winning_count": self.winning_count,
+            "report_count": self.report_count,
+        }
+
+
+def _name(slug: str) -> str:
+    return slug.replace("-", " ").replace("_", " ").title()
+
+
+def _describe(content_dir: str, path: str) -> Tuple[str, str, str]:
+    """(label, url_path, type) for a content file."""
+    rel = os.path.relpath(path, content_dir).replace(os.sep, "/")
+    parts = rel.rsplit(".", 1)[0].split("/")
+    if parts[-1] == "index" and len(parts) > 1:
+        parts = parts[:-1]
+    if len(parts) == 1:
+        slug = parts[0]
+        url_path = "/" if slug in ("home", "index") else f"/{slug}"
+        return f"{_name(slug)} ({url_path})", url_path, "page"
+    collection = parts[0]
+    kind = _TYPE_NAMES.get(collection, collection)
+    url_path = "/" + "/".join(parts)
+    return f"{_name(kind)}: {_name(parts[-1])} ({url_path})", url_path, kind
+
+
+def _count(value) -> int:
+    return len(value) if isinstance(value, (list, tuple)) else 0
+
+
+def _sort_key(entry: PageEntry) -> Tuple[int, int, str]:
+    if entry.type == "page":
+        slug = entry.url_path.strip("/") or "home"
+        if slug in _MAIN_PAGES:
+            return (0, _MAIN_PAGES.index(slug), "")
+        return (0, len(_MAIN_PAGES), entry.label.lower())
+    return (1, 0, entry.label.lower())
+
+
+class SiteCatalog:
+    def __init__(self, site_root: str):
+        self.site_root = site_root
+        self.content_dir = os.path.join(site_root, "content")
+        self._lock = threading.Lock()
+        self._entries: Dict[str, PageEntry] = {}       # file path -> entry
+        self._dirs: Dict[str, Tuple[int, List[str], List[str]]] = {}  # dir -> (mtime_ns, files, subdirs)
+        self._ordered: List[PageEntry] = []
+        self._by_label: Dict[str, PageEntry] = {}
+        self._vocab: List[Tuple[str, int]] = []        # sorted (token, entry index)
+        self._tokens: List[str] = []                   # distinct tokens, sorted
+        self.version = 0
+
+    # ---- indexing ----
+    def _list_dir(self, path: str) -> Tuple[List[str], List[str]]:
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return [], []
+        hit = self._dirs.get(path)
+        if hit is not None and hit[0] == mtime:
+            return hit[1], hit[2]
+        files: List[str] = []
+        subdirs: List[str] = []
+        try:
+            with os.scandir(path) as it:
+                for e in it:
+                    if e.name.startswith("."):
+                        continue
+                    if e.is_dir(follow_symlinks=False):
+                        subdirs.append(e.path)
+                    elif e.name.lower().endswith(_CONTENT_EXTS):
+                        files.append(e.path)
+        except OSError:
+            return [], []
+        self._dirs[path] = (mtime, files, subdirs)
+        return files, subdirs
+
+    def _read(self, path: str, mtime_ns: int, size: int) -> PageEntry:
+        label, url_path, kind = _describe(self.content_dir, path)
+        entry = PageEntry(label, path, url_path, kind, mtime_ns=mtime_ns, size=size)
+        try:
+            meta = frontmatter_io.load_metadata_only(path)
+        except Exception:
+            meta = {}
+        seo = meta.get("seo") if isinstance(meta.get("seo"), dict) else {}
+        title = seo.get("metaTitle") or meta.get("title") or ""
+        entry.title = title if isinstance(title, str) else ""
+        entry.keyword_count = _count(seo.get("keywords")) or _count(meta.get("keywords"))
+        entry.winning_count = _count(seo.get("winningKeywords"))
+        entry.report_count = _count(seo.get("serpAnalysisHistory"))
+        return entry
+
+    def refresh(self) -> bool:
+        """Bring the index up to date; returns True when anything changed."""
+        with self._lock:
+            if not os.path.isdir(self.content_dir):
+                changed = bool(self._entries)
+                self._entries, self._dirs = {}, {}
+                if changed:
+                    self._rebuild()
+                return changed
+            seen: Dict[str, PageEntry] = {}
+            changed = False
+            stack = [self.content_dir]
+            while stack:
+                files, subdirs = self._list_dir(stack.pop())
+                stack.extend(subdirs)
+                for path in files:
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    entry = self._entries.get(path)
+                    if entry is None or entry.mtime_ns != st.st_mtime_ns or entry.size != st.st_size:
+                        entry = self._read(path, st.st_mtime_ns, st.st_size)
+                        changed = True
+                    seen[path] = entry
+            if len(seen) != len(self._entries):
+                changed = True
+            self._entries = seen
+            self._dirs = {d: v for d, v in self._dirs.items() if os.path.isdir(d)}
+            if changed or not self.version:
+                self._rebuild()
+            return changed
+
+    def _rebuild(self) -> None:
+        self._ordered = sorted(self._entries.values(), key=_sort_key)
+        self._by_label = {e.label: e for e in self._ordered}
+        vocab = set()
+        for i, e in enumerate(self._ordered):
+            for tok in set(_TOKEN_RE.findall(f"{e.label} {e.title}".lower())):
+                vocab.add((tok, i))
+        self._vocab = sorted(vocab)
+        self._tokens = sorted({t for t, _ in self._vocab})
+        self.version += 1
+
+    # ---- queries ----
+    def entries(self) -> List[PageEntry]:
+        return list(self._ordered)
+
+    def get(self, label: str) -> Optional[PageEntry]:
+        return self._by_label.get(label)
+
+    def page_data(self) -> Dict[str, Dict[str, object]]:
+        return {e.label: e.info() for e in self._ordered}
+
+    def _prefix_ids(self, token: str) -> set:
+        out = set()
+        i = bisect.bisect_left(self._vocab, (token, -1))
+        while i < len(self._vocab) and self._vocab[i][0].startswith(token):
+            out.add(self._vocab[i][1])
+            i += 1
+        return out
+
+    def _fuzzy_ids(self, token: str) -> set:
+        out = set()
+        for close in difflib.get_close_matches(token, self._tokens, n=5, cutoff=0.75):
+            out |= self._prefix_ids(close)
+        return out
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[PageEntry]:
+        """Pages matching every query token by prefix (exact hits first), else fuzzily."""
+        tokens = _TOKEN_RE.findall((query or "").lower())
+        if not tokens:
+            return self._ordered[:limit] if limit else list(self._ordered)
+        exact: Optional[set] = None
+        loose: Optional[set] = None
+        for tok in tokens:
+            ids = self._prefix_ids(tok)
+            exact = ids if exact is None else exact & ids
+            ids = ids | self._fuzzy_ids(tok)
+            loose = ids if loose is None else loose & ids
+        ranked = sorted(exact or ()) + sorted((loose or set()) - (exact or set()))
+        hits = [self._ordered[i] for i in ranked]
+        return hits[:limit] if limit else hits
+
+
+_catalogs: Dict[str, SiteCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_catalog(site_root: str, refresh: bool = True) -> SiteCatalog:
+    """Process-wide catalog for a site root, refreshed (incrementally) by default."""
+    key = os.path.abspath(site_root)
+    with _catalogs_lock:
+        cat = _catalogs.get(key)
+        if cat is None:
+            cat = _catalogs[key] = SiteCatalog(site_root)
+    if refresh:
+        cat.refresh()
+    return cat
@@ -0,0 +1,106 @@
+"""Background live search for the selected page's URL.
+
+Selecting a page used to run a blocking DuckDuckGo query inside the script
+run. Lookups now go to a small thread pool and their results are cached per
+url_path for `TTL_SECONDS`. A page that is already being searched is not
+searched twice. The app asks for a fresh lookup only when the selection
+changes, or when the user clicks refresh. Other reruns just `peek()` at
+whatever is cached. `fetch_serp` returns [] instead of raising when the
+provider fails, so an empty result is stored as an error and never counts as
+fresh.
+"""
+from __future__ import annotations
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from serp import SerpResult, fetch_serp
+
+TTL_SECONDS = 30 * 60
+MAX_ENTRIES = 500
+
+
+class PageSearchCache:
+    """url_path -> last live search result; fetches run on worker threads."""
+
+    def __init__(self, ttl: float = TTL_SECONDS, max_workers: int = 2):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._inflight: Dict[str, Future] = {}
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="page-search")
+
+    def _run(self, url_path: str, query: str) -> None:
+        entry: Dict[str, Any] = {"query": query, "fetched_at": time.time(), "results": [], "error": None}
+        try:
+            entry["results"] = fetch_serp(query, provider="duckduckgo", num=10, locale="gb-en")
+            if not entry["results"]:
+                entry["error"] = "No results returned (DuckDuckGo may be rate limiting); use Refresh to try again."
+        except Exception as e:
+            entry["error"] = str(e)
+        with self._lock:
+            self._entries[url_path] = entry
+            self._inflight.pop(url_path, None)
+            if len(self._entries) > MAX_ENTRIES:
+                oldest = min(self._entries, key=lambda k: self._entries[k]["fetched_at"])
+                self._entries.pop(oldest, None)
+
+    def _state(self, url_path: str) -> Dict[str, Any]:
+        entry = self._entries.get(url_path)
+        pending = url_path in self._inflight
+        if entry is None:
+            return {"status": "pending" if pending else "missing", "results": [], "error": None,
+                    "fetched_at": None, "stale": False, "refreshing": pending}
+        return {
+            "status": "error" if entry["error"] else "ready",
+            "results": list(entry["results"]),
+            "error": entry["error"],
+            "fetched_at": entry["fetched_at"],
+            "stale": time.time() - entry["fetched_at"] > self.ttl,
+            "refreshing": pending,
+        }
+
+    def request(self, url_path: str, query: str, force: bool = False) -> Dict[str, Any]:
+        """Start a lookup if nothing fresh is cached (or `force`), then return the current state."""
+        with self._lock:
+            entry = self._entries.get(url_path)
+            fresh = (
+                entry is not None and not entry["error"] and entry["query"] == query
+                and time.time() - entry["fetched_at"] <= self.ttl
+            )
+            if (force or not fresh) and url_path not in self._inflight:
+                self._inflight[url_path] = self._pool.submit(self._run, url_path, query)
+            return self._state(url_path)
+
+    def peek(self, url_path: str) -> Dict[str, Any]:
+        """Current state without starting a lookup."""
+        with self._lock:
+            return self._state(url_path)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_cache: Optional[PageSearchCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_page_search() -> PageSearchCache:
+    """Process-wide live search cache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = PageSearchCache()
+        return _cache
+
+
+def domain_matches(results: List[SerpResult], domain: str, url_path: str) -> Dict[str, List[SerpResult]]:
+    """Split results into exact matches for the page and other pages on the domain."""
+    domain_pages = [res for res in results if domain in res.link.lower()]
+    exact = [
+        res for res in domain_pages
+        if url_path in res.link or (url_path == "/" and (res.link.endswith(domain) or res.link.endswith(domain + "/")))
+    ]
+    return {"domain": domain_pages, "exact": exact, "other": [res for res in domain_pages if res not in exact]}
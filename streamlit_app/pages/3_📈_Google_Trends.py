@@ -5,7 +5,7 @@ import json
 import io
 import csv
 import streamlit as st
-import frontmatter
+import data_layer
 from typing import List
 
 # Ensure repository root is on sys.path to import top-level packages like 'plugins'
@@ -18,6 +18,7 @@ try:
 except Exception:
     GoogleTrendsPlugin = None
 
+data_layer.start_run()
 st.title("Google Trends 📈")
 st.caption("Use the page selector to load keywords, or use your current Seeds/Selected queries.")
 
@@ -34,15 +35,7 @@ selected_page, page_data = render_page_selector(ellie_root)
 page_loaded_keywords = []
 if selected_page and selected_page in page_data:
     try:
-        with open(page_data[selected_page]["file_path"], "r", encoding="utf-8") as f:
-            post = frontmatter.load(f)
-        existing_keywords = post.metadata.get("keywords", []) or []
-        seo_section = post.metadata.get("seo", {}) or {}
-        seo_keywords = seo_section.get("keywords", []) or []
-        if seo_keywords:
-            page_loaded_keywords.extend([k for k in seo_keywords if isinstance(k, str)])
-        elif existing_keywords:
-            page_loaded_keywords.extend([k for k in existing_keywords if isinstance(k, str)])
+        page_loaded_keywords.extend(data_layer.page_keywords(page_data[selected_page]["file_path"])["keywords"])
         if page_loaded_keywords:
             st.caption(f"Loaded {len(page_loaded_keywords)} keyword(s) from page")
     except Exception as e:
@@ -248,5 +241,19 @@ if data:
                 file_name=f"trends_{fn_locale}_{fn_tf}.json",
                 mime="application/json",
             )
+        # Derived metrics computed locally from cached series (no extra requests)
+        with st.expander("Derived metrics from cached series", expanded=False):
+            try:
+                from plugins.trends_analytics import load_series, metrics_table  # type: ignore
+                recs = GoogleTrendsPlugin().series_records(list(data.keys()), context={"locale": locale, "date_range": timeframe}) if GoogleTrendsPlugin else {}
+                if recs:
+                    st.dataframe(metrics_table(load_series(recs)), use_container_width=True)
+                    st.caption("YoY delta needs a 5-year timeframe; peak month is the strongest calendar month in the seasonal index.")
+                else:
+                    st.caption("No cached series for these keywords yet.")
+            except Exception as e:
+                st.caption(f"Analytics unavailable: {e}")
     else:
         st.info("No trend data to display.")
+
+data_layer.render_debug_panel()
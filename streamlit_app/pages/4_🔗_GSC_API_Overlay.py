@@ -1,13 +1,12 @@
 import os
 from pathlib import Path
 import json
-import datetime as dt
 from typing import List, Dict
 
 import streamlit as st
 import pandas as pd
 import sys
-import frontmatter
+import data_layer
 
 try:
     from googleapiclient.discovery import build
@@ -18,6 +17,14 @@ except Exception:
     HttpError = Exception
     service_account = None
 
+# Ensure repository root is on sys.path to import top-level packages like 'plugins'
+_REPO_ROOT = str(Path(__file__).resolve().parents[2])
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
+
+from plugins.gsc_api import GscScheduler, QueryIndex, date_window, fetch_query_rows, iter_keyword_metrics
+from plugins import google_clients
+
 # Make sure we can import shared components and pipeline
 try:
     from components import render_page_selector, ensure_modifier_session_defaults, render_modifier_controls
@@ -47,37 +54,16 @@ def _default_sa_path() -> Path:
     return _repo_root() / ".secrets" / "gsc" / "service_account.json"
 
 
-def _query_keyword(svc, site_url: str, start: str, end: str, keyword: str, operator: str = "equals") -> Dict:
-    filt = {
-        "dimension": "query",
-        "operator": operator,
-        "expression": keyword,
-    }
-    body = {
-        "startDate": start,
-        "endDate": end,
-        "dimensions": ["query"],
-        "dimensionFilterGroups": [{"filters": [filt]}],
-        "rowLimit": 1,
-    }
-    resp = svc.searchanalytics().query(siteUrl=site_url, body=body).execute()
-    rows = resp.get("rows", [])
-    if not rows:
-        return {
-            "keyword": keyword,
-            "impressions": 0,
-            "clicks": 0,
-            "ctr": 0.0,
-            "position": None,
-        }
-    row = rows[0]
-    return {
-        "keyword": keyword,
-        "impressions": int(row.get("impressions", 0)),
-        "clicks": int(row.get("clicks", 0)),
-        "ctr": float(row.get("ctr", 0.0)),
-        "position": float(row.get("position", 0.0)),
-    }
+def _http_error_message(e: Exception) -> str:
+    msg = str(e)
+    status = getattr(getattr(e, "resp", None), "status", None)
+    if "accessNotConfigured" in msg or "has not been used in project" in msg:
+        return "Search Console API not enabled for this Cloud project. Enable it in Google Cloud Console and retry."
+    if status == 403:
+        return "403 permission issue. Ensure the service account email is added as a user on the GSC property."
+    if status == 404:
+        return "404 not found. Check siteUrl (use sc-domain:example.com for Domain properties)."
+    return f"HttpError: {msg}"
 
 
 def _download_bytes(data: List[Dict], fmt: str) -> bytes:
@@ -95,6 +81,7 @@ def _download_bytes(data: List[Dict], fmt: str) -> bytes:
 
 def main():
     st.set_page_config(page_title="GSC API Overlay (Service Account)", layout="wide")
+    data_layer.start_run()
     st.title("🔗 GSC API Overlay (Service Account)")
     st.caption(
         "Pull search performance from Google Search Console. Choose exact keywords or fetch the site's top queries, then export to JSON/CSV."
@@ -158,6 +145,17 @@ def main():
                 "• contains: any query that includes your text (broader, can include variations)."
             ),
         )
+        fetch_strategy = st.radio(
+            "Fetch strategy",
+            ["Bulk (one paginated pull)", "Per keyword"],
+            index=0,
+            horizontal=True,
+            disabled=(mode == "All queries"),
+            help=(
+                "Bulk: download all of the site's queries for the period once (25k rows per request) and match keywords locally.\n"
+                "Per keyword: one API request per keyword (slower, but not limited by what the bulk export returns)."
+            ),
+        )
 
     with colB:
         sa_path = st.text_input(
@@ -191,6 +189,56 @@ def main():
             ),
         )
 
+    with st.expander("Per-keyword request budget", expanded=False):
+        st.caption(
+            "Used by 'Per keyword' fetches. Search Console allows ~1,200 queries/minute per property; "
+            "429/5xx responses are retried with backoff."
+        )
+        b1, b2, b3 = st.columns(3)
+        with b1:
+            budget_qps = st.number_input("Queries per second", min_value=1.0, max_value=20.0, value=10.0, step=1.0)
+        with b2:
+            budget_qpm = st.number_input("Queries per minute", min_value=60, max_value=1200, value=1200, step=60)
+        with b3:
+            budget_workers = st.number_input("Parallel requests", min_value=1, max_value=16, value=8, step=1)
+
+    source = st.radio(
+        "Data source",
+        ["Live API", "Local store"],
+        index=0,
+        horizontal=True,
+        help=(
+            "Live API: query Search Console now.\n"
+            "Local store: read daily rows synced into the local SQLite warehouse (instant, any window within the synced history)."
+        ),
+    )
+    with st.expander("Local store (incremental daily sync)", expanded=(source == "Local store")):
+        store = data_layer.gsc_warehouse()
+        cov = store.coverage(site_url)
+        if cov["days"]:
+            st.caption(
+                f"{cov['days']} day(s) stored for {site_url}: {cov['first_day']} → {cov['last_day']} "
+                f"({cov['rows']:,} rows). Store: {store.path}"
+            )
+        else:
+            st.caption(f"Nothing stored yet for {site_url}. Store: {store.path}")
+        if st.button("Sync missing days", help="Fetches only days not yet stored (up to ~16 months back) and re-fetches days that hadn't settled."):
+            if not os.path.exists(sa_path):
+                st.error("service_account.json not found at the provided path")
+            else:
+                try:
+                    bar = st.progress(0.0, text="Checking stored days…")
+
+                    def _on_day(day: str, n: int, done: int, total: int):
+                        bar.progress(done / max(1, total), text=f"{day}: {n} rows ({done}/{total})")
+
+                    with google_clients.searchconsole(sa_path) as svc:
+                        summary = store.sync(svc, site_url, on_day=_on_day)
+                    bar.empty()
+                    st.success(f"Synced {summary['days_synced']} day(s), {summary['rows']:,} rows.")
+                except Exception as e:
+                    st.error(f"Sync failed: {e}")
+
     st.markdown("---")
     if mode == "Keyword list":
         st.subheader("Keywords")
@@ -210,15 +258,7 @@ def main():
                 page_loaded_keywords: List[str] = []
                 if selected_page and selected_page in page_data:
                     try:
-                        with open(page_data[selected_page]["file_path"], "r", encoding="utf-8") as f:
-                            post = frontmatter.load(f)
-                        existing_keywords = post.metadata.get("keywords", []) or []
-                        seo_section = post.metadata.get("seo", {}) or {}
-                        seo_keywords = seo_section.get("keywords", []) or []
-                        if seo_keywords:
-                            page_loaded_keywords.extend([k for k in seo_keywords if isinstance(k, str)])
-                        elif existing_keywords:
-                            page_loaded_keywords.extend([k for k in existing_keywords if isinstance(k, str)])
+                        page_loaded_keywords.extend(data_layer.page_keywords(page_data[selected_page]["file_path"])["keywords"])
                         if page_loaded_keywords:
                             st.caption(f"Loaded {len(page_loaded_keywords)} keyword(s) from page")
                     except Exception as e:
@@ -359,57 +399,83 @@ def main():
     results: List[Dict] = []
     err_msg = None
     if run:
-        # Resolve dates
-        end = dt.date.today().isoformat()
-        start = (dt.date.today() - dt.timedelta(days=int(lookback))).isoformat()
-        # Validate
-        if not os.path.isabs(sa_path):
-            st.error("Please provide an absolute path to the service_account.json")
-            return
-        if not os.path.exists(sa_path):
-            st.error("service_account.json not found at the provided path")
-            return
+        # Resolve dates (ends yesterday, like the warehouse sync and the enrichment plugin)
+        start, end = date_window(int(lookback))
         if mode == "Keyword list" and not keywords:
             st.warning("No keywords provided.")
             return
-
-        try:
-            creds = service_account.Credentials.from_service_account_file(sa_path, scopes=["https://www.googleapis.com/auth/webmasters.readonly"])
-            svc = build("searchconsole", "v1", credentials=creds, cache_discovery=False)
+        if source == "Local store":
+            store = data_layer.gsc_warehouse()
+            if store.missing_days(site_url, start, end, settle_days=0):
+                st.info("Some days in this window are not in the local store yet; use 'Sync missing days' to fill them.")
             if mode == "All queries":
-                body = {
-                    "startDate": start,
-                    "endDate": end,
-                    "dimensions": ["query"],
-                    "rowLimit": int(row_limit),
-                    # Show most meaningful results first
-                    "orderBy": [{"field": "clicks", "descending": True}],
-                }
-                resp = svc.searchanalytics().query(siteUrl=site_url, body=body).execute()
-                for row in (resp.get("rows") or []):
-                    key = (row.get("keys") or [None])[0]
-                    results.append({
-                        "keyword": key,
-                        "impressions": int(row.get("impressions", 0)),
-                        "clicks": int(row.get("clicks", 0)),
-                        "ctr": float(row.get("ctr", 0.0)),
-                        "position": float(row.get("position", 0.0)),
-                    })
+                results = store.top_queries(site_url, start, end, limit=int(row_limit))
             else:
-                for kw in keywords:
-                    results.append(_query_keyword(svc, site_url, start, end, kw, operator=operator))
-        except HttpError as e:
-            msg = str(e)
-            if "accessNotConfigured" in msg or "has not been used in project" in msg:
-                err_msg = "Search Console API not enabled for this Cloud project. Enable it in Google Cloud Console and retry."
-            elif getattr(e, "resp", None) and getattr(e.resp, "status", None) == 403:
-                err_msg = "403 permission issue. Ensure the service account email is added as a user on the GSC property."
-            elif getattr(e, "resp", None) and getattr(e.resp, "status", None) == 404:
-                err_msg = "404 not found. Check siteUrl (use sc-domain:example.com for Domain properties)."
-            else:
-                err_msg = f"HttpError: {msg}"
-        except Exception as e:
-            err_msg = f"Error: {e}"
+                results = store.keyword_metrics(site_url, start, end, keywords, operator=operator)
+        # Validate
+        elif not os.path.isabs(sa_path):
+            st.error("Please provide an absolute path to the service_account.json")
+            return
+        elif not os.path.exists(sa_path):
+            st.error("service_account.json not found at the provided path")
+            return
+        else:
+            try:
+                if mode == "All queries":
+                    body = {
+                        "startDate": start,
+                        "endDate": end,
+                        "dimensions": ["query"],
+                        "rowLimit": int(row_limit),
+                        # Show most meaningful results first
+                        "orderBy": [{"field": "clicks", "descending": True}],
+                    }
+                    with google_clients.searchconsole(sa_path) as svc:
+                        resp = svc.searchanalytics().query(siteUrl=site_url, body=body).execute()
+                    for row in (resp.get("rows") or []):
+                        key = (row.get("keys") or [None])[0]
+                        results.append({
+                            "keyword": key,
+                            "impressions": int(row.get("impressions", 0)),
+                            "clicks": int(row.get("clicks", 0)),
+                            "ctr": float(row.get("ctr", 0.0)),
+                            "position": float(row.get("position", 0.0)),
+                        })
+                elif fetch_strategy.startswith("Bulk"):
+                    with st.spinner("Downloading all queries for the period…"):
+                        with google_clients.searchconsole(sa_path) as svc:
+                            index = QueryIndex(fetch_query_rows(svc, site_url, start, end, ["query"]))
+                    results.extend(index.lookup_many(keywords, operator=operator))
+                    st.caption(f"Matched {len(keywords)} keyword(s) locally against {len(index):,} queries.")
+                else:
+                    scheduler = GscScheduler(qps=float(budget_qps), qpm=int(budget_qpm), max_workers=int(budget_workers))
+                    ordered: List[Dict] = [None] * len(keywords)  # type: ignore[list-item]
+                    bar = st.progress(0.0, text=f"0/{len(keywords)} keywords")
+                    live = st.empty()
+                    errors: List[Exception] = []
+                    done = 0
+                    for i, row, err in iter_keyword_metrics(
+                        lambda: google_clients.searchconsole(sa_path),
+                        site_url, start, end, keywords, operator=operator, scheduler=scheduler,
+                    ):
+                        ordered[i] = row
+                        done += 1
+                        if err is not None:
+                            errors.append(err)
+                        bar.progress(done / len(keywords), text=f"{done}/{len(keywords)} keywords")
+                        if done % 10 == 0 or done == len(keywords):
+                            live.dataframe(pd.DataFrame([r for r in ordered if r]), use_container_width=True, hide_index=True)
+                    bar.empty()
+                    live.empty()
+                    results.extend(ordered)
+                    if errors:
+                        first = errors[0]
+                        detail = _http_error_message(first) if isinstance(first, HttpError) else f"Error: {first}"
+                        err_msg = f"{len(errors)} keyword(s) failed (shown with zero metrics). {detail}"
+            except HttpError as e:
+                err_msg = _http_error_message(e)
+            except Exception as e:
+                err_msg = f"Error: {e}"
 
     # Render results
     if err_msg:
@@ -441,3 +507,4 @@ def main():
 
 if __name__ == "__main__":
     main()
+    data_layer.render_debug_panel()
@@ -1,4 +1,5 @@
 import os
+import sys
 import datetime as dt
 from typing import List, Dict
 
@@ -8,11 +9,17 @@ import pandas as pd
 try:
     from google.oauth2 import service_account
     from google.analytics.data_v1beta import BetaAnalyticsDataClient
-    from google.analytics.data_v1beta.types import DateRange, Dimension, Metric, RunReportRequest, OrderBy
 except Exception:
     service_account = None
     BetaAnalyticsDataClient = None
-    DateRange = Dimension = Metric = RunReportRequest = OrderBy = None  # type: ignore
+
+# Ensure repository root is on sys.path to import top-level packages like 'plugins'
+_REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir))
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
+
+from plugins import google_clients
+from plugins.ga4_api import ReportSpec, in_list_filter, run_reports
 
 
 def _repo_root() -> str:
@@ -25,7 +32,17 @@ def _default_sa_path() -> str:
     return os.path.join(repo, ".secrets", "ga", "service_account.json")
 
 
-def _run_ga4_report(property_id: str, days: int, end_offset_days: int, row_limit: int, sa_path: str) -> List[Dict]:
+_METRICS = ["sessions", "totalUsers", "engagedSessions", "conversions"]
+
+
+def _run_ga4_report(
+    property_id: str,
+    days: int,
+    end_offset_days: int,
+    row_limit: int | None,
+    sa_path: str,
+    compare_previous: bool = False,
+) -> List[Dict]:
     if service_account is None or BetaAnalyticsDataClient is None:
         raise RuntimeError("Google Analytics client libraries not available. Install 'google-analytics-data' and 'google-auth'.")
     if not os.path.isabs(sa_path):
@@ -33,52 +50,56 @@ def _run_ga4_report(property_id: str, days: int, end_offset_days: int, row_limit
     if not os.path.exists(sa_path):
         raise FileNotFoundError("service_account.json not found at provided path")
 
-    creds = service_account.Credentials.from_service_account_file(
-        sa_path, scopes=["https://www.googleapis.com/auth/analytics.readonly"]
-    )
-    client = BetaAnalyticsDataClient(credentials=creds)
+    # Cached per key file for the process lifetime; token refreshed ahead of expiry
+    client = google_clients.ga4_client(sa_path)
 
     # End some days ago to avoid GA processing lag
     end_date = dt.date.today() - dt.timedelta(days=int(end_offset_days))
     start_date = end_date - dt.timedelta(days=int(days))
+    specs = [
+        ReportSpec(
+            dimensions=["pagePath"],
+            metrics=_METRICS,
+            start_date=start_date.isoformat(),
+            end_date=end_date.isoformat(),
+            order_by_metric="sessions",
+            max_rows=row_limit,
+        )
+    ]
+    prev_spec = None
+    if compare_previous:
+        prev_end = start_date - dt.timedelta(days=1)
+        prev_spec = ReportSpec(
+            dimensions=["pagePath"],
+            metrics=_METRICS,
+            start_date=(prev_end - dt.timedelta(days=int(days))).isoformat(),
+            end_date=prev_end.isoformat(),
+            order_by_metric="sessions",
+        )
+    if prev_spec is not None and row_limit is None:
+        # Both full windows in one batch_run_reports call; offset-paginated; cached for 10 minutes
+        tables = run_reports(client, property_id, specs + [prev_spec])
+    else:
+        tables = run_reports(client, property_id, specs)
+        if prev_spec is not None:
+            # Capped table: only fetch the previous period for the pages shown
+            pages = list(tables[0].get("pagePath") or [])
+            if pages:
+                prev_spec.extra = in_list_filter("pagePath", pages)
+                prev_spec.max_rows = len(pages)
+                tables += run_reports(client, property_id, [prev_spec])
+            else:
+                tables.append({})
 
-    req = RunReportRequest(
-        property=f"properties/{property_id}",
-        dimensions=[Dimension(name="pagePath")],
-        metrics=[
-            Metric(name="sessions"),
-            Metric(name="totalUsers"),
-            Metric(name="engagedSessions"),
-            Metric(name="conversions"),
-        ],
-        date_ranges=[DateRange(start_date=start_date.isoformat(), end_date=end_date.isoformat())],
-        limit=int(row_limit),
-        order_bys=[OrderBy(metric=OrderBy.MetricOrderBy(metric_name="sessions"), desc=True)],
-    )
-    resp = client.run_report(req)
-
-    rows: List[Dict] = []
-    for r in (resp.rows or []):
-        dim_vals = [d.value for d in r.dimension_values]
-        met_vals = [m.value for m in r.metric_values]
-        def _to_int(s: str) -> int:
-            try:
-                return int(float(s))
-            except Exception:
-                return 0
-        def _to_float(s: str) -> float:
-            try:
-                return float(s)
-            except Exception:
-                return 0.0
-        rows.append({
-            "pagePath": dim_vals[0] if dim_vals else None,
-            "sessions": _to_int(met_vals[0] if len(met_vals) > 0 else "0"),
-            "totalUsers": _to_int(met_vals[1] if len(met_vals) > 1 else "0"),
-            "engagedSessions": _to_int(met_vals[2] if len(met_vals) > 2 else "0"),
-            "conversions": _to_float(met_vals[3] if len(met_vals) > 3 else "0"),
-        })
-    return rows
+    df = pd.DataFrame(tables[0], columns=["pagePath"] + _METRICS)
+    if compare_previous:
+        prev = pd.DataFrame(tables[1], columns=["pagePath"] + _METRICS)
+        prev = prev.rename(columns={m: f"{m}_prev" for m in _METRICS})
+        df = df.merge(prev, on="pagePath", how="left")
+        for m in _METRICS:
+            df[f"{m}_prev"] = df[f"{m}_prev"].fillna(0)
+        df["sessions_delta"] = df["sessions"] - df["sessions_prev"]
+    return df.to_dict("records")
 
 
 def _download_bytes(data: List[Dict], fmt: str) -> bytes:
@@ -145,11 +166,22 @@ def main():
             value=_default_sa_path(),
             help="Absolute path to service_account.json for GA4. Keep this file secret.",
         )
+        all_rows = st.checkbox(
+            "Fetch all rows",
+            value=False,
+            help="Page through the full report (100k rows per request) instead of stopping at the row limit.",
+        )
         row_limit = st.slider(
             "Row limit",
             min_value=10, max_value=5000, value=50, step=10,
+            disabled=all_rows,
             help="Maximum number of top pages to return.",
         )
+        compare_prev = st.checkbox(
+            "Compare with previous period",
+            value=False,
+            help="Fetches the preceding window of the same length (only for the pages shown when rows are capped) and adds *_prev columns.",
+        )
 
     st.markdown("---")
     run = st.button(
@@ -163,7 +195,14 @@ def main():
     err: str | None = None
     if run:
         try:
-            results = _run_ga4_report(prop_id.strip(), int(days), int(end_offset), int(row_limit), sa_path.strip())
+            results = _run_ga4_report(
+                prop_id.strip(),
+                int(days),
+                int(end_offset),
+                None if all_rows else int(row_limit),
+                sa_path.strip(),
+                compare_previous=compare_prev,
+            )
         except Exception as e:
             msg = str(e)
             if "Permission" in msg or "403" in msg:
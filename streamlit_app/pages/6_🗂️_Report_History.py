@@ -0,0 +1,114 @@
+import os
+import sys
+
+import streamlit as st
+import pandas as pd
+
+# Make sure we can import the shared app modules when run as a page
+_APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+if _APP_DIR not in sys.path:
+    sys.path.insert(0, _APP_DIR)
+
+from report_index import get_index
+
+
+def main():
+    st.set_page_config(page_title="Report History", layout="wide")
+    st.title("🗂️ Report History")
+    st.caption("Query saved SERP analysis reports across every page of the site.")
+
+    with st.expander("What am I looking at? (Beginner-friendly)", expanded=False):
+        st.markdown(
+            """
+            Every "Save Analysis & Keywords to TinaCMS" adds a report to the page's SERP Analysis History.
+            This page keeps a local index of all those reports so you can ask questions across pages:
+
+            - Which pages have already targeted a keyword (and how hard it was then)?
+            - Which keywords are targeted by more than one page (possible cannibalisation)?
+            - How has average difficulty moved over time?
+
+            The index lives in `.cache/reports/index.sqlite3` and only re-reads pages that changed.
+            """
+        )
+
+    # Default path to TinaCMS site (same as in app.py)
+    ellie_root = st.text_input(
+        "Site root",
+        value=r"C:\\Users\\rhode\\source\\repos\\EllieEdwardsMarketingLeadgenSite",
+        help="Folder containing the TinaCMS content/ directory.",
+    )
+    if not os.path.isdir(os.path.join(ellie_root, "content")):
+        st.warning("No content/ folder found under the site root.")
+        return
+
+    index = get_index(ellie_root)
+    with st.spinner("Updating report index..."):
+        refreshed = index.refresh()
+    stats = index.stats()
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Pages scanned", stats.get("pages_scanned") or 0)
+    c2.metric("Pages with reports", stats.get("pages_with_reports") or 0)
+    c3.metric("Reports", stats.get("reports") or 0)
+    c4.metric("Distinct keywords", stats.get("keywords") or 0)
+    st.caption(f"Re-indexed {refreshed['reindexed']} changed page(s); removed {refreshed['removed']}.")
+
+    tab_kw, tab_shared, tab_trend, tab_all = st.tabs(
+        ["🔎 Keyword lookup", "🔁 Shared keywords", "📉 Difficulty trend", "📋 All reports"]
+    )
+
+    with tab_kw:
+        q = st.text_input("Keyword", placeholder="e.g. seo audit surrey")
+        contains = st.checkbox("Match partial keywords", value=False)
+        if q.strip():
+            rows = index.pages_for_keyword(q, contains=contains)
+            if rows:
+                st.write(f"{len(rows)} report entries on {len({r['url_path'] for r in rows})} page(s)")
+                st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+                hist = [r for r in index.keyword_history(q) if r.get("difficulty") is not None] if not contains else []
+                if hist:
+                    df = pd.DataFrame(hist)
+                    df["analysis_date"] = pd.to_datetime(df["analysis_date"], errors="coerce")
+                    st.line_chart(df.pivot_table(index="analysis_date", columns="url_path", values="difficulty"))
+            else:
+                st.info("No saved report mentions that keyword.")
+
+    with tab_shared:
+        min_pages = st.number_input("Minimum pages", min_value=2, max_value=20, value=2, step=1)
+        shared = index.shared_keywords(min_pages=int(min_pages))
+        if shared:
+            st.dataframe(pd.DataFrame(shared), use_container_width=True, hide_index=True)
+        else:
+            st.info("No keyword appears in reports for that many pages.")
+
+    with tab_trend:
+        c1, c2 = st.columns(2)
+        with c1:
+            period = st.selectbox("Group by", ["month", "day", "year"])
+        with c2:
+            pages = sorted({r["url_path"] for r in index.reports()})
+            page = st.selectbox("Page", ["All pages"] + pages)
+        trend = index.difficulty_trend(None if page == "All pages" else page, period=period)
+        if trend:
+            df = pd.DataFrame(trend).set_index("period")
+            st.line_chart(df[["avg_difficulty"]])
+            st.dataframe(df, use_container_width=True)
+        else:
+            st.info("No reports yet.")
+
+    with tab_all:
+        rows = index.reports()
+        if rows:
+            df = pd.DataFrame(rows)
+            st.dataframe(df, use_container_width=True, hide_index=True)
+            st.download_button(
+                "Download CSV",
+                data=df.to_csv(index=False).encode("utf-8"),
+                file_name="serp_report_history.csv",
+                mime="text/csv",
+            )
+        else:
+            st.info("No reports yet.")
+
+
+if __name__ == "__main__":
+    main()
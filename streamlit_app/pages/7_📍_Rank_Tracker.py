@@ -0,0 +1,153 @@
+import os
+import sys
+
+import streamlit as st
+import pandas as pd
+
+# Make sure we can import the shared app modules when run as a page
+_APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+if _APP_DIR not in sys.path:
+    sys.path.insert(0, _APP_DIR)
+# rank_tracker uses plugins/ from the repository root
+_REPO_ROOT = os.path.abspath(os.path.join(_APP_DIR, os.pardir))
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
+
+import rank_tracker
+from rank_tracker import get_tracker, tracking_pairs
+
+
+@st.fragment(run_every=2.0)
+def _run_progress():
+    status = rank_tracker.background_status()
+    p = status["progress"] or {}
+    if status["running"]:
+        total = max(1, p.get("keywords") or 1)
+        st.progress(min(1.0, (p.get("done") or 0) / total),
+                    text=f"Checked {p.get('done') or 0}/{p.get('keywords') or '?'} keywords "
+                         f"({p.get('fetched') or 0} fetched, {p.get('cached') or 0} cached, {p.get('errors') or 0} errors)")
+    else:
+        st.rerun()
+
+
+def main():
+    st.set_page_config(page_title="Rank Tracker", layout="wide")
+    st.title("📍 Rank Tracker")
+    st.caption("Daily positions of each page for the keywords in its frontmatter.")
+
+    with st.expander("What am I looking at? (Beginner-friendly)", expanded=False):
+        st.markdown(
+            """
+            Each page's target keywords (`seo.keywords` plus `seo.winningKeywords`) are searched once per day.
+            We record where the page itself ranks, and the best-ranked URL from the site (useful when a
+            different page is ranking for a keyword you meant for this one).
+
+            - A keyword shared by several pages is only searched once.
+            - SERPs are cached for 20 hours, so re-running the same day is almost free.
+            - History lives in `.cache/ranks/ranks.sqlite3`; `run_rank_tracker.py` runs the same batch from a scheduler.
+            """
+        )
+
+    # Default path to TinaCMS site (same as in app.py)
+    ellie_root = st.text_input(
+        "Site root",
+        value=r"C:\\Users\\rhode\\source\\repos\\EllieEdwardsMarketingLeadgenSite",
+        help="Folder containing the TinaCMS content/ directory.",
+    )
+    if not os.path.isdir(os.path.join(ellie_root, "content")):
+        st.warning("No content/ folder found under the site root.")
+        return
+
+    tracker = get_tracker(ellie_root)
+    pairs = tracking_pairs(ellie_root)
+    st.caption(
+        f"{len(pairs)} (page, keyword) pairs across {len({p for p, _ in pairs})} pages, "
+        f"{len({k.lower() for _, k in pairs})} distinct keywords"
+    )
+
+    c1, c2, c3 = st.columns(3)
+    with c1:
+        provider = st.selectbox("Provider", ["duckduckgo", "serper"])
+    with c2:
+        workers = st.number_input("Concurrent lookups", min_value=1, max_value=16, value=4, step=1)
+    with c3:
+        max_depth = rank_tracker.MAX_DEPTH.get(provider, rank_tracker.DEFAULT_DEPTH)
+        depth = st.number_input(
+            "Results per keyword",
+            min_value=1,
+            max_value=max_depth,
+            value=min(rank_tracker.DEFAULT_DEPTH, max_depth),
+            key=f"rank_depth_{provider}",
+        )
+    if provider == "duckduckgo":
+        st.caption("DuckDuckGo returns about 10 results per query, so pages below position 10 show as not ranked.")
+    api_key = ""
+    if provider == "serper":
+        api_key = st.text_input("Serper API key", value=os.environ.get("SERPER_API_KEY", ""), type="password")
+
+    status = rank_tracker.background_status()
+    if st.button("Check ranks now", type="primary", disabled=status["running"]):
+        rank_tracker.start_background_run(
+            tracker, provider=provider, api_key=api_key.strip() or None, workers=int(workers), depth=int(depth)
+        )
+        st.rerun()
+    if status["running"]:
+        _run_progress()
+    elif status["error"]:
+        st.error(f"Last run failed: {status['error']}")
+    elif status["progress"]:
+        p = status["progress"]
+        st.success(f"Last run: {p['done']} keywords ({p['fetched']} fetched, {p['cached']} from cache, {p['errors']} errors)")
+        for err in p.get("error_samples") or []:
+            st.caption(err)
+
+    tab_pages, tab_latest, tab_history, tab_runs = st.tabs(["📄 Pages", "🆕 Latest ranks", "📈 Page history", "🕑 Runs"])
+
+    with tab_pages:
+        summary = tracker.page_summary()
+        if summary:
+            st.dataframe(pd.DataFrame(summary), use_container_width=True, hide_index=True)
+        else:
+            st.info("No ranks recorded yet.")
+
+    with tab_latest:
+        latest = tracker.latest()
+        if latest:
+            df = pd.DataFrame(latest)
+            only_missing = st.checkbox("Only keywords where the page is not ranking", value=False)
+            if only_missing:
+                df = df[df["rank"].isna()]
+            st.dataframe(df, use_container_width=True, hide_index=True)
+            st.download_button(
+                "Download CSV",
+                data=df.to_csv(index=False).encode("utf-8"),
+                file_name="latest_ranks.csv",
+                mime="text/csv",
+            )
+        else:
+            st.info("No ranks recorded yet.")
+
+    with tab_history:
+        pages = sorted({p for p, _ in pairs})
+        page = st.selectbox("Page", pages) if pages else None
+        if page:
+            hist = tracker.history(page)
+            if hist:
+                df = pd.DataFrame(hist)
+                df["day"] = pd.to_datetime(df["day"], errors="coerce")
+                st.line_chart(df.pivot_table(index="day", columns="keyword", values="rank"))
+                st.caption("Lower is better; gaps mean the page was not in the results that day.")
+                st.dataframe(df, use_container_width=True, hide_index=True)
+            else:
+                st.info("No ranks recorded for this page yet.")
+
+    with tab_runs:
+        runs = tracker.runs()
+        if runs:
+            st.dataframe(pd.DataFrame(runs), use_container_width=True, hide_index=True)
+        else:
+            st.info("No runs yet.")
+
+
+if __name__ == "__main__":
+    main()
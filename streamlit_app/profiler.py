@@ -0,0 +1,347 @@
+"""Opt-in per-rerun profiler for the Streamlit app.
+
+A trace covers one script run. The run is split into top-level sections with
+`mark("keyword_load")` (each mark closes the previous section), and code can
+open nested spans with ``with span("name", kind="file"):``. While a trace is
+active on the script thread, outbound `requests` calls are recorded as
+``http`` spans automatically. `log_action` events are recorded as instant
+events.
+
+Profiling is off unless ``SEOLAB_PROFILE=1`` is set, the URL has
+``?profile=1``, or the sidebar toggle is on. When it is off, `span()` returns
+a shared no-op context and the `requests` hook is a single attribute check.
+Finished traces are appended to ``.cache/profile/trace.jsonl`` (one JSON
+object per span, plus a ``run`` summary line) and shown in a sidebar expander
+as a waterfall and a per-section summary.
+
+This module does not import streamlit at import time, so the I/O helpers can
+use `span()` outside the app too.
+"""
+from __future__ import annotations
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+ENV_FLAG = "SEOLAB_PROFILE"
+TRACE_PATH = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", ".cache", "profile", "trace.jsonl")
+)
+TRACE_MAX_BYTES = 10 * 1024 * 1024  # rotated to trace.jsonl.1 beyond this
+_STATE_KEY = "__profiler_on__"
+_LAST_KEY = "__profiler_last_trace__"
+
+_tls = threading.local()
+_write_lock = threading.Lock()
+_hook_lock = threading.Lock()
+_hooked = False
+_NULL = nullcontext()
+
+
+class Trace:
+    """Spans and events recorded during one script run."""
+
+    def __init__(self, page: str):
+        self.run_id = uuid.uuid4().hex[:12]
+        self.page = page
+        self.started_at = datetime.now().isoformat(timespec="seconds")
+        self.t0 = time.perf_counter()
+        self.spans: List[Dict[str, Any]] = []
+        self.events: List[Dict[str, Any]] = []
+        self.section: Optional[Dict[str, Any]] = None
+        self.stack: List[Dict[str, Any]] = []
+        self.total_ms: Optional[float] = None
+        self.aborted = False
+
+    def now_ms(self) -> float:
+        return (time.perf_counter() - self.t0) * 1000.0
+
+    def open(self, name: str, kind: str, attrs: Dict[str, Any]) -> Dict[str, Any]:
+        rec = {
+            "name": name,
+            "kind": kind,
+            "section": self.section["name"] if self.section else "",
+            "depth": len(self.stack) + (1 if self.section else 0),
+            "start_ms": self.now_ms(),
+            "dur_ms": None,
+            **attrs,
+        }
+        self.spans.append(rec)
+        return rec
+
+    def close(self, rec: Dict[str, Any]) -> None:
+        rec["dur_ms"] = round(self.now_ms() - rec["start_ms"], 3)
+        rec["start_ms"] = round(rec["start_ms"], 3)
+
+    def close_section(self) -> None:
+        if self.section is not None:
+            self.close(self.section)
+            self.section = None
+
+
+def current() -> Optional[Trace]:
+    """The trace being recorded on this thread, if any."""
+    return getattr(_tls, "trace", None)
+
+
+def _session_state():
+    try:
+        import streamlit as st
+        return st.session_state
+    except Exception:
+        return None
+
+
+def enabled() -> bool:
+    if os.environ.get(ENV_FLAG, "").strip().lower() in ("1", "true", "yes", "on"):
+        return True
+    try:
+        import streamlit as st
+        if st.query_params.get("profile") in ("1", "true", "on"):
+            return True
+        return bool(st.session_state.get(_STATE_KEY))
+    except Exception:
+        return False
+
+
+# ---- recording ----
+def start_run(page: str = "app") -> Optional[Trace]:
+    """Begin a trace for this script run when profiling is on (closes a run left open by st.rerun/st.stop)."""
+    prev = current()
+    if prev is not None:
+        prev.aborted = True
+        finish()
+    if not enabled():
+        return None
+    _install_http_hook()
+    trace = Trace(page)
+    _tls.trace = trace
+    mark("setup")
+    return trace
+
+
+def mark(name: str) -> None:
+    """Close the current top-level section and open `name`."""
+    trace = current()
+    if trace is None:
+        return
+    trace.close_section()
+    trace.stack = []
+    trace.section = trace.open(name, "section", {})
+    trace.section["depth"] = 0
+    trace.section["section"] = name
+
+
+@contextmanager
+def _span(trace: Trace, name: str, kind: str, attrs: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    rec = trace.open(name, kind, attrs)
+    trace.stack.append(rec)
+    try:
+        yield rec
+    except BaseException as exc:
+        rec["error"] = type(exc).__name__
+        raise
+    finally:
+        if trace.stack and trace.stack[-1] is rec:
+            trace.stack.pop()
+        trace.close(rec)
+
+
+def span(name: str, kind: str = "code", **attrs: Any):
+    """Context manager timing a nested span; yields the span dict (or None when not profiling)."""
+    trace = current()
+    if trace is None:
+        return _NULL
+    return _span(trace, name, kind, attrs)
+
+
+def event(name: str, details: str = "") -> None:
+    trace = current()
+    if trace is None:
+        return
+    trace.events.append({
+        "name": name,
+        "details": str(details)[:300],
+        "section": trace.section["name"] if trace.section else "",
+        "at_ms": round(trace.now_ms(), 3),
+    })
+
+
+def finish() -> Optional[Trace]:
+    """End the trace for this run, append it to the JSONL file and keep it for the panel."""
+    trace = current()
+    if trace is None:
+        return None
+    _tls.trace = None
+    trace.close_section()
+    for rec in trace.spans:
+        if rec["dur_ms"] is None:  # left open by an exception unwinding past it
+            trace.close(rec)
+    trace.total_ms = round(trace.now_ms(), 3)
+    _write_trace(trace)
+    state = _session_state()
+    if state is not None:
+        try:
+            state[_LAST_KEY] = trace
+        except Exception:
+            pass
+    return trace
+
+
+def _write_trace(trace: Trace) -> None:
+    head = {"run_id": trace.run_id, "page": trace.page, "started_at": trace.started_at}
+    lines = [json.dumps({**head, **rec}, default=str) for rec in trace.spans]
+    lines += [json.dumps({**head, "kind": "event", **ev}, default=str) for ev in trace.events]
+    lines.append(json.dumps({
+        **head, "kind": "run", "name": trace.page, "dur_ms": trace.total_ms,
+        "spans": len(trace.spans), "aborted": trace.aborted,
+    }))
+    try:
+        with _write_lock:
+            os.makedirs(os.path.dirname(TRACE_PATH), exist_ok=True)
+            try:
+                if os.path.getsize(TRACE_PATH) > TRACE_MAX_BYTES:
+                    os.replace(TRACE_PATH, TRACE_PATH + ".1")
+            except OSError:
+                pass
+            with open(TRACE_PATH, "a", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+    except Exception:
+        pass  # profiling must never break the app
+
+
+# ---- requests hook ----
+def _install_http_hook() -> None:
+    """Wrap requests.Session.request once; it records only when this thread has a trace."""
+    global _hooked
+    with _hook_lock:
+        if _hooked:
+            return
+        try:
+            import requests
+        except ImportError:
+            return
+        original = requests.Session.request
+
+        def request(self, method, url, *args, **kwargs):
+            trace = current()
+            if trace is None:
+                return original(self, method, url, *args, **kwargs)
+            host_path = str(url).split("?", 1)[0]
+            with _span(trace, f"{str(method).upper()} {host_path}", "http", {"url": str(url)[:300]}) as rec:
+                resp = original(self, method, url, *args, **kwargs)
+                rec["status"] = getattr(resp, "status_code", None)
+                try:
+                    rec["bytes"] = len(resp.content)
+                except Exception:
+                    pass
+                return resp
+
+        requests.Session.request = request
+        _hooked = True
+
+
+# ---- panel ----
+def summarize(trace: Trace) -> List[Dict[str, Any]]:
+    """Per-section totals: wall time and time inside http / file / cache spans (outermost only)."""
+    rows: Dict[str, Dict[str, Any]] = {}
+    for rec in trace.spans:
+        if rec["kind"] == "section":
+            rows.setdefault(rec["name"], {"section": rec["name"], "ms": 0.0, "http_ms": 0.0, "file_ms": 0.0,
+                                          "cache_ms": 0.0, "http_calls": 0, "file_ops": 0})
+            rows[rec["name"]]["ms"] += rec["dur_ms"] or 0.0
+    for rec in trace.spans:
+        row = rows.get(rec.get("section"))
+        if row is None or rec["kind"] == "section" or rec["depth"] != 1:
+            continue
+        if rec["kind"] in ("http", "file", "cache"):
+            row[f"{rec['kind']}_ms"] += rec["dur_ms"] or 0.0
+        if rec["kind"] == "http":
+            row["http_calls"] += 1
+        elif rec["kind"] == "file":
+            row["file_ops"] += 1
+    out = []
+    for row in rows.values():
+        row["other_ms"] = max(0.0, row["ms"] - row["http_ms"] - row["file_ms"] - row["cache_ms"])
+        out.append({k: round(v, 1) if isinstance(v, float) else v for k, v in row.items()})
+    return out
+
+
+def _waterfall(trace: Trace):
+    try:
+        import altair as alt
+        import pandas as pd
+    except ImportError:
+        return None
+    rows = []
+    for i, rec in enumerate(trace.spans):
+        rows.append({
+            "order": i,
+            "label": ("  " * rec["depth"]) + rec["name"][:60],
+            "kind": rec["kind"],
+            "section": rec["section"],
+            "start_ms": rec["start_ms"],
+            "end_ms": rec["start_ms"] + (rec["dur_ms"] or 0.0),
+            "dur_ms": rec["dur_ms"],
+        })
+    if not rows:
+        return None
+    df = pd.DataFrame(rows)
+    return (
+        alt.Chart(df)
+        .mark_bar()
+        .encode(
+            x=alt.X("start_ms:Q", title="ms since run start"),
+            x2="end_ms:Q",
+            y=alt.Y("label:N", sort=alt.SortField("order"), title=None),
+            color=alt.Color("kind:N"),
+            tooltip=["section", "label", "kind", "start_ms", "dur_ms"],
+        )
+        .properties(height=max(120, 18 * len(rows)))
+    )
+
+
+def render_panel() -> None:
+    """Sidebar toggle plus the last finished trace (call after `finish()`)."""
+    import streamlit as st
+
+    def _toggle():
+        st.session_state[_STATE_KEY] = st.session_state.get("profiler_toggle", False)
+
+    with st.sidebar.expander("⏱️ Rerun profile", expanded=False):
+        st.toggle(
+            "Profile each rerun",
+            value=enabled(),
+            key="profiler_toggle",
+            on_change=_toggle,
+            help=f"Also enabled by {ENV_FLAG}=1 or ?profile=1. Traces are appended to {TRACE_PATH}",
+        )
+        trace: Optional[Trace] = st.session_state.get(_LAST_KEY)
+        if trace is None:
+            st.caption("No profiled run yet; turn profiling on and interact with the page.")
+            return
+        http = [r for r in trace.spans if r["kind"] == "http"]
+        files = [r for r in trace.spans if r["kind"] == "file"]
+        st.caption(
+            f"Run {trace.run_id} at {trace.started_at}: {trace.total_ms:.0f} ms, "
+            f"{len(http)} HTTP call(s), {len(files)} file op(s)"
+        )
+        st.dataframe(summarize(trace), use_container_width=True, hide_index=True)
+        chart = _waterfall(trace)
+        if chart is not None:
+            st.altair_chart(chart, use_container_width=True)
+        slow = sorted((r for r in trace.spans if r["kind"] != "section"), key=lambda r: -(r["dur_ms"] or 0))[:15]
+        if slow:
+            st.markdown("**Slowest spans**")
+            st.dataframe(
+                [{k: r.get(k) for k in ("section", "kind", "name", "dur_ms", "status", "bytes")} for r in slow],
+                use_container_width=True,
+                hide_index=True,
+            )
+        if trace.events:
+            with st.popover("Logged actions"):
+                st.dataframe(trace.events, use_container_width=True, hide_index=True)
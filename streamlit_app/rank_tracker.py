@@ -0,0 +1,340 @@
+"""Batch rank tracking for every (page, target keyword) pair on the site.
+
+`tracking_pairs()` reads the page catalog: a page's keywords are
+``seo.keywords`` (or the top-level ``keywords``) plus ``seo.winningKeywords``.
+`RankTracker.run()` looks up each distinct keyword once through the SERP
+cache, on a thread pool. For every page targeting that keyword it records
+two things in a local SQLite time series, one row per (day, page, keyword,
+provider):
+- the rank of the page's own URL;
+- the best-ranked URL on the site.
+Re-running on the same day only refreshes keywords whose cached SERP has
+expired.
+
+Provider requests (cache misses) go through one `plugins.base.RateLimiter`
+per provider, shared by every run in the process, so the worker pool can't
+burst DuckDuckGo into rate limiting (which fetch_serp reports as empty results).
+
+`start_background_run()` runs a batch on a daemon thread for the Streamlit
+page; `run_rank_tracker.py` is the CLI for a daily schedule. Both put the
+repository root on sys.path for `plugins`.
+"""
+from __future__ import annotations
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import frontmatter_io
+from page_catalog import get_catalog
+from plugins.base import RateLimiter
+from report_index import normalize_keyword
+from serp import SerpResult
+from serp_cache import DEFAULT_MAX_AGE, get_serp_cache
+
+DEFAULT_DB = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", ".cache", "ranks", "ranks.sqlite3")
+)
+SITE_DOMAIN = "ellieedwardsmarketing.com"
+DEFAULT_DEPTH = 20  # results requested per keyword; pages below this count as "not ranked"
+# Most results a provider returns per query (DuckDuckGo HTML serves one page, serper caps num at 20)
+MAX_DEPTH = {"duckduckgo": 10, "serper": 20}
+# (requests per second, burst) per provider for uncached lookups
+PROVIDER_RATES = {"duckduckgo": (1.0, 2), "serper": (5.0, 5)}
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def provider_limiter(provider: str) -> RateLimiter:
+    """Process-wide limiter for one SERP provider."""
+    with _limiters_lock:
+        lim = _limiters.get(provider)
+        if lim is None:
+            rate, burst = PROVIDER_RATES.get(provider, (1.0, 1))
+            lim = _limiters[provider] = RateLimiter(rate, burst=burst)
+        return lim
+
+
+def normalize_url(url: str) -> str:
+    """host (no www) + path without trailing slash, lower-cased; query and fragment dropped."""
+    try:
+        p = urlparse(url if "//" in url else f"//{url}")
+    except Exception:
+        return ""
+    host = (p.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    return f"{host}{p.path.rstrip('/').lower()}"
+
+
+def page_url(url_path: str, domain: str = SITE_DOMAIN) -> str:
+    return normalize_url(f"https://{domain}{url_path}")
+
+
+def find_rank(results: List[SerpResult], url_path: str, domain: str = SITE_DOMAIN) -> Dict[str, Any]:
+    """1-based rank of the page and of the best site URL in `results` (None when absent)."""
+    target = page_url(url_path, domain)
+    rank = site_rank = None
+    site_url = None
+    for i, res in enumerate(results, start=1):
+        link = normalize_url(res.link)
+        host = link.split("/", 1)[0]
+        if not (host == domain or host.endswith("." + domain)):
+            continue
+        if site_rank is None:
+            site_rank, site_url = i, res.link
+        if link == target:
+            rank = i
+            break
+    return {"rank": rank, "site_rank": site_rank, "site_url": site_url}
+
+
+def effective_depth(provider: str, depth: int) -> int:
+    """`depth` clamped to what `provider` can return."""
+    return max(1, min(int(depth), MAX_DEPTH.get(provider, int(depth))))
+
+
+def tracking_pairs(site_root: str) -> List[Tuple[str, str]]:
+    """(url_path, keyword) for every target keyword in the site's frontmatter, deduplicated per page."""
+    pairs: List[Tuple[str, str]] = []
+    for entry in get_catalog(site_root).entries():
+        if not (entry.keyword_count or entry.winning_count):
+            continue
+        try:
+            meta = frontmatter_io.load_metadata_only(entry.file_path)
+        except Exception:
+            continue
+        seo = meta.get("seo") if isinstance(meta.get("seo"), dict) else {}
+        keywords = seo.get("keywords") or meta.get("keywords") or []
+        keywords = list(keywords) + list(seo.get("winningKeywords") or [])
+        seen = set()
+        for kw in keywords:
+            if not isinstance(kw, str):
+                continue
+            norm = normalize_keyword(kw)
+            if norm and norm not in seen:
+                seen.add(norm)
+                pairs.append((entry.url_path, kw.strip()))
+    return pairs
+
+
+class RankTracker:
+    """SQLite time series of page ranks. Safe to share across threads."""
+
+    def __init__(self, site_root: str, path: str = DEFAULT_DB, domain: str = SITE_DOMAIN):
+        self.site_root = site_root
+        self.domain = domain
+        self.path = os.path.abspath(path)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS ranks (
+                day TEXT NOT NULL,
+                url_path TEXT NOT NULL,
+                keyword_norm TEXT NOT NULL,
+                keyword TEXT NOT NULL,
+                provider TEXT NOT NULL,
+                rank INTEGER,
+                site_rank INTEGER,
+                site_url TEXT,
+                results INTEGER NOT NULL,
+                checked_at REAL NOT NULL,
+                PRIMARY KEY (day, url_path, keyword_norm, provider)
+            );
+            CREATE INDEX IF NOT EXISTS idx_ranks_page ON ranks(url_path, keyword_norm, day);
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id TEXT PRIMARY KEY,
+                started_at REAL NOT NULL,
+                finished_at REAL,
+                provider TEXT NOT NULL,
+                pairs INTEGER NOT NULL DEFAULT 0,
+                keywords INTEGER NOT NULL DEFAULT 0,
+                fetched INTEGER NOT NULL DEFAULT 0,
+                cached INTEGER NOT NULL DEFAULT 0,
+                errors INTEGER NOT NULL DEFAULT 0
+            );
+            """
+        )
+        self._conn.commit()
+
+    # ---- batch ----
+    def run(
+        self,
+        provider: str = "duckduckgo",
+        api_key: Optional[str] = None,
+        workers: int = 4,
+        depth: int = DEFAULT_DEPTH,
+        max_age: float = DEFAULT_MAX_AGE,
+        limit: Optional[int] = None,
+        progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> Dict[str, Any]:
+        """Check every tracked pair; returns the run summary.
+
+        `depth` is clamped per provider (`MAX_DEPTH`). A keyword whose lookup
+        returns no results counts as an error and writes no rows, so an earlier
+        good check from the same day is kept.
+        """
+        if provider == "serper" and not api_key:
+            provider = "duckduckgo"
+        depth = effective_depth(provider, depth)
+        pairs = tracking_pairs(self.site_root)
+        by_keyword: Dict[str, List[Tuple[str, str]]] = {}
+        for url_path, kw in pairs:
+            by_keyword.setdefault(normalize_keyword(kw), []).append((url_path, kw))
+        keywords = list(by_keyword)[:limit] if limit else list(by_keyword)
+        summary: Dict[str, Any] = {
+            "run_id": uuid.uuid4().hex[:12], "provider": provider, "depth": depth, "pairs": sum(len(by_keyword[k]) for k in keywords),
+            "keywords": len(keywords), "done": 0, "fetched": 0, "cached": 0, "errors": 0, "error_samples": [],
+        }
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO runs (run_id, started_at, provider, pairs, keywords) VALUES (?,?,?,?,?)",
+                (summary["run_id"], time.time(), provider, summary["pairs"], summary["keywords"]),
+            )
+        cache = get_serp_cache()
+        day = date.today().isoformat()
+        limiter = provider_limiter(provider)
+
+        def lookup(norm: str):
+            query = by_keyword[norm][0][1]
+            return cache.fetch(
+                query, provider=provider, api_key=api_key, num=depth, max_age=max_age, throttle=limiter.acquire
+            )
+
+        with ThreadPoolExecutor(max_workers=max(1, int(workers)), thread_name_prefix="rank-tracker") as pool:
+            futures = {pool.submit(lookup, norm): norm for norm in keywords}
+            for fut in as_completed(futures):
+                norm = futures[fut]
+                summary["done"] += 1
+                try:
+                    results, from_cache = fut.result()
+                except Exception as e:
+                    summary["errors"] += 1
+                    if len(summary["error_samples"]) < 5:
+                        summary["error_samples"].append(f"{norm}: {e}")
+                    results, from_cache = None, False
+                if results is not None and not results:
+                    # fetch_serp swallows provider errors and returns []
+                    summary["errors"] += 1
+                    if len(summary["error_samples"]) < 5:
+                        summary["error_samples"].append(f"{norm}: no results from {provider}")
+                    results = None
+                if results is not None:
+                    summary["cached" if from_cache else "fetched"] += 1
+                    now = time.time()
+                    rows = []
+                    for url_path, kw in by_keyword[norm]:
+                        found = find_rank(results, url_path, self.domain)
+                        rows.append((day, url_path, norm, kw, provider, found["rank"], found["site_rank"],
+                                     found["site_url"], len(results), now))
+                    with self._lock, self._conn:
+                        self._conn.executemany("INSERT OR REPLACE INTO ranks VALUES (?,?,?,?,?,?,?,?,?,?)", rows)
+                if progress is not None:
+                    progress(dict(summary))
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE runs SET finished_at = ?, fetched = ?, cached = ?, errors = ? WHERE run_id = ?",
+                (time.time(), summary["fetched"], summary["cached"], summary["errors"], summary["run_id"]),
+            )
+        return summary
+
+    # ---- queries ----
+    def _rows(self, sql: str, params: tuple = ()) -> List[Dict[str, Any]]:
+        with self._lock:
+            cur = self._conn.execute(sql, params)
+            cols = [c[0] for c in cur.description]
+            return [dict(zip(cols, r)) for r in cur.fetchall()]
+
+    def history(self, url_path: str, keyword: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Daily ranks for a page (optionally one keyword), oldest first."""
+        sql = "SELECT day, keyword, provider, rank, site_rank, site_url FROM ranks WHERE url_path = ?"
+        params: tuple = (url_path,)
+        if keyword:
+            sql += " AND keyword_norm = ?"
+            params += (normalize_keyword(keyword),)
+        return self._rows(sql + " ORDER BY day, keyword_norm", params)
+
+    def latest(self, url_path: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Most recent rank per (page, keyword, provider) with the previous check's rank for comparison."""
+        where = "WHERE url_path = ?" if url_path else ""
+        params: tuple = (url_path,) if url_path else ()
+        rows = self._rows(
+            f"""
+            SELECT url_path, keyword, provider, day, rank, site_rank, site_url, prev_rank FROM (
+                SELECT url_path, keyword, provider, day, rank, site_rank, site_url,
+                       LAG(rank) OVER w AS prev_rank,
+                       ROW_NUMBER() OVER (PARTITION BY url_path, keyword_norm, provider ORDER BY day DESC) AS rn
+                FROM ranks {where}
+                WINDOW w AS (PARTITION BY url_path, keyword_norm, provider ORDER BY day)
+            ) WHERE rn = 1
+            ORDER BY url_path, keyword
+            """,
+            params,
+        )
+        for r in rows:
+            r["change"] = (r["prev_rank"] - r["rank"]) if r["rank"] and r["prev_rank"] else None
+        return rows
+
+    def page_summary(self) -> List[Dict[str, Any]]:
+        """Per page on the latest day checked: keywords tracked, ranked, and average rank."""
+        return self._rows(
+            """
+            SELECT url_path, COUNT(*) AS keywords, COUNT(rank) AS ranked,
+                   SUM(CASE WHEN rank <= 10 THEN 1 ELSE 0 END) AS top10, ROUND(AVG(rank), 1) AS avg_rank
+            FROM ranks WHERE day = (SELECT MAX(day) FROM ranks)
+            GROUP BY url_path ORDER BY ranked DESC, url_path
+            """
+        )
+
+    def runs(self, limit: int = 10) -> List[Dict[str, Any]]:
+        return self._rows("SELECT * FROM runs ORDER BY started_at DESC LIMIT ?", (int(limit),))
+
+
+_trackers: Dict[Tuple[str, str], RankTracker] = {}
+_trackers_lock = threading.Lock()
+_background: Dict[str, Any] = {"thread": None, "progress": None, "error": None}
+
+
+def get_tracker(site_root: str, path: str = DEFAULT_DB) -> RankTracker:
+    """Process-wide tracker per (site, db path)."""
+    key = (os.path.abspath(site_root), os.path.abspath(path))
+    with _trackers_lock:
+        tracker = _trackers.get(key)
+        if tracker is None:
+            tracker = _trackers[key] = RankTracker(site_root, path)
+        return tracker
+
+
+def start_background_run(tracker: RankTracker, **kwargs: Any) -> bool:
+    """Run `tracker.run(**kwargs)` on a daemon thread; False if a run is already going."""
+    with _trackers_lock:
+        t = _background["thread"]
+        if t is not None and t.is_alive():
+            return False
+
+        def _target():
+            try:
+                _background["progress"] = tracker.run(progress=lambda p: _background.update(progress=p), **kwargs)
+            except Exception as e:
+                _background["error"] = str(e)
+
+        _background.update(progress=None, error=None)
+        t = threading.Thread(target=_target, name="rank-tracker-run", daemon=True)
+        _background["thread"] = t
+        t.start()
+        return True
+
+
+def background_status() -> Dict[str, Any]:
+    t = _background["thread"]
+    return {"running": bool(t is not None and t.is_alive()), "progress": _background["progress"], "error": _background["error"]}
@@ -0,0 +1,265 @@
+"""Cross-page SQLite index of saved SERP analysis reports.
+
+One row per report (page, date, counts, average difficulty) and one per
+(report, keyword) with its bucket and, when the sidecar report carries it,
+its difficulty. `refresh()` walks the site catalog and re-indexes only page
+files whose mtime/size changed since the last run, so questions like "which
+pages target keyword X" or "how has difficulty moved" are a single query.
+"""
+from __future__ import annotations
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import frontmatter_io
+import report_store
+from page_catalog import get_catalog
+
+DEFAULT_DB = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", ".cache", "reports", "index.sqlite3")
+)
+BUCKETS = ("easy", "moderate", "hard")
+
+
+def normalize_keyword(keyword: str) -> str:
+    return " ".join(str(keyword or "").lower().split())
+
+
+class ReportIndex:
+    """SQLite index of serpAnalysisHistory across a site. Safe to share across threads."""
+
+    def __init__(self, site_root: str, path: str = DEFAULT_DB):
+        self.site_root = site_root
+        self.path = os.path.abspath(path)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                url_path TEXT NOT NULL,
+                label TEXT NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                indexed_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS reports (
+                path TEXT NOT NULL,
+                report_id TEXT NOT NULL,
+                url_path TEXT NOT NULL,
+                analysis_date TEXT NOT NULL,
+                report_name TEXT,
+                avg_difficulty REAL,
+                easy_count INTEGER,
+                moderate_count INTEGER,
+                hard_count INTEGER,
+                report_file TEXT,
+                PRIMARY KEY (path, report_id)
+            );
+            CREATE INDEX IF NOT EXISTS idx_reports_date ON reports(analysis_date);
+            CREATE TABLE IF NOT EXISTS report_keywords (
+                path TEXT NOT NULL,
+                report_id TEXT NOT NULL,
+                keyword TEXT NOT NULL,
+                keyword_norm TEXT NOT NULL,
+                bucket TEXT,
+                difficulty REAL,
+                top_opportunity INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (path, report_id, keyword_norm)
+            );
+            CREATE INDEX IF NOT EXISTS idx_rk_keyword ON report_keywords(keyword_norm);
+            """
+        )
+        self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # ---- indexing ----
+    def _report_rows(self, path: str, url_path: str, entry: Dict[str, Any]) -> Tuple[tuple, List[tuple]]:
+        rid = str(entry.get("reportId") or "")
+        difficulty: Dict[str, Any] = {}
+        if entry.get("reportFile"):
+            full = report_store.read_report_file(self.site_root, entry["reportFile"]) or {}
+        else:
+            full = entry
+        for item in full.get("keywordDifficulty") or []:
+            if isinstance(item, dict) and item.get("keyword"):
+                difficulty[normalize_keyword(item["keyword"])] = item.get("difficulty")
+
+        keywords: Dict[str, list] = {}
+        for bucket in BUCKETS:
+            for kw in entry.get(f"{bucket}Keywords") or []:
+                norm = normalize_keyword(kw)
+                if norm and norm not in keywords:
+                    keywords[norm] = [str(kw), bucket, difficulty.get(norm), 0]
+        for norm, d in difficulty.items():
+            keywords.setdefault(norm, [norm, None, d, 0])
+        for kw in entry.get("topOpportunities") or []:
+            norm = normalize_keyword(kw)
+            if norm:
+                keywords.setdefault(norm, [str(kw), None, difficulty.get(norm), 0])[3] = 1
+
+        def _num(v):
+            try:
+                return float(v)
+            except Exception:
+                return None
+
+        report = (
+            path, rid, url_path, str(entry.get("analysisDate") or ""), entry.get("reportName"),
+            _num(entry.get("avgDifficulty")), entry.get("easyCount"), entry.get("moderateCount"),
+            entry.get("hardCount"), entry.get("reportFile"),
+        )
+        kw_rows = [(path, rid, kw, norm, bucket, _num(d), top) for norm, (kw, bucket, d, top) in keywords.items()]
+        return report, kw_rows
+
+    def _index_file(self, path: str, url_path: str, label: str, mtime_ns: int, size: int) -> int:
+        try:
+            meta = frontmatter_io.load_metadata_only(path)
+        except Exception:
+            meta = {}
+        seo = meta.get("seo") if isinstance(meta.get("seo"), dict) else {}
+        history = seo.get("serpAnalysisHistory") or []
+        reports, kw_rows = [], []
+        for entry in history if isinstance(history, list) else []:
+            if isinstance(entry, dict) and entry.get("reportId"):
+                r, k = self._report_rows(path, url_path, entry)
+                reports.append(r)
+                kw_rows.extend(k)
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM reports WHERE path = ?", (path,))
+            self._conn.execute("DELETE FROM report_keywords WHERE path = ?", (path,))
+            self._conn.executemany("INSERT OR REPLACE INTO reports VALUES (?,?,?,?,?,?,?,?,?,?)", reports)
+            self._conn.executemany("INSERT OR REPLACE INTO report_keywords VALUES (?,?,?,?,?,?,?)", kw_rows)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO files VALUES (?,?,?,?,?,?)",
+                (path, url_path, label, mtime_ns, size, time.time()),
+            )
+        return len(reports)
+
+    def refresh(self) -> Dict[str, int]:
+        """Re-index changed page files and drop removed ones."""
+        catalog = get_catalog(self.site_root)
+        with self._lock:
+            known = {p: (m, s) for p, m, s in self._conn.execute("SELECT path, mtime_ns, size FROM files")}
+        scanned = changed = reports = 0
+        current = set()
+        for e in catalog.entries():
+            scanned += 1
+            current.add(e.file_path)
+            if known.get(e.file_path) == (e.mtime_ns, e.size):
+                continue
+            changed += 1
+            reports += self._index_file(e.file_path, e.url_path, e.label, e.mtime_ns, e.size)
+        gone = [p for p in known if p not in current and p.startswith(catalog.content_dir)]
+        if gone:
+            with self._lock, self._conn:
+                for table in ("files", "reports", "report_keywords"):
+                    self._conn.executemany(f"DELETE FROM {table} WHERE path = ?", [(p,) for p in gone])
+        return {"scanned": scanned, "reindexed": changed, "reports_indexed": reports, "removed": len(gone)}
+
+    # ---- queries ----
+    def _rows(self, sql: str, params: tuple = ()) -> List[Dict[str, Any]]:
+        with self._lock:
+            cur = self._conn.execute(sql, params)
+            cols = [c[0] for c in cur.description]
+            return [dict(zip(cols, r)) for r in cur.fetchall()]
+
+    def stats(self) -> Dict[str, Any]:
+        rows = self._rows(
+            """
+            SELECT (SELECT COUNT(*) FROM files) AS pages_scanned,
+                   (SELECT COUNT(DISTINCT path) FROM reports) AS pages_with_reports,
+                   (SELECT COUNT(*) FROM reports) AS reports,
+                   (SELECT COUNT(DISTINCT keyword_norm) FROM report_keywords) AS keywords,
+                   (SELECT MIN(analysis_date) FROM reports) AS first_report,
+                   (SELECT MAX(analysis_date) FROM reports) AS last_report
+            """
+        )
+        return rows[0] if rows else {}
+
+    def reports(self, url_path: Optional[str] = None) -> List[Dict[str, Any]]:
+        sql = "SELECT url_path, report_id, analysis_date, report_name, avg_difficulty, easy_count, moderate_count, hard_count FROM reports"
+        params: tuple = ()
+        if url_path:
+            sql += " WHERE url_path = ?"
+            params = (url_path,)
+        return self._rows(sql + " ORDER BY analysis_date DESC", params)
+
+    def pages_for_keyword(self, keyword: str, contains: bool = False) -> List[Dict[str, Any]]:
+        """Pages whose reports include the keyword (latest report per page first)."""
+        norm = normalize_keyword(keyword)
+        if not norm:
+            return []
+        if contains:
+            # '%' and '_' in the keyword are literal, not wildcards
+            escaped = norm.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            cond, param = "k.keyword_norm LIKE ? ESCAPE '\\'", f"%{escaped}%"
+        else:
+            cond, param = "k.keyword_norm = ?", norm
+        return self._rows(
+            f"""
+            SELECT r.url_path, k.keyword, k.bucket, k.difficulty, k.top_opportunity,
+                   r.report_id, r.report_name, r.analysis_date
+            FROM report_keywords k JOIN reports r ON r.path = k.path AND r.report_id = k.report_id
+            WHERE {cond}
+            ORDER BY r.analysis_date DESC
+            """,
+            (param,),
+        )
+
+    def keyword_history(self, keyword: str) -> List[Dict[str, Any]]:
+        """Difficulty/bucket of one keyword over time, across pages."""
+        return sorted(self.pages_for_keyword(keyword), key=lambda r: r["analysis_date"])
+
+    def difficulty_trend(self, url_path: Optional[str] = None, period: str = "month") -> List[Dict[str, Any]]:
+        """Average report difficulty per period ('day', 'month' or 'year')."""
+        width = {"day": 10, "month": 7, "year": 4}.get(period, 7)
+        sql = f"""
+            SELECT substr(analysis_date, 1, {width}) AS period,
+                   AVG(avg_difficulty) AS avg_difficulty,
+                   COUNT(*) AS reports,
+                   SUM(easy_count) AS easy, SUM(moderate_count) AS moderate, SUM(hard_count) AS hard
+            FROM reports
+        """
+        params: tuple = ()
+        if url_path:
+            sql += " WHERE url_path = ?"
+            params = (url_path,)
+        return self._rows(sql + " GROUP BY period ORDER BY period", params)
+
+    def shared_keywords(self, min_pages: int = 2, limit: int = 200) -> List[Dict[str, Any]]:
+        """Keywords that appear in reports for several pages (possible cannibalisation)."""
+        return self._rows(
+            """
+            SELECT k.keyword_norm AS keyword, COUNT(DISTINCT r.url_path) AS pages,
+                   GROUP_CONCAT(DISTINCT r.url_path) AS url_paths, AVG(k.difficulty) AS avg_difficulty
+            FROM report_keywords k JOIN reports r ON r.path = k.path AND r.report_id = k.report_id
+            GROUP BY k.keyword_norm
+            HAVING pages >= ?
+            ORDER BY pages DESC, keyword
+            LIMIT ?
+            """,
+            (int(min_pages), int(limit)),
+        )
+
+
+_indexes: Dict[Tuple[str, str], ReportIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(site_root: str, path: str = DEFAULT_DB) -> ReportIndex:
+    """Process-wide index per (site, db path)."""
+    key = (os.path.abspath(site_root), os.path.abspath(path))
+    with _indexes_lock:
+        idx = _indexes.get(key)
+        if idx is None:
+            idx = _indexes[key] = ReportIndex(site_root, path)
+        return idx
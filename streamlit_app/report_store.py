@@ -0,0 +1,119 @@
+"""Sidecar storage for SERP analysis reports.
+
+Full reports (organic results, PAA/related lists, raw serper payloads) live in
+gzip JSON files under ``<site_root>/seo-reports/<page-slug>/<reportId>.json.gz``.
+The page frontmatter keeps only a compact summary per report in
+``seo.serpAnalysisHistory`` with a ``reportFile`` pointer, so saving a report and
+loading the page in TinaCMS cost the same however long the history gets.
+"""
+from __future__ import annotations
+import gzip
+import json
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+import profiler
+
+REPORTS_DIRNAME = "seo-reports"
+
+# Fields kept inline in frontmatter (what the Tina "SERP Analysis History" list shows)
+SUMMARY_FIELDS = (
+    "reportId",
+    "analysisDate",
+    "reportName",
+    "avgDifficulty",
+    "easyCount",
+    "easyKeywords",
+    "moderateCount",
+    "moderateKeywords",
+    "hardCount",
+    "hardKeywords",
+    "topOpportunities",
+    "analysisNotes",
+    "nextSteps",
+)
+
+
+def page_slug(url_path: str) -> str:
+    """'/' -> 'home', '/services/seo-audit' -> 'services/seo-audit'."""
+    parts = [re.sub(r"[^a-z0-9_-]+", "-", p.lower()).strip("-") for p in (url_path or "").split("/")]
+    parts = [p for p in parts if p]
+    return "/".join(parts) or "home"
+
+
+def report_relpath(url_path: str, report_id: str) -> str:
+    safe_id = re.sub(r"[^A-Za-z0-9_.-]+", "_", str(report_id))
+    return f"{REPORTS_DIRNAME}/{page_slug(url_path)}/{safe_id}.json.gz"
+
+
+def _abspath(site_root: str, relpath: str) -> str:
+    return os.path.join(site_root, *relpath.split("/"))
+
+
+def summarize(report: Dict[str, Any], report_file: Optional[str] = None) -> Dict[str, Any]:
+    """Compact inline entry for frontmatter."""
+    out = {k: report[k] for k in SUMMARY_FIELDS if k in report}
+    if report_file:
+        out["reportFile"] = report_file
+    return out
+
+
+def write_report(site_root: str, url_path: str, report: Dict[str, Any]) -> str:
+    """Write the full report sidecar atomically; returns its site-relative path."""
+    rel = report_relpath(url_path, report["reportId"])
+    path = _abspath(site_root, rel)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with profiler.span(f"write {rel}", kind="file", path=path):
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, default=str)
+        os.replace(tmp, path)
+    return rel
+
+
+def read_report_file(site_root: str, relpath: str) -> Optional[Dict[str, Any]]:
+    try:
+        with profiler.span(f"read {relpath}", kind="file"), \
+                gzip.open(_abspath(site_root, relpath), "rt", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+
+def load_report(site_root: str, entry: Dict[str, Any]) -> Dict[str, Any]:
+    """Full report for a history entry.
+
+    Legacy entries stored everything inline and are returned as-is; if a
+    sidecar is missing or unreadable the inline summary is returned.
+    """
+    rel = entry.get("reportFile")
+    if not rel:
+        return entry
+    full = read_report_file(site_root, rel)
+    if full is None:
+        return entry
+    return {**full, **entry}
+
+
+def externalize_history(
+    site_root: str, url_path: str, history: List[Dict[str, Any]]
+) -> Tuple[List[Dict[str, Any]], int]:
+    """Move legacy inline reports into sidecars; returns (compact_history, moved)."""
+    out: List[Dict[str, Any]] = []
+    moved = 0
+    for entry in history or []:
+        if not isinstance(entry, dict) or entry.get("reportFile") or not entry.get("reportId"):
+            out.append(entry)
+            continue
+        if set(entry) <= set(SUMMARY_FIELDS):
+            out.append(entry)
+            continue
+        try:
+            rel = write_report(site_root, url_path, entry)
+        except Exception:
+            out.append(entry)
+            continue
+        out.append(summarize(entry, rel))
+        moved += 1
+    return out, moved
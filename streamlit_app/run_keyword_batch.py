@@ -2,6 +2,7 @@ from __future__ import annotations
 import argparse
 import json
 import os
+import sys
 import time
 from typing import Any, Dict, List
 
@@ -27,6 +28,9 @@ def main():
     ap.add_argument("--jaccard", type=float, default=0.5, help="Jaccard similarity threshold (0.1-0.9)")
     ap.add_argument("--max-per-seed", type=int, default=200, help="Max expansions per seed")
     ap.add_argument("--max-keywords", type=int, default=1000, help="Max keywords to cluster")
+    ap.add_argument("--cluster-mode", choices=["lexical", "serp"], default="lexical",
+                    help="lexical: token Jaccard; serp: shared top-10 URLs from the SERP cache")
+    ap.add_argument("--min-overlap", type=int, default=3, help="Shared URLs needed to group keywords (serp mode)")
     args = ap.parse_args()
 
     data = load_seeds_json(args.seeds_json)
@@ -46,6 +50,8 @@ def main():
         max_per_seed=int(args.max_per_seed),
         max_keywords=int(args.max_keywords),
         run_dir=run_dir,
+        cluster_mode=args.cluster_mode,
+        min_overlap=int(args.min_overlap),
     )
     print(json.dumps({"run_dir": out["run_dir"], "counts": {
         "expanded": len(out["expanded"]),
@@ -53,6 +59,8 @@ def main():
         "clusters": len(out["clusters"]),
         "keywords": len(out["keywords"]),
     }}, indent=2))
+    for note in out.get("notes") or []:
+        print(f"Warning: {note}", file=sys.stderr)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,41 @@
+from __future__ import annotations
+import argparse
+import json
+import os
+import sys
+
+# rank_tracker uses plugins/ from the repository root
+_REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
+
+from rank_tracker import DEFAULT_DB, DEFAULT_DEPTH, get_tracker
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Record today's rank for every (page, target keyword) pair on the site.")
+    ap.add_argument("--site-root", required=True, help="Folder containing the TinaCMS content/ directory")
+    ap.add_argument("--provider", choices=["duckduckgo", "serper"], default="duckduckgo")
+    ap.add_argument("--api-key", default=os.environ.get("SERPER_API_KEY"), help="Serper key (defaults to $SERPER_API_KEY)")
+    ap.add_argument("--workers", type=int, default=4, help="Concurrent SERP lookups")
+    ap.add_argument("--depth", type=int, default=DEFAULT_DEPTH,
+                    help="Results requested per keyword (capped at 10 for duckduckgo, 20 for serper)")
+    ap.add_argument("--max-age-hours", type=float, default=20, help="Reuse cached SERPs younger than this")
+    ap.add_argument("--limit", type=int, default=None, help="Only check the first N keywords")
+    ap.add_argument("--db", default=DEFAULT_DB, help="Rank history database")
+    args = ap.parse_args()
+
+    tracker = get_tracker(args.site_root, args.db)
+    summary = tracker.run(
+        provider=args.provider,
+        api_key=args.api_key,
+        workers=args.workers,
+        depth=args.depth,
+        max_age=args.max_age_hours * 3600,
+        limit=args.limit,
+    )
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,11 +3,15 @@ import json
 import re
 import time
 from dataclasses import dataclass
-from typing import List, Dict, Any, Optional, Tuple
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Sequence, Tuple
 from urllib.parse import urlparse, parse_qs, unquote
 
+import numpy as np
 import requests
 
+from domain_classes import AGGREGATOR, GOV_EDU, STRONG_INFO, get_domain_store
+
 
 @dataclass
 class SerpResult:
@@ -147,12 +151,10 @@ def score_serp(results: List[SerpResult], seed: str) -> Dict[str, Any]:
     exact_in_title = 0
     gov_edu = 0
     aggregators = 0
-    aggregator_hosts = {
-        "yell.com", "trustpilot.com", "clutch.co", "bark.com", "upwork.com", "fiverr.com",
-        "facebook.com", "linkedin.com", "maps.google.", "business.site"
-    }
-    strong_info = {"wikipedia.org", "moz.com", "ahrefs.com", "backlinko.com", "hubspot.com", "semrush.com", "searchenginejournal.com"}
     strong_count = 0
+    # aggregator / strong-info / gov-edu hosts come from the domain classification store
+    store = get_domain_store()
+    gov_bit, agg_bit, strong_bit = store.bit(GOV_EDU), store.bit(AGGREGATOR), store.bit(STRONG_INFO)
 
     for r in results:
         try:
@@ -161,11 +163,12 @@ def score_serp(results: List[SerpResult], seed: str) -> Dict[str, Any]:
             host = ""
         if host:
             domains.append(host)
-            if host.endswith(".gov") or host.endswith(".gov.uk") or host.endswith(".edu"):
+            flags = store.flags(host)
+            if flags & gov_bit:
                 gov_edu += 1
-            if any(h in host for h in aggregator_hosts):
+            if flags & agg_bit:
                 aggregators += 1
-            if any(h in host for h in strong_info):
+            if flags & strong_bit:
                 strong_count += 1
         if seed_l in (r.title or "").lower():
             exact_in_title += 1
@@ -195,6 +198,87 @@ def score_serp(results: List[SerpResult], seed: str) -> Dict[str, Any]:
     }
 
 
+@lru_cache(maxsize=65536)
+def _link_host(link: str) -> str:
+    try:
+        return urlparse(link).netloc.lower()
+    except Exception:
+        return ""
+
+
+def score_serp_many(serps: Sequence[Tuple[List[SerpResult], str]]) -> List[Dict[str, Any]]:
+    """`score_serp` over many (results, seed) pairs; same output, in order.
+
+    Each distinct URL is parsed once (cached across calls) and each distinct host is
+    classified once through the domain store; the per-SERP counts and the difficulty
+    formula are then computed as arrays.
+    """
+    m = len(serps)
+    if not m:
+        return []
+    host_ids: Dict[str, int] = {}
+    serp_idx: List[int] = []
+    result_host: List[int] = []
+    exact: List[bool] = []
+    sizes = np.zeros(m, dtype=np.int64)
+    for i, (results, seed) in enumerate(serps):
+        seed_l = seed.lower()
+        sizes[i] = len(results)
+        for r in results:
+            serp_idx.append(i)
+            result_host.append(host_ids.setdefault(_link_host(r.link), len(host_ids)))
+            exact.append(seed_l in (r.title or "").lower())
+
+    hosts = list(host_ids)
+    store = get_domain_store()
+    has_host = np.fromiter((bool(h) for h in hosts), dtype=bool, count=len(hosts))
+    host_flags = [store.flags(h) if h else 0 for h in hosts]
+
+    def has_class(cls: str) -> np.ndarray:
+        bit = store.bit(cls)
+        return np.fromiter((bool(f & bit) for f in host_flags), dtype=bool, count=len(hosts))
+
+    is_gov, is_agg, is_strong = has_class(GOV_EDU), has_class(AGGREGATOR), has_class(STRONG_INFO)
+
+    idx = np.asarray(serp_idx, dtype=np.int64)
+    hid = np.asarray(result_host, dtype=np.int64)
+
+    def per_serp(mask: np.ndarray) -> np.ndarray:
+        return np.bincount(idx[mask], minlength=m)
+
+    gov_edu = per_serp(is_gov[hid])
+    aggregators = per_serp(is_agg[hid])
+    strong = per_serp(is_strong[hid])
+    exact_in_title = per_serp(np.asarray(exact, dtype=bool))
+    # distinct (serp, host) pairs, ignoring results without a host
+    hosted = has_host[hid]
+    width = max(1, len(hosts))
+    unique_domains = np.bincount(np.unique(idx[hosted] * width + hid[hosted]) // width, minlength=m)
+
+    n = np.maximum(1, sizes)
+    score = (
+        50
+        + 10 * np.minimum(3, strong)
+        + 8 * np.minimum(2, gov_edu)
+        + 4 * np.minimum(3, aggregators)
+        + 10 * (exact_in_title <= n * 0.2)
+        + 8 * (unique_domains < n * 0.5)
+    )
+    score = np.clip(score, 0, 100)
+
+    return [
+        {
+            "unique_domains": int(unique_domains[i]),
+            "exact_in_title": int(exact_in_title[i]),
+            "gov_edu": int(gov_edu[i]),
+            "aggregators": int(aggregators[i]),
+            "strong_info": int(strong[i]),
+            "difficulty": int(score[i]),
+        }
+        for i in range(m)
+    ]
+
+
 def fetch_paa_questions(
     query: str,
     provider: str = "serper",
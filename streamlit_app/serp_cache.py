@@ -0,0 +1,152 @@
+"""SQLite-backed cache in front of `serp.fetch_serp`.
+
+Results are stored per (normalized query, provider, locale, num) with the time
+they were fetched. `fetch(...)` returns the stored results while they are
+younger than `max_age` seconds and otherwise calls the provider. When several
+pages track the same keyword on the same day, the provider is hit once.
+"""
+from __future__ import annotations
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from serp import SerpResult, fetch_serp
+
+DEFAULT_DB = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", ".cache", "serp", "serp_cache.sqlite3")
+)
+DEFAULT_MAX_AGE = 20 * 3600
+# SQLite caps host parameters per statement (999 on older builds)
+_CHUNK = 500
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(str(query or "").lower().split())
+
+
+class SerpCache:
+    """Thread-safe; share one instance per db path via `get_serp_cache()`."""
+
+    def __init__(self, path: str = DEFAULT_DB):
+        self.path = os.path.abspath(path)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS serp_cache (
+                query_norm TEXT NOT NULL,
+                provider TEXT NOT NULL,
+                locale TEXT NOT NULL,
+                num INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                results TEXT NOT NULL,
+                PRIMARY KEY (query_norm, provider, locale, num)
+            )
+            """
+        )
+        self._conn.commit()
+
+    def get(
+        self, query: str, provider: str, locale: str = "gb-en", num: int = 10, max_age: float = DEFAULT_MAX_AGE
+    ) -> Optional[Tuple[List[SerpResult], float]]:
+        """(results, fetched_at) when a fresh enough entry exists."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fetched_at, results FROM serp_cache WHERE query_norm = ? AND provider = ? AND locale = ? AND num = ?",
+                (normalize_query(query), provider, locale, int(num)),
+            ).fetchone()
+        if row is None or time.time() - row[0] > max_age:
+            return None
+        try:
+            return [SerpResult(**item) for item in json.loads(row[1])], row[0]
+        except Exception:
+            return None
+
+    def put(self, query: str, provider: str, locale: str, num: int, results: List[SerpResult]) -> None:
+        data = json.dumps([{"title": r.title, "link": r.link, "snippet": r.snippet} for r in results], ensure_ascii=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO serp_cache VALUES (?,?,?,?,?,?)",
+                (normalize_query(query), provider, locale, int(num), time.time(), data),
+            )
+
+    def fetch(
+        self,
+        query: str,
+        provider: str = "duckduckgo",
+        api_key: Optional[str] = None,
+        num: int = 10,
+        locale: str = "gb-en",
+        max_age: float = DEFAULT_MAX_AGE,
+        throttle: Optional[Callable[[], None]] = None,
+    ) -> Tuple[List[SerpResult], bool]:
+        """(results, from_cache). Empty provider responses are not cached.
+
+        `throttle()` is called before a provider request (not on cache hits).
+        """
+        hit = self.get(query, provider, locale, num, max_age)
+        if hit is not None:
+            return hit[0], True
+        if throttle is not None:
+            throttle()
+        results = fetch_serp(query, provider=provider, api_key=api_key, num=num, locale=locale)
+        if results:
+            self.put(query, provider, locale, num, results)
+        return results, False
+
+    def links_many(
+        self,
+        queries: Sequence[str],
+        provider: Optional[str] = None,
+        locale: str = "gb-en",
+        max_age: Optional[float] = None,
+    ) -> Dict[str, List[str]]:
+        """normalized query -> result links of its freshest cached SERP (any provider/num unless given)."""
+        norms = list(dict.fromkeys(normalize_query(q) for q in queries if q))
+        out: Dict[str, Tuple[float, List[str]]] = {}
+        oldest = time.time() - max_age if max_age else 0.0
+        for start in range(0, len(norms), _CHUNK):
+            chunk = norms[start:start + _CHUNK]
+            sql = (
+                f"SELECT query_norm, fetched_at, results FROM serp_cache WHERE query_norm IN ({','.join('?' * len(chunk))})"
+                " AND locale = ? AND fetched_at >= ?"
+            )
+            params: tuple = (*chunk, locale, oldest)
+            if provider:
+                sql += " AND provider = ?"
+                params += (provider,)
+            with self._lock:
+                rows = self._conn.execute(sql, params).fetchall()
+            for qn, fetched_at, data in rows:
+                if qn in out and out[qn][0] >= fetched_at:
+                    continue
+                try:
+                    links = [item.get("link") or "" for item in json.loads(data)]
+                except Exception:
+                    continue
+                out[qn] = (fetched_at, links)
+        return {qn: links for qn, (_, links) in out.items()}
+
+    def prune(self, older_than: float) -> int:
+        with self._lock, self._conn:
+            cur = self._conn.execute("DELETE FROM serp_cache WHERE fetched_at < ?", (time.time() - older_than,))
+            return cur.rowcount
+
+
+_caches: Dict[str, SerpCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_serp_cache(path: str = DEFAULT_DB) -> SerpCache:
+    key = os.path.abspath(path)
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = _caches[key] = SerpCache(path)
+        return cache
@@ -0,0 +1,530 @@
+"""Background SERP analysis jobs backed by SQLite.
+
+The Streamlit script only submits a job and polls it; worker threads in the
+server process run the keywords and persist each keyword's result as soon as
+it is done. A browser refresh or widget change therefore loses nothing: the
+page picks the job up again (its id is kept in the URL), and a job that was
+interrupted by a server restart resumes from the first unfinished keyword.
+
+Each claim of a job gets a fresh token. A worker only writes results while
+its token is the job's current one and stops when it changes (cancel then
+resume), and every keyword is claimed before it is analysed, so no keyword is
+run twice. Running jobs carry a heartbeat; only jobs whose heartbeat has gone
+stale (their worker's process is gone) are put back in the queue.
+Submitting the same keywords/options while an identical job is still queued
+or running returns the existing job.
+
+API keys are never written to the database; they are held in memory for the
+life of the process (or read from SERPER_API_KEY) and must be passed again to
+`resume` after a restart.
+"""
+from __future__ import annotations
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from discovery import iter_outline_topics, rank_topics
+from serp import (
+    SerpResult,
+    fetch_page_headings,
+    fetch_paa_questions,
+    fetch_related_searches,
+    fetch_serp,
+    fetch_serper_json,
+    score_serp,
+)
+from serp_cache import DEFAULT_MAX_AGE, get_serp_cache
+
+DEFAULT_DB = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", ".cache", "serp_jobs", "jobs.sqlite3")
+)
+DEFAULT_WORKERS = 2
+ACTIVE = ("queued", "running")
+HEARTBEAT_EVERY = 15.0
+STALE_AFTER = 60.0  # seconds without a heartbeat before a running job is requeued
+LOCAL_MARKERS = ("local", "near me", "surrey", "camberley", "mytchett")
+SMALLBIZ_MARKERS = ("small business", "local business")
+
+
+@dataclass
+class AnalysisOptions:
+    provider: str = "duckduckgo"          # resolved provider: "serper" or "duckduckgo"
+    results_per_query: int = 10
+    fetch_pages: bool = True
+    show_paa: bool = True
+    show_related: bool = True
+    keep_raw: bool = False
+    require_google_paa: bool = False
+    require_google_related: bool = False
+    location: Optional[str] = None
+    no_cache: bool = False
+    locale: str = "gb-en"
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> "AnalysisOptions":
+        known = set(cls.__dataclass_fields__)
+        return cls(**{k: v for k, v in (data or {}).items() if k in known})
+
+
+def analyze_keyword(q: str, opts: AnalysisOptions, api_key: Optional[str] = None) -> Dict[str, Any]:
+    """One keyword of a SERP analysis (same steps as the in-page run, without UI calls).
+
+    Non-fatal sub-step failures are recorded in result["notes"].
+    """
+    notes: List[str] = []
+    num = int(opts.results_per_query)
+    raw_serper = None
+    if opts.provider == "serper" and (opts.show_paa or opts.show_related or opts.keep_raw):
+        try:
+            raw_serper = fetch_serper_json(
+                q,
+                api_key=api_key or "",
+                num=num,
+                locale=opts.locale,
+                location=opts.location or None,
+                no_cache=bool(opts.no_cache),
+            )
+        except Exception as e:
+            notes.append(f"Raw Serper fetch failed for '{q}': {e}")
+
+    # Organic results go through the shared SERP cache, which SERP-overlap clustering reads
+    serp_cache = get_serp_cache()
+    if raw_serper is not None:
+        results = [
+            SerpResult(item.get("title") or "", item.get("link") or "", item.get("snippet") or "")
+            for item in (raw_serper.get("organic") or [])[:num]
+        ]
+        if results:
+            serp_cache.put(q, "serper", opts.locale, num, results)
+    else:
+        results, _ = serp_cache.fetch(
+            q,
+            provider=opts.provider,
+            api_key=api_key or None,
+            num=num,
+            locale=opts.locale,
+            max_age=0 if opts.no_cache else DEFAULT_MAX_AGE,
+        )
+    metrics = score_serp(results, seed=q)
+
+    page_outlines = []
+    if opts.fetch_pages:
+        for res in results[: min(5, len(results))]:
+            page_outlines.append(fetch_page_headings(res.link))
+    topic_counts: Dict[str, int] = {}
+    topics = rank_topics(iter_outline_topics(page_outlines, topic_counts), topic_counts)[:15]
+
+    paa_list: List[str] = []
+    paa_source = "none"
+    if opts.show_paa:
+        try:
+            paa_list, paa_source = fetch_paa_questions(
+                q,
+                provider=opts.provider,
+                api_key=api_key or None,
+                results=results,
+                outlines=page_outlines,
+                raw=raw_serper,
+                require_google_only=opts.require_google_paa,
+            )
+        except Exception as e:
+            notes.append(f"PAA fetch failed for '{q}': {e}")
+            paa_list, paa_source = [], "error"
+
+    related_list: List[str] = []
+    related_source = "none"
+    if opts.show_related:
+        try:
+            related_list, related_source = fetch_related_searches(
+                q,
+                provider=opts.provider,
+                api_key=api_key or None,
+                raw=raw_serper,
+                require_google_only=opts.require_google_related,
+            )
+        except Exception as e:
+            notes.append(f"Related searches fetch failed for '{q}': {e}")
+            related_list, related_source = [], "error"
+
+    ql = q.lower()
+    return {
+        "keyword": q,
+        "metrics": {
+            "difficulty": metrics.get("difficulty"),
+            "exact_in_title": metrics.get("exact_in_title"),
+            "unique_domains": metrics.get("unique_domains"),
+            "gov_edu": metrics.get("gov_edu"),
+            "aggregators": metrics.get("aggregators"),
+        },
+        "analysis_row": {
+            "keyword": q,
+            "difficulty": int(metrics.get("difficulty") or 0),
+            "exact_in_title": int(metrics.get("exact_in_title") or 0),
+            "unique_domains": int(metrics.get("unique_domains") or 0),
+            "gov_edu": int(metrics.get("gov_edu") or 0),
+            "aggregators": int(metrics.get("aggregators") or 0),
+            "is_local": any(s in ql for s in LOCAL_MARKERS),
+            "is_smallbiz": any(s in ql for s in SMALLBIZ_MARKERS),
+        },
+        "results": [
+            {"rank": i + 1, "title": r.title, "link": r.link, "snippet": r.snippet}
+            for i, r in enumerate(results)
+        ],
+        "paa": paa_list,
+        "paa_source": paa_source,
+        "related": related_list,
+        "related_source": related_source,
+        "topics": [{"topic": t, "mentions": n} for t, n in topics],
+        "raw_serper": raw_serper if opts.keep_raw else None,
+        "notes": notes,
+    }
+
+
+def job_fingerprint(keywords: List[str], opts: AnalysisOptions) -> str:
+    payload = json.dumps({"keywords": list(keywords), "options": asdict(opts)}, sort_keys=True)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class SerpJobQueue:
+    """SQLite job table + per-keyword results, drained by daemon worker threads."""
+
+    def __init__(self, path: str = DEFAULT_DB, workers: int = DEFAULT_WORKERS):
+        self.path = os.path.abspath(path)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._secrets: Dict[str, Optional[str]] = {}
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                fingerprint TEXT NOT NULL,
+                label TEXT,
+                options TEXT NOT NULL,
+                status TEXT NOT NULL,
+                total INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                error TEXT,
+                claim TEXT,
+                heartbeat REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at);
+            CREATE INDEX IF NOT EXISTS idx_jobs_fp ON jobs(fingerprint, status);
+            CREATE TABLE IF NOT EXISTS job_keywords (
+                job_id TEXT NOT NULL,
+                idx INTEGER NOT NULL,
+                keyword TEXT NOT NULL,
+                status TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                seconds REAL,
+                claim TEXT,
+                PRIMARY KEY (job_id, idx)
+            ) WITHOUT ROWID;
+            """
+        )
+        for table, column, decl in (("jobs", "claim", "TEXT"), ("jobs", "heartbeat", "REAL"), ("job_keywords", "claim", "TEXT")):
+            cols = {r[1] for r in self._conn.execute(f"PRAGMA table_info({table})")}
+            if column not in cols:
+                self._conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+        self._conn.commit()
+        self._active: Dict[str, str] = {}  # claim token -> job_id held by this process
+        self._requeue_stale()
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"serp-job-{i}", daemon=True)
+            for i in range(max(1, int(workers)))
+        ]
+        self._threads.append(threading.Thread(target=self._heartbeat, name="serp-job-heartbeat", daemon=True))
+        for t in self._threads:
+            t.start()
+
+    # ---- submit / control ----
+    def submit(
+        self,
+        keywords: List[str],
+        opts: AnalysisOptions,
+        api_key: Optional[str] = None,
+        label: str = "",
+    ) -> str:
+        """Queue an analysis; returns the id of an identical active job if there is one."""
+        keywords = [k for k in dict.fromkeys(k.strip() for k in keywords) if k]
+        fp = job_fingerprint(keywords, opts)
+        with self._wake:
+            row = self._conn.execute(
+                "SELECT job_id FROM jobs WHERE fingerprint = ? AND status IN ('queued', 'running') "
+                "ORDER BY created_at DESC LIMIT 1",
+                (fp,),
+            ).fetchone()
+            if row:
+                if api_key:
+                    self._secrets[row[0]] = api_key
+                return row[0]
+            job_id = uuid.uuid4().hex[:12]
+            with self._conn:
+                self._conn.execute(
+                    "INSERT INTO jobs (job_id, fingerprint, label, options, status, total, created_at) "
+                    "VALUES (?, ?, ?, ?, 'queued', ?, ?)",
+                    (job_id, fp, label, json.dumps(asdict(opts)), len(keywords), time.time()),
+                )
+                self._conn.executemany(
+                    "INSERT INTO job_keywords (job_id, idx, keyword, status) VALUES (?, ?, ?, 'pending')",
+                    [(job_id, i, k) for i, k in enumerate(keywords)],
+                )
+            self._secrets[job_id] = api_key
+            self._wake.notify()
+            return job_id
+
+    def resume(self, job_id: str, api_key: Optional[str] = None) -> bool:
+        """Requeue a failed/cancelled job; finished keywords are kept."""
+        with self._wake:
+            with self._conn:
+                # Keywords left mid-flight by a worker that is gone (stale heartbeat)
+                self._conn.execute(
+                    "UPDATE job_keywords SET status = 'pending', claim = NULL WHERE job_id = ? AND status = 'running' "
+                    "AND EXISTS (SELECT 1 FROM jobs WHERE job_id = ? AND COALESCE(heartbeat, 0) < ?)",
+                    (job_id, job_id, time.time() - STALE_AFTER),
+                )
+                cur = self._conn.execute(
+                    "UPDATE jobs SET status = 'queued', error = NULL, finished_at = NULL "
+                    "WHERE job_id = ? AND status IN ('failed', 'cancelled', 'queued')",
+                    (job_id,),
+                )
+                self._conn.execute(
+                    "UPDATE job_keywords SET status = 'pending', error = NULL WHERE job_id = ? AND status = 'error'",
+                    (job_id,),
+                )
+            if api_key:
+                self._secrets[job_id] = api_key
+            self._wake.notify()
+            return cur.rowcount > 0
+
+    def cancel(self, job_id: str) -> None:
+        """Stop after the keyword in flight."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE job_id = ? AND status IN ('queued', 'running')",
+                (time.time(), job_id),
+            )
+
+    # ---- polling ----
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT job_id, label, status, total, created_at, started_at, finished_at, error, options "
+                "FROM jobs WHERE job_id = ?",
+                (job_id,),
+            ).fetchone()
+            if not row:
+                return None
+            counts = dict(self._conn.execute(
+                "SELECT status, COUNT(*) FROM job_keywords WHERE job_id = ? GROUP BY status", (job_id,)
+            ).fetchall())
+        keys = ("job_id", "label", "status", "total", "created_at", "started_at", "finished_at", "error", "options")
+        out = dict(zip(keys, row))
+        out["options"] = json.loads(out["options"] or "{}")
+        out["done"] = counts.get("done", 0)
+        out["errors"] = counts.get("error", 0)
+        out["pending"] = counts.get("pending", 0)
+        out["running"] = counts.get("running", 0)
+        out["needs_key"] = out["options"].get("provider") == "serper" and not self._api_key(job_id)
+        return out
+
+    def results(self, job_id: str) -> List[Dict[str, Any]]:
+        """Per-keyword results finished so far, in submission order."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT result FROM job_keywords WHERE job_id = ? AND status = 'done' ORDER BY idx",
+                (job_id,),
+            ).fetchall()
+        return [json.loads(r[0]) for r in rows if r[0]]
+
+    def keyword_errors(self, job_id: str) -> List[Dict[str, str]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT keyword, error FROM job_keywords WHERE job_id = ? AND status = 'error' ORDER BY idx",
+                (job_id,),
+            ).fetchall()
+        return [{"keyword": k, "error": e or ""} for k, e in rows]
+
+    def recent(self, limit: int = 20) -> List[Dict[str, Any]]:
+        with self._lock:
+            ids = [r[0] for r in self._conn.execute(
+                "SELECT job_id FROM jobs ORDER BY created_at DESC LIMIT ?", (int(limit),)
+            ).fetchall()]
+        return [s for s in (self.status(j) for j in ids) if s]
+
+    # ---- workers ----
+    def _api_key(self, job_id: str) -> Optional[str]:
+        return self._secrets.get(job_id) or os.environ.get("SERPER_API_KEY")
+
+    def _requeue_stale(self) -> None:
+        """Put running jobs whose worker stopped heartbeating back in the queue (caller may hold the lock)."""
+        cutoff = time.time() - STALE_AFTER
+        with self._conn:
+            stale = [r[0] for r in self._conn.execute(
+                "SELECT job_id FROM jobs WHERE status = 'running' AND COALESCE(heartbeat, 0) < ?", (cutoff,)
+            ).fetchall()]
+            for job_id in stale:
+                self._conn.execute("UPDATE jobs SET status = 'queued', claim = NULL WHERE job_id = ?", (job_id,))
+                self._conn.execute(
+                    "UPDATE job_keywords SET status = 'pending', claim = NULL WHERE job_id = ? AND status = 'running'",
+                    (job_id,),
+                )
+
+    def _claim(self) -> Tuple[str, str]:
+        """(job_id, claim token) of the oldest queued job; blocks until there is one."""
+        with self._wake:
+            while True:
+                self._requeue_stale()
+                row = self._conn.execute(
+                    "SELECT job_id FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+                ).fetchone()
+                if row:
+                    token = uuid.uuid4().hex
+                    now = time.time()
+                    with self._conn:
+                        self._conn.execute(
+                            "UPDATE jobs SET status = 'running', claim = ?, heartbeat = ?, "
+                            "started_at = COALESCE(started_at, ?) WHERE job_id = ?",
+                            (token, now, now, row[0]),
+                        )
+                    self._active[token] = row[0]
+                    return row[0], token
+                self._wake.wait(timeout=5.0)
+
+    def _heartbeat(self) -> None:
+        while True:
+            time.sleep(HEARTBEAT_EVERY)
+            with self._lock:
+                # Any live worker on a job keeps it fresh, including one finishing a superseded claim
+                now = time.time()
+                beats = [(now, job_id) for job_id in set(self._active.values())]
+                if beats:
+                    with self._conn:
+                        self._conn.executemany("UPDATE jobs SET heartbeat = ? WHERE job_id = ?", beats)
+
+    def _take_keyword(self, job_id: str, token: str, idx: int) -> Optional[bool]:
+        """True if this claim now owns the keyword, False if someone else has it, None when the claim is gone."""
+        with self._lock, self._conn:
+            own = self._conn.execute(
+                "SELECT 1 FROM jobs WHERE job_id = ? AND claim = ? AND status = 'running'", (job_id, token)
+            ).fetchone()
+            if not own:
+                return None
+            cur = self._conn.execute(
+                "UPDATE job_keywords SET status = 'running', claim = ? WHERE job_id = ? AND idx = ? AND status = 'pending'",
+                (token, job_id, idx),
+            )
+            return cur.rowcount > 0
+
+    def _finish_if_complete(self, job_id: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'done', finished_at = ? WHERE job_id = ? AND status = 'running' "
+                "AND NOT EXISTS (SELECT 1 FROM job_keywords WHERE job_id = ? AND status IN ('pending', 'running'))",
+                (time.time(), job_id, job_id),
+            )
+
+    def _run_job(self, job_id: str, token: str) -> None:
+        with self._lock:
+            opts_json = self._conn.execute("SELECT options FROM jobs WHERE job_id = ?", (job_id,)).fetchone()[0]
+            todo = self._conn.execute(
+                "SELECT idx, keyword FROM job_keywords WHERE job_id = ? AND status = 'pending' ORDER BY idx",
+                (job_id,),
+            ).fetchall()
+        opts = AnalysisOptions.from_dict(json.loads(opts_json))
+        api_key = self._api_key(job_id)
+        if opts.provider == "serper" and not api_key:
+            raise RuntimeError("serper.dev API key needed; resume the job with the key")
+        for idx, keyword in todo:
+            taken = self._take_keyword(job_id, token, idx)
+            if taken is None:
+                return
+            if not taken:
+                continue
+            t0 = time.perf_counter()
+            try:
+                result = analyze_keyword(keyword, opts, api_key)
+                update = ("done", json.dumps(result, ensure_ascii=False, default=str), None)
+            except Exception as e:
+                update = ("error", None, str(e))
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "UPDATE job_keywords SET status = ?, result = ?, error = ?, seconds = ?, claim = NULL "
+                    "WHERE job_id = ? AND idx = ? AND claim = ?",
+                    (*update, round(time.perf_counter() - t0, 3), job_id, idx, token),
+                )
+
+    def _worker(self) -> None:
+        while True:
+            job_id, token = self._claim()
+            try:
+                self._run_job(job_id, token)
+            except Exception as e:
+                with self._lock, self._conn:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE job_id = ? AND claim = ?",
+                        (str(e), time.time(), job_id, token),
+                    )
+                    self._conn.execute(
+                        "UPDATE job_keywords SET status = 'pending', claim = NULL WHERE job_id = ? AND claim = ? AND status = 'running'",
+                        (job_id, token),
+                    )
+            finally:
+                with self._lock:
+                    self._active.pop(token, None)
+            # A superseded claim may have held the last keyword in flight
+            self._finish_if_complete(job_id)
+
+
+_queue: Optional[SerpJobQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_queue() -> SerpJobQueue:
+    """Process-wide queue (workers start on first use)."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = SerpJobQueue()
+        return _queue
+
+
+def collect(results: List[Dict[str, Any]], opts: AnalysisOptions) -> Dict[str, Any]:
+    """Fold per-keyword results into the shapes the analysis summary and save flow use."""
+    out: Dict[str, Any] = {
+        "analysis_rows": [],
+        "paa_by_keyword": {},
+        "paa_source_by_keyword": {},
+        "related_by_keyword": {},
+        "related_source_by_keyword": {},
+        "raw_serper_by_keyword": {},
+        "organic_results_by_keyword": {},
+        "topics_by_keyword": {},
+    }
+    for r in results:
+        q = r["keyword"]
+        out["analysis_rows"].append(r["analysis_row"])
+        out["organic_results_by_keyword"][q] = r.get("results") or []
+        if r.get("topics"):
+            out["topics_by_keyword"][q] = r["topics"]
+        if opts.show_paa:
+            out["paa_by_keyword"][q] = r.get("paa") or []
+            out["paa_source_by_keyword"][q] = r.get("paa_source")
+        if opts.show_related:
+            out["related_by_keyword"][q] = r.get("related") or []
+            out["related_source_by_keyword"][q] = r.get("related_source")
+        if r.get("raw_serper") is not None:
+            out["raw_serper_by_keyword"][q] = r["raw_serper"]
+    return out
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+SERP Overlap Clustering and QueryIndex Test
+Checks cluster_by_serp_overlap (inverted index, sharded numpy pair counting,
+union-find) against a brute-force pairwise overlap, and QueryIndex contains
+lookups against a linear substring scan, on seeded synthetic data.
+"""
+
+import random
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "streamlit_app"))
+
+from keyword_pipeline import _url_key, cluster_by_serp_overlap  # noqa: E402
+from plugins.gsc_api import QueryIndex, normalize_query  # noqa: E402
+
+
+def _synthetic_serps(rng, n_keywords=300, n_urls=400, top_n=10):
+    keywords = [f"keyword {i}" for i in range(n_keywords)]
+    # A few "topics" share a URL pool so that real clusters form
+    pools = [rng.sample(range(n_urls), 15) for _ in range(20)]
+    serps = {}
+    for kw in keywords:
+        pool = rng.choice(pools)
+        urls = rng.sample(pool, 7) + rng.sample(range(n_urls), top_n - 7)
+        links = [f"https://www.example{u % 7}.com/page-{u}/" for u in urls]
+        if rng.random() < 0.05:
+            continue  # no SERP data: stays a singleton
+        serps[kw] = links
+    return keywords, serps
+
+
+def _brute_force_clusters(keywords, serps, min_overlap, top_n=10):
+    sets = [{_url_key(link) for link in serps.get(kw, [])[:top_n]} - {""} for kw in keywords]
+    parent = list(range(len(keywords)))
+
+    def find(x):
+        while parent[x] != x:
+            x = parent[x]
+        return x
+
+    for a in range(len(keywords)):
+        for b in range(a + 1, len(keywords)):
+            if len(sets[a] & sets[b]) >= min_overlap:
+                ra, rb = find(a), find(b)
+                if ra != rb:
+                    parent[rb] = ra
+    groups = {}
+    for i in range(len(keywords)):
+        groups.setdefault(find(i), set()).add(i)
+    return {frozenset(g) for g in groups.values()}
+
+
+def test_cluster_by_serp_overlap_matches_brute_force():
+    rng = random.Random(7)
+    keywords, serps = _synthetic_serps(rng)
+    for min_overlap in (1, 3, 5, 8):
+        expected = _brute_force_clusters(keywords, serps, min_overlap)
+        for shard_pairs, workers in ((2_000_000, 1), (50, 1), (50, 4)):
+            rows, clusters = cluster_by_serp_overlap(
+                keywords, serps, min_overlap=min_overlap,
+                max_postings=None, workers=workers, shard_pairs=shard_pairs,
+            )
+            assert len(rows) == len(keywords)
+            assert {frozenset(c) for c in clusters} == expected, (min_overlap, shard_pairs, workers)
+            assert sorted(i for c in clusters for i in c) == list(range(len(keywords)))
+
+
+def _linear_contains(rows, keyword):
+    kw = normalize_query(keyword)
+    for row in rows:
+        q = normalize_query((row.get("keys") or [""])[0])
+        if q and kw in q:
+            return row
+    return None
+
+
+def test_query_index_contains_matches_linear_scan():
+    rng = random.Random(11)
+    words = ["seo", "agency", "london", "marketing", "brand", "strategy", "local", "best", "cost", "near", "me"]
+    rows = []
+    for i in range(500):
+        query = " ".join(rng.choice(words) for _ in range(rng.randint(1, 4)))
+        if rng.random() < 0.1:
+            query = "  " + query.upper() + " "
+        rows.append({"keys": [query], "clicks": i, "impressions": 10 * i})
+    index = QueryIndex(rows)
+
+    probes = ["seo", "agency london", "ncy lon", "rketing bra", "st", "o a", "brand  strategy",
+              "BEST cost", "me", "london agency seo", "missing phrase", "e"]
+    probes += [" ".join(rng.choice(words) for _ in range(rng.randint(1, 3))) for _ in range(200)]
+    probes += [normalize_query(r["keys"][0])[1:-1] for r in rng.sample(rows, 50)]
+    for probe in probes:
+        if not normalize_query(probe):
+            continue
+        assert index.find(probe, "contains") is _linear_contains(rows, probe), probe
+
+
+if __name__ == "__main__":
+    test_cluster_by_serp_overlap_matches_brute_force()
+    test_query_index_contains_matches_linear_scan()
+    print("✅ SERP overlap clustering and QueryIndex contains lookups match brute force")
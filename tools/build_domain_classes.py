@@ -0,0 +1,53 @@
+import argparse
+import json
+import os
+import sys
+
+_THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+# The domain store and report readers live in streamlit_app/ (flat imports)
+_APP_DIR = os.path.abspath(os.path.join(_THIS_DIR, os.pardir, "streamlit_app"))
+if _APP_DIR not in sys.path:
+    sys.path.insert(0, _APP_DIR)
+
+from domain_classes import DomainStore, build_store, domain_frequencies, store_path
+
+DEFAULT_SITE_ROOT = r"C:\Users\rhode\source\repos\EllieEdwardsMarketingLeadgenSite"
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build the domain classification store used by score_serp from saved serpAnalysisHistory reports"
+    )
+    parser.add_argument("--site-root", default=DEFAULT_SITE_ROOT, help="Folder containing the TinaCMS content/ directory")
+    parser.add_argument("--out", default=store_path(), help="Store file to write (TSV)")
+    parser.add_argument("--min-serps", type=int, default=3, help="Minimum SERPs a domain must appear in to be classified")
+    parser.add_argument("--min-share", type=float, default=0.05, help="Minimum share of all SERPs (0-1)")
+    parser.add_argument("--class", dest="cls", default="strong_info", help="Class given to frequent, unclassified domains")
+    parser.add_argument("--exclude", action="append", default=["ellieedwardsmarketing.com"], help="Domains never counted (repeatable)")
+    parser.add_argument("--fresh", action="store_true", help="Start from the built-in defaults instead of the existing store")
+    parser.add_argument("--top", type=int, default=25, help="How many of the most frequent domains to print")
+    args = parser.parse_args()
+
+    if not os.path.isdir(os.path.join(args.site_root, "content")):
+        parser.error(f"No content/ folder under {args.site_root}")
+
+    counts, total = domain_frequencies(args.site_root, exclude=args.exclude)
+    base = None
+    if not args.fresh and os.path.exists(args.out):
+        base = DomainStore.load(args.out)
+    store, promoted = build_store(
+        counts, total, min_serps=args.min_serps, min_share=args.min_share, frequent_class=args.cls, base=base
+    )
+    store.save(args.out)
+    print(json.dumps({
+        "out": args.out,
+        "serps": total,
+        "domains_counted": len(counts),
+        "domains_in_store": len(store),
+        "newly_classified": promoted,
+        "top": [{"domain": d, "serps": n, "classes": store.class_names(d)} for d, n in counts.most_common(args.top)],
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
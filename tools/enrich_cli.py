@@ -0,0 +1,150 @@
+from __future__ import annotations
+import argparse
+import json
+import os
+import sys
+from typing import Dict, List
+
+# Ensure repository root is on sys.path so 'plugins' can be imported when running from tools/
+_THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+_REPO_ROOT = os.path.abspath(os.path.join(_THIS_DIR, os.pardir))
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
+
+from plugins.base import PluginBase
+from plugins.fusion import FusionColumns, FusionWeights, opportunity_scores, recommendations
+from plugins.google_trends import GoogleTrendsPlugin
+from plugins.gsc_api import GscApiPlugin
+from plugins.serp_features import SerpFeaturesPlugin
+from plugins import orchestrator
+
+PLUGINS = {
+    "google_trends": GoogleTrendsPlugin,
+    "gsc_api": GscApiPlugin,
+    "serp_features": SerpFeaturesPlugin,
+}
+
+
+def load_weights(spec: str | None) -> Dict[str, dict]:
+    """--weights accepts a JSON file path or inline JSON: {"fusion": {...}, "keyword_score": {...}}."""
+    if not spec:
+        return {}
+    if os.path.exists(spec):
+        with open(spec, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    else:
+        data = json.loads(spec)
+    if "fusion" not in data and "keyword_score" not in data:
+        data = {"fusion": data}
+    return data
+
+
+def rescore(run_dir: str, weights: Dict[str, dict]) -> Dict[str, object]:
+    """Recompute score/opportunity_score/recommendation on keyword_enriched.csv without calling plugins."""
+    import time
+    import pandas as pd
+
+    sys.path.insert(0, os.path.join(_REPO_ROOT, "streamlit_app"))
+    from keyword_pipeline import score_keywords
+
+    path = os.path.join(run_dir, "keyword_enriched.csv")
+    df = pd.read_csv(path, keep_default_na=False, dtype={"keyword": str})
+    t0 = time.perf_counter()
+    fw = FusionWeights.from_dict(weights.get("fusion"))
+    if "cluster_size" in df and "keyword" in df:
+        df["score"] = score_keywords(
+            None,
+            pd.to_numeric(df["cluster_size"], errors="coerce").fillna(1).to_numpy(),
+            pd.to_numeric(df["modifier_hits"], errors="coerce").fillna(0).to_numpy() if "modifier_hits" in df else None,
+            word_counts=df["keyword"].str.split().str.len().fillna(0).to_numpy(),
+            **(weights.get("keyword_score") or {}),
+        )
+    cols = FusionColumns.from_frame(df)
+    scores = opportunity_scores(cols, fw)
+    df["opportunity_score"] = scores
+    df["recommendation"] = recommendations(cols, scores, fw)
+    seconds = round(time.perf_counter() - t0, 3)
+    df.to_csv(path, index=False)
+    df[df["recommendation"] == "area_service_page"].to_csv(
+        os.path.join(run_dir, "area_service_opportunities.csv"), index=False
+    )
+    return {"rescored": path, "rows": len(df), "seconds": seconds, "weights": fw.to_dict()}
+
+
+def main():
+    ap = argparse.ArgumentParser(
+        description="Enrich keywords_scored.csv from a pipeline run with plugins and write keyword_enriched.csv"
+    )
+    ap.add_argument("--run-dir", help="reports/keyword_runs/<timestamp>; default latest run")
+    ap.add_argument(
+        "--plugins",
+        default="google_trends,gsc_api",
+        help=f"Comma-separated plugin names ({', '.join(PLUGINS)}) or 'none' for a dry run",
+    )
+    ap.add_argument("--locale", default="gb-en")
+    ap.add_argument("--location", default=None)
+    ap.add_argument("--date-range", default="today 12-m", help="Trends timeframe")
+    ap.add_argument("--site", default="sc-domain:ellieedwardsmarketing.com", help="GSC property for gsc_api")
+    ap.add_argument("--gsc-key", default=None, help="GSC service_account.json (live pull when the local store lacks the window)")
+    ap.add_argument("--serper-api-key", default=os.environ.get("SERPER_API_KEY"), help="Enables serp_features")
+    ap.add_argument("--serp-cap", type=int, default=100, help="Max keywords sent to serp_features")
+    ap.add_argument("--batch-size", type=int, default=orchestrator.DEFAULT_BATCH_SIZE)
+    ap.add_argument("--force", default="", help="Comma-separated stages to recompute, ignoring run checkpoints")
+    ap.add_argument("--no-cache", action="store_true", help="Bypass the per-keyword plugin caches")
+    ap.add_argument(
+        "--weights",
+        default=None,
+        help='Fusion/keyword-score weights as a JSON file or inline JSON, e.g. \'{"fusion": {"quick_win_boost": 0.4}}\'',
+    )
+    ap.add_argument("--rescore-only", action="store_true", help="Re-apply weights to keyword_enriched.csv without running plugins")
+    args = ap.parse_args()
+
+    run_dir = args.run_dir or orchestrator.latest_run_dir(_REPO_ROOT)
+    if not run_dir or not os.path.exists(os.path.join(run_dir, "keywords_scored.csv")):
+        ap.error("No keywords_scored.csv found; pass --run-dir")
+
+    weights = load_weights(args.weights)
+    if args.rescore_only:
+        if not os.path.exists(os.path.join(run_dir, "keyword_enriched.csv")):
+            ap.error("No keyword_enriched.csv in the run folder; run the enrichment first")
+        print(json.dumps(rescore(run_dir, weights), indent=2))
+        return
+
+    names = [n.strip() for n in args.plugins.split(",") if n.strip() and n.strip() != "none"]
+    unknown = [n for n in names if n not in PLUGINS]
+    if unknown:
+        ap.error(f"Unknown plugin(s): {', '.join(unknown)}")
+    plugins: List[PluginBase] = [PLUGINS[n]() for n in names]
+
+    context: Dict[str, object] = {
+        "locale": args.locale,
+        "location": args.location,
+        "date_range": args.date_range,
+        "site": args.site,
+        "no_cache": bool(args.no_cache),
+    }
+    if args.gsc_key:
+        context["gsc_key"] = args.gsc_key
+    if args.serper_api_key:
+        context["serper_api_key"] = args.serper_api_key
+
+    def on_progress(stage: str, done: int, total: int):
+        print(f"[{stage}] {done}/{total}", file=sys.stderr)
+
+    rows, report = orchestrator.run_enrichment(
+        orchestrator.read_scored(run_dir),
+        plugins,
+        context=context,
+        run_dir=run_dir,
+        batch_size=args.batch_size,
+        limits={"serp_features": args.serp_cap},
+        force=[s.strip() for s in args.force.split(",") if s.strip()],
+        on_progress=on_progress,
+        weights=FusionWeights.from_dict(weights.get("fusion")),
+    )
+    paths = orchestrator.write_outputs(run_dir, rows, report)
+    print(json.dumps({"outputs": paths, **report}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,20 @@
 import os
+import sys
 import json
 import argparse
 import datetime as dt
 from typing import List
 
-from google.oauth2 import service_account
-from google.analytics.data_v1beta import BetaAnalyticsDataClient
 from google.analytics.data_v1beta.types import DateRange, Dimension, Metric, RunReportRequest, OrderBy
 
+_THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+# Ensure repository root (seolab) is on sys.path so we can import plugins/
+_REPO_ROOT = os.path.abspath(os.path.join(_THIS_DIR, os.pardir))
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
+
+from plugins import google_clients
+
 
 def _repo_root() -> str:
     # repo root = parent of the tools directory
@@ -24,11 +31,7 @@ def run_report(property_id: str, days: int, row_limit: int, sa_path: str) -> Lis
     if not os.path.exists(sa_path):
         raise FileNotFoundError("service_account.json not found at provided path")
 
-    creds = service_account.Credentials.from_service_account_file(
-        sa_path,
-        scopes=["https://www.googleapis.com/auth/analytics.readonly"],
-    )
-    client = BetaAnalyticsDataClient(credentials=creds)
+    client = google_clients.ga4_client(sa_path)
 
     # End 2 days ago to avoid processing lag
     end_date = dt.date.today() - dt.timedelta(days=2)
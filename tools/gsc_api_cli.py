@@ -1,17 +1,32 @@
 import argparse
 import csv
 import json
+import os
 import sys
-import datetime as dt
 from pathlib import Path
-from typing import Iterable, List, Dict
+from typing import Iterable, List, Dict, Tuple
 
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
-from google.oauth2 import service_account
 
-
-SCOPES = ["https://www.googleapis.com/auth/webmasters.readonly"]
+_THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+# Ensure repository root (seolab) is on sys.path so we can import plugins/
+_REPO_ROOT = os.path.abspath(os.path.join(_THIS_DIR, os.pardir))
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
+
+from plugins.gsc_api import (
+    DEFAULT_QPM,
+    DEFAULT_QPS,
+    GscScheduler,
+    bulk_keyword_metrics,
+    date_window,
+    iter_keyword_metrics,
+)
+from plugins.gsc_store import DEFAULT_DB, GscWarehouse
+from plugins import google_clients
+
+
+SCOPES = google_clients.GSC_SCOPES
 DEFAULT_SA = Path(r"C:\\Users\\rhode\\source\\repos\\seolab\\.secrets\\gsc\\service_account.json")
 DEFAULT_SITE = "sc-domain:ellieedwardsmarketing.com"
 
@@ -37,40 +52,6 @@ def read_keywords(args) -> List[str]:
     return []
 
 
-def query_keyword(svc, site_url: str, start: str, end: str, keyword: str) -> Dict:
-    body = {
-        "startDate": start,
-        "endDate": end,
-        "dimensions": ["query"],
-        "dimensionFilterGroups": [
-            {
-                "filters": [
-                    {"dimension": "query", "operator": "equals", "expression": keyword}
-                ]
-            }
-        ],
-        "rowLimit": 1,
-    }
-    resp = svc.searchanalytics().query(siteUrl=site_url, body=body).execute()
-    rows = resp.get("rows", [])
-    if not rows:
-        return {
-            "keyword": keyword,
-            "impressions": 0,
-            "clicks": 0,
-            "ctr": 0.0,
-            "position": None,
-        }
-    row = rows[0]
-    return {
-        "keyword": keyword,
-        "impressions": int(row.get("impressions", 0)),
-        "clicks": int(row.get("clicks", 0)),
-        "ctr": float(row.get("ctr", 0.0)),
-        "position": float(row.get("position", 0.0)),
-    }
-
-
 def to_csv(rows: Iterable[Dict], out_file: Path | None):
     fieldnames = ["keyword", "impressions", "clicks", "ctr", "position"]
     if out_file:
@@ -98,6 +79,19 @@ def to_json(rows: Iterable[Dict], out_file: Path | None):
         print(text)
 
 
+def explain_http_error(e: HttpError, site: str, file=None) -> None:
+    msg = str(e)
+    if "accessNotConfigured" in msg or "has not been used in project" in msg:
+        print("ERROR: Search Console API not enabled for this Cloud project.", file=file)
+        print("Fix: Enable it at https://console.developers.google.com/apis/api/searchconsole.googleapis.com/overview for your project, then retry.", file=file)
+    elif "insufficientPermissions" in msg or e.resp.status == 403:
+        print("ERROR: 403 permission issue. Ensure the service account is added as a user on the GSC property:", site, file=file)
+    elif e.resp.status == 404:
+        print("ERROR: 404 not found. Check siteUrl (use sc-domain:example.com for Domain properties).", file=file)
+    else:
+        print("HttpError:", msg, file=file)
+
+
 def main():
     parser = argparse.ArgumentParser(description="Query GSC metrics for keywords via Service Account")
     parser.add_argument("--site", default=DEFAULT_SITE, help="GSC siteUrl e.g. sc-domain:example.com")
@@ -109,51 +103,84 @@ def main():
     date.add_argument("--days", type=int, default=28, help="Lookback window in days (default 28)")
     date.add_argument("--start")
     date.add_argument("--end")
+    parser.add_argument("--operator", choices=["equals", "contains"], default="equals", help="Query match mode")
+    parser.add_argument(
+        "--per-keyword",
+        action="store_true",
+        help="One API request per keyword instead of one paginated pull of all queries matched locally",
+    )
+    parser.add_argument("--qps", type=float, default=DEFAULT_QPS, help="Per-keyword mode: max requests per second")
+    parser.add_argument("--qpm", type=int, default=DEFAULT_QPM, help="Per-keyword mode: max requests per minute")
+    parser.add_argument("--workers", type=int, default=8, help="Per-keyword mode: parallel requests")
+    parser.add_argument(
+        "--from-store",
+        nargs="?",
+        const=DEFAULT_DB,
+        metavar="DB",
+        help="Answer from the local warehouse (see tools/gsc_sync.py) instead of the live API",
+    )
     parser.add_argument("--format", choices=["json", "csv"], default="json")
     parser.add_argument("-o", "--output", help="Output file path (default stdout)")
 
     args = parser.parse_args()
 
-    sa_path = Path(args.key)
-    if not sa_path.exists():
-        parser.error(f"Service account file not found: {sa_path}")
-
     if args.start and args.end:
         start, end = args.start, args.end
     else:
-        end = dt.date.today()
-        start = end - dt.timedelta(days=args.days)
-        start, end = start.isoformat(), end.isoformat()
+        start, end = date_window(args.days)
 
     kws = read_keywords(args)
     if not kws:
         parser.error("No keywords provided. Use --keywords or --keywords-file")
 
-    creds = service_account.Credentials.from_service_account_file(str(sa_path), scopes=SCOPES)
-    svc = build("searchconsole", "v1", credentials=creds, cache_discovery=False)
+    out_path = Path(args.output) if args.output else None
+    write = to_csv if args.format == "csv" else to_json
+
+    if args.from_store:
+        store = GscWarehouse(args.from_store)
+        missing = store.missing_days(args.site, start, end, settle_days=0)
+        if missing:
+            print(f"WARNING: {len(missing)} day(s) in range not in the store; run tools/gsc_sync.py", file=sys.stderr)
+        write(store.keyword_metrics(args.site, start, end, kws, operator=args.operator), out_path)
+        return
+
+    sa_path = Path(args.key)
+    if not sa_path.exists():
+        parser.error(f"Service account file not found: {sa_path}")
 
     results: List[Dict] = []
+    errors: List[Tuple[str, BaseException]] = []
     try:
-        for kw in kws:
-            results.append(query_keyword(svc, args.site, start, end, kw))
-    except HttpError as e:
-        msg = str(e)
-        if "accessNotConfigured" in msg or "has not been used in project" in msg:
-            print("ERROR: Search Console API not enabled for this Cloud project.")
-            print("Fix: Enable it at https://console.developers.google.com/apis/api/searchconsole.googleapis.com/overview for your project, then retry.")
-        elif "insufficientPermissions" in msg or e.resp.status == 403:
-            print("ERROR: 403 permission issue. Ensure the service account is added as a user on the GSC property:", args.site)
-        elif e.resp.status == 404:
-            print("ERROR: 404 not found. Check siteUrl (use sc-domain:example.com for Domain properties).")
+        if args.per_keyword:
+            scheduler = GscScheduler(qps=args.qps, qpm=args.qpm, max_workers=args.workers)
+            results = [None] * len(kws)  # type: ignore[list-item]
+            done = 0
+            for i, row, err in iter_keyword_metrics(
+                lambda: google_clients.searchconsole(str(sa_path), SCOPES),
+                args.site, start, end, kws, operator=args.operator, scheduler=scheduler,
+            ):
+                results[i] = row
+                done += 1
+                if err is not None:
+                    errors.append((kws[i], err))
+                print(f"[{done}/{len(kws)}] {kws[i]}", file=sys.stderr)
         else:
-            print("HttpError:", msg)
+            with google_clients.searchconsole(str(sa_path), SCOPES) as svc:
+                results = bulk_keyword_metrics(svc, args.site, start, end, kws, operator=args.operator)
+    except HttpError as e:
+        explain_http_error(e, args.site)
         raise
 
-    out_path = Path(args.output) if args.output else None
-    if args.format == "csv":
-        to_csv(results, out_path)
-    else:
-        to_json(results, out_path)
+    # Successful keywords are written even when some failed; failed rows have empty metrics
+    write(results, out_path)
+    if errors:
+        print(f"ERROR: {len(errors)} of {len(kws)} keyword(s) failed (written with empty metrics):", file=sys.stderr)
+        for kw, err in errors:
+            print(f"  {kw}: {err}", file=sys.stderr)
+        http_err = next((err for _, err in errors if isinstance(err, HttpError)), None)
+        if http_err is not None:
+            explain_http_error(http_err, args.site, file=sys.stderr)
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -1,14 +1,22 @@
 import argparse
 import json
+import os
+import sys
 import datetime as dt
 from pathlib import Path
 
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
-from google.oauth2 import service_account
 
+_THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+# Ensure repository root (seolab) is on sys.path so we can import plugins/
+_REPO_ROOT = os.path.abspath(os.path.join(_THIS_DIR, os.pardir))
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
 
-SCOPES = ["https://www.googleapis.com/auth/webmasters.readonly"]
+from plugins import google_clients
+
+
+SCOPES = google_clients.GSC_SCOPES
 DEFAULT_SA = Path(r"C:\\Users\\rhode\\source\\repos\\seolab\\.secrets\\gsc\\service_account.json")
 DEFAULT_SITE = "sc-domain:ellieedwardsmarketing.com"
 
@@ -17,15 +25,13 @@ def main(sa_file: Path, site_url: str):
     if not sa_file.exists():
         raise FileNotFoundError(f"Service account file not found: {sa_file}")
 
-    creds = service_account.Credentials.from_service_account_file(str(sa_file), scopes=SCOPES)
-    svc = build("searchconsole", "v1", credentials=creds, cache_discovery=False)
-
     end = dt.date.today().isoformat()
     start = (dt.date.today() - dt.timedelta(days=28)).isoformat()
     body = {"startDate": start, "endDate": end, "dimensions": ["query"], "rowLimit": 10}
 
     try:
-        resp = svc.searchanalytics().query(siteUrl=site_url, body=body).execute()
+        with google_clients.searchconsole(str(sa_file), SCOPES) as svc:
+            resp = svc.searchanalytics().query(siteUrl=site_url, body=body).execute()
         print(json.dumps(resp, indent=2))
     except HttpError as e:
         # Provide friendly hints for common misconfigurations
@@ -0,0 +1,52 @@
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+_THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+# Ensure repository root (seolab) is on sys.path so we can import plugins/
+_REPO_ROOT = os.path.abspath(os.path.join(_THIS_DIR, os.pardir))
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
+
+from plugins.gsc_store import DEFAULT_DB, GscWarehouse
+from plugins import google_clients
+
+
+SCOPES = google_clients.GSC_SCOPES
+DEFAULT_SA = Path(r"C:\\Users\\rhode\\source\\repos\\seolab\\.secrets\\gsc\\service_account.json")
+DEFAULT_SITE = "sc-domain:ellieedwardsmarketing.com"
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Incrementally sync daily GSC rows (query/page/country/device) into the local warehouse"
+    )
+    parser.add_argument("--site", default=DEFAULT_SITE, help="GSC siteUrl e.g. sc-domain:example.com")
+    parser.add_argument("--key", default=str(DEFAULT_SA), help="Path to service_account.json")
+    parser.add_argument("--db", default=DEFAULT_DB, help="Warehouse SQLite path")
+    parser.add_argument("--start", help="First day (YYYY-MM-DD); default ~16 months ago")
+    parser.add_argument("--end", help="Last day (YYYY-MM-DD); default yesterday")
+    parser.add_argument("--status", action="store_true", help="Print stored coverage and exit")
+    args = parser.parse_args()
+
+    store = GscWarehouse(args.db)
+    if args.status:
+        print(json.dumps(store.coverage(args.site), indent=2))
+        return
+
+    sa_path = Path(args.key)
+    if not sa_path.exists():
+        parser.error(f"Service account file not found: {sa_path}")
+
+    def on_day(day: str, rows: int, done: int, total: int):
+        print(f"[{done}/{total}] {day}: {rows} rows")
+
+    with google_clients.searchconsole(str(sa_path), SCOPES) as svc:
+        summary = store.sync(svc, args.site, start=args.start, end=args.end, on_day=on_day)
+    print(json.dumps({**summary, "coverage": store.coverage(args.site)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()